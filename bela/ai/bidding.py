@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Iterable, Optional, Tuple
+
+from bela.ai.policy import GreedyPolicy
+from bela.game.main.bela import Bela
+from bela.game.main.cards import SUITS, SUIT_INDEX, cards_to_mask, popcount
+from bela.game.utils.log import Log
+from bela.sim.simulator import Simulator
+
+
+TABLE_PATH = os.path.join(os.path.dirname(__file__), "data", "bidding.json")
+
+KEC_BIT = 1 << 7
+CENER_BIT = 1 << 3
+# cards worth no points, the lowest ranks of their suit: 7 and 8 of adut, 7, 8 and 9 otherwise
+TRUMP_BLANKS = 0b11
+BLANKS = 0b111
+
+
+def suit_masks(hand: int) -> Tuple[int, int, int, int]:
+    return hand & 0xFF, hand >> 8 & 0xFF, hand >> 16 & 0xFF, hand >> 24 & 0xFF
+
+
+def _suit_key(mask: int, blanks: int) -> int:
+    return mask & ~blanks | popcount(mask & blanks) << 8
+
+
+def canonical_key(hand: int, trump: int) -> int:
+    """
+    Key of the hand mask with the given trump that is the same for every hand that only differs
+    by a permutation of the other three suits or by which of the cards worth no points it holds:
+    every suit is its cards worth points and the number of the others, the other suits sorted.
+    """
+    masks = suit_masks(hand)
+    a, b, c = sorted((_suit_key(masks[s], BLANKS) for s in range(4) if s != trump), reverse=True)
+    return _suit_key(masks[trump], TRUMP_BLANKS) << 30 | a << 20 | b << 10 | c
+
+
+def coarse_key(hand: int, trump: int) -> int:
+    """
+    Coarser key used when a canonical key has too few samples: the exact trump cards and only the
+    length, kec and cener of the other suits.
+    """
+    masks = suit_masks(hand)
+    a, b, c = sorted(
+        (popcount(masks[s]) << 2 | bool(masks[s] & KEC_BIT) << 1 | bool(masks[s] & CENER_BIT)
+         for s in range(4) if s != trump),
+        reverse=True
+    )
+    return masks[trump] << 18 | a << 12 | b << 6 | c
+
+
+class BiddingTable:
+
+    """
+    Average result of calling adut with a 6 card hand, as the points of the callers team minus the
+    points of the other team at the end of the deal. Results are kept per canonical key and per
+    coarse key; a lookup uses the first one that has at least min_samples samples.
+    """
+
+    def __init__(self, min_samples: int = 16) -> None:
+        self.min_samples = min_samples
+        self.exact: dict[int, list] = {}
+        self.coarse: dict[int, list] = {}
+
+    def add(self, hand: int, trump: int, value: float) -> None:
+        for table, key in ((self.exact, canonical_key(hand, trump)), (self.coarse, coarse_key(hand, trump))):
+            entry = table.get(key)
+            if entry is None:
+                table[key] = [value, 1]
+            else:
+                entry[0] += value
+                entry[1] += 1
+
+    def merge(self, other: "BiddingTable") -> None:
+        for table, other_table in ((self.exact, other.exact), (self.coarse, other.coarse)):
+            for key, (total, count) in other_table.items():
+                entry = table.get(key)
+                if entry is None:
+                    table[key] = [total, count]
+                else:
+                    entry[0] += total
+                    entry[1] += count
+
+    def value(self, hand: int, trump: int) -> Optional[float]:
+        entry = self.exact.get(canonical_key(hand, trump))
+        if entry is None or entry[1] < self.min_samples:
+            entry = self.coarse.get(coarse_key(hand, trump))
+        if entry is None:
+            return None
+        return entry[0] / entry[1]
+
+    def scores(self, hand: Iterable[Tuple[str, str]]) -> dict[str, Optional[float]]:
+        mask = cards_to_mask(hand)
+        return {suit: self.value(mask, SUIT_INDEX[suit]) for suit in SUITS}
+
+    def prune(self) -> None:
+        """Drops canonical keys with too few samples, the coarse key answers for them anyway."""
+        self.exact = {key: entry for key, entry in self.exact.items() if entry[1] >= self.min_samples}
+
+    def save(self, path: str = TABLE_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {
+            "min_samples": self.min_samples,
+            "exact": [[key, total, count] for key, (total, count) in self.exact.items()],
+            "coarse": [[key, total, count] for key, (total, count) in self.coarse.items()],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str = TABLE_PATH) -> "BiddingTable":
+        with open(path) as f:
+            data = json.load(f)
+        table = cls(data["min_samples"])
+        table.exact = {key: [total, count] for key, total, count in data["exact"]}
+        table.coarse = {key: [total, count] for key, total, count in data["coarse"]}
+        return table
+
+
+_table: Optional[BiddingTable] = None
+
+
+def load_table() -> Optional[BiddingTable]:
+    global _table
+    if _table is None and os.path.exists(TABLE_PATH):
+        _table = BiddingTable.load(TABLE_PATH)
+    return _table
+
+
+def play_called_deal(seed: int, caller: int, trump: str, simulator: Simulator) -> int:
+    """
+    Plays the deal of the seed with adut called by the caller and returns the points of the callers
+    team minus the points of the other team.
+    """
+    game = Bela(1001, simulator.teams, seed)
+    game.set_adut(trump)
+    game.adut_caller = caller
+    game.next_game_state()
+
+    simulator.call_zvanja(game)
+    while not game.current_game_over and not game.current_match_over:
+        simulator.play_trick(game)
+
+    points = [p or 0 for p in game.points]
+    return points[caller % 2] - points[1 - caller % 2]
+
+
+def build_shard(task: Tuple[int, int]) -> BiddingTable:
+    seed, deals = task
+    rng = random.Random(seed)
+    simulator = Simulator([GreedyPolicy(rng.getrandbits(32)) for _ in range(4)])
+    table = BiddingTable()
+
+    for _ in range(deals):
+        deal_seed = rng.getrandbits(48)
+        hands = Bela(1001, simulator.teams, deal_seed).get_deal()[0]
+        for caller in range(4):
+            hand = cards_to_mask(hands[caller])
+            for trump in SUITS:
+                table.add(hand, SUIT_INDEX[trump], play_called_deal(deal_seed, caller, trump, simulator))
+    return table
+
+
+def build_table(deals: int, seed: int = 0, processes: Optional[int] = None, shards: int = 64) -> BiddingTable:
+    """
+    Builds the table by playing every deal with GreedyPolicy on all seats 16 times, once for every
+    seat calling every suit.
+    """
+    shards = max(1, min(deals, shards))
+    rng = random.Random(seed)
+    tasks = [(rng.getrandbits(48), deals // shards + int(i < deals % shards)) for i in range(shards)]
+
+    with Pool(processes) as pool:
+        results = pool.map(build_shard, tasks)
+
+    table = BiddingTable()
+    for result in results:
+        table.merge(result)
+    return table
+
+
+class BiddingPolicy(GreedyPolicy):
+
+    """
+    Calls the adut with the best average result in the bidding table, if it is at least the margin.
+    Without a table it calls like GreedyPolicy.
+    """
+
+    def __init__(self, seed: Optional[int] = None, margin: float = 30, table: Optional[BiddingTable] = None) -> None:
+        super().__init__(seed)
+        self.margin = margin
+        self.table = table
+
+    def call_adut(self, game: Bela, id_: int, must_call: bool) -> Optional[str]:
+        table = self.table or load_table()
+        if table is None:
+            return super().call_adut(game, id_, must_call)
+
+        scores = table.scores(game.get_netalon(id_))
+        known = {suit: score for suit, score in scores.items() if score is not None}
+        if not known:
+            return super().call_adut(game, id_, must_call)
+
+        best = max(known, key=known.get)
+        if must_call or known[best] >= self.margin:
+            return best
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bela.ai.bidding", description="Builds the adut calling table.")
+    parser.add_argument("-n", "--deals", type=int, default=100000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-j", "--processes", type=int, default=None, help="defaults to cpu count")
+    parser.add_argument("-o", "--output", default=TABLE_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build_table(args.deals, args.seed, args.processes)
+    table.prune()
+    table.save(args.output)
+
+    Log.i("BIDDING", f"{args.deals} deals in {time.perf_counter() - start:.1f}s, "
+                     f"{len(table.exact)} canonical and {len(table.coarse)} coarse keys saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import random
+import time
+from multiprocessing import Pool
+from typing import Optional, Tuple
+
+import numpy as np
+
+from bela.ai.features import STATE_SIZE, POINTS_SCALE, FeatureEncoder, rotate_card, scored_difference, state_row
+from bela.ai.ismcts import ISMCTSPolicy
+from bela.ai.network import NETWORK_PATH, PolicyValueNetwork
+from bela.ai.pimc import PIMCPolicy
+from bela.ai.policy import Policy
+from bela.ai.replay import ReplayBuffer
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARDS, TRUMP_INDEX
+from bela.game.utils.log import Log
+from bela.sim.simulator import Simulator
+
+
+TEACHERS = {
+    "ismcts": lambda seed, budget: ISMCTSPolicy(seed, time_budget=budget),
+    "pimc": lambda seed, budget: PIMCPolicy(seed, time_budget=budget),
+}
+
+
+class RecordingPolicy(Policy):
+
+    """
+    Plays like the teacher search policy and appends the state row and the (rotated) move
+    distribution of the teacher for every card decision to records.
+    """
+
+    def __init__(self, teacher: Policy, records: list) -> None:
+        super().__init__()
+        self.teacher = teacher
+        self.records = records
+
+    def call_adut(self, game: Bela, id_: int, must_call: bool) -> Optional[str]:
+        return self.teacher.call_adut(game, id_, must_call)
+
+    def play_card(self, game: Bela, id_: int) -> Tuple[str, str]:
+        distribution = self.teacher.move_distribution(game, id_)
+        if not distribution:
+            return self.teacher.play_card(game, id_)
+
+        trump = TRUMP_INDEX[game.adut]
+        policy = np.zeros(32, dtype=np.float32)
+        for card, p in distribution.items():
+            policy[rotate_card(card, trump)] = p
+        self.records.append((id_, state_row(game, id_), policy))
+        return CARDS[max(distribution, key=distribution.get)]
+
+
+def record_shard(task: Tuple[int, int, str, float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Plays the given number of deals with the teacher on all four seats and returns the state rows,
+    teacher distributions and, for every decision, how much the points difference of the deciding
+    team changed from there to the end of the deal.
+    """
+    seed, deals, teacher, budget = task
+    rng = random.Random(seed)
+    records = []
+    simulator = Simulator([RecordingPolicy(TEACHERS[teacher](rng.getrandbits(32), budget), records)
+                           for _ in range(4)])
+
+    states, policies, outcomes = [], [], []
+    game = Bela(1001, simulator.teams, rng.getrandbits(48))
+    for _ in range(deals):
+        if game.current_match_over:
+            game = Bela(1001, simulator.teams, rng.getrandbits(48))
+
+        records.clear()
+        simulator.play_deal(game)
+        points = [p or 0 for p in game.points]
+        for seat, row, policy in records:
+            states.append(row)
+            policies.append(policy)
+            outcomes.append((points[seat % 2] - points[1 - seat % 2] - scored_difference(row)) / POINTS_SCALE)
+
+        if not game.current_match_over:
+            for i in range(4):
+                game.end_game(i)
+
+    return (np.array(states, dtype=np.int64).reshape(-1, STATE_SIZE), np.array(policies, dtype=np.float32),
+            np.array(outcomes, dtype=np.float32))
+
+
+def record(replay: ReplayBuffer, deals: int, teacher: str = "ismcts", budget: float = 0.05, seed: int = 0,
+           processes: Optional[int] = None, shard_deals: int = 10) -> None:
+    """
+    Records the teacher over the deals into the replay buffer, in shards over a process pool.
+    """
+    rng = random.Random(seed)
+    shards = max(1, deals // shard_deals)
+    tasks = [(rng.getrandbits(48), deals // shards + int(i < deals % shards), teacher, budget) for i in range(shards)]
+
+    start = time.perf_counter()
+    recorded = 0
+    with Pool(processes) as pool:
+        for states, policies, outcomes in pool.imap_unordered(record_shard, tasks):
+            replay.add(states, policies, np.ones(len(states), dtype=np.float32), outcomes)
+            recorded += len(states)
+    replay.flush()
+
+    duration = time.perf_counter() - start
+    Log.i("DISTILL", f"Recorded {recorded} positions from {deals} deals in {duration:.1f}s "
+                     f"({recorded / duration:.1f} positions/sec)")
+
+
+def distill(replay: ReplayBuffer, network: PolicyValueNetwork, updates: int, batch_size: int = 256,
+            lr: float = 1e-3, seed: int = 0, report_every: int = 1000) -> Tuple[float, float]:
+    """
+    Trains the network to predict the teacher distributions and the deal outcomes in the replay
+    buffer. Returns the smoothed policy and value losses.
+    """
+    rng = np.random.default_rng(seed)
+    encoder = FeatureEncoder(batch_size)
+    batch = replay.sample(np.zeros(batch_size, dtype=np.int64))
+    policy_loss = value_loss = None
+
+    for update in range(1, updates + 1):
+        states, policies, weights, outcomes = replay.sample(replay.random_indices(rng, batch_size), batch)
+        losses = network.train_step(encoder.encode(states), policies, outcomes, weights, lr)
+        policy_loss = losses[0] if policy_loss is None else 0.99 * policy_loss + 0.01 * losses[0]
+        value_loss = losses[1] if value_loss is None else 0.99 * value_loss + 0.01 * losses[1]
+        if update % report_every == 0:
+            Log.i("DISTILL", f"{update} updates, policy loss {policy_loss:.3f}, value loss {value_loss:.3f}")
+
+    return policy_loss, value_loss
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bela.ai.distill",
+                                     description="Distills a search bot into the network.")
+    parser.add_argument("--replay", default="distill", help="buffer directory for the recorded positions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record the teacher playing headless deals")
+    record_parser.add_argument("-n", "--deals", type=int, default=1000)
+    record_parser.add_argument("-t", "--teacher", choices=sorted(TEACHERS), default="ismcts")
+    record_parser.add_argument("--budget", type=float, default=0.05, help="teacher seconds per move")
+    record_parser.add_argument("--capacity", type=int, default=1 << 22, help="positions in a new buffer")
+    record_parser.add_argument("-j", "--processes", type=int, default=None, help="defaults to cpu count")
+    record_parser.add_argument("-s", "--seed", type=int, default=0)
+
+    train_parser = subparsers.add_parser("train", help="train the network on the recorded positions")
+    train_parser.add_argument("-u", "--updates", type=int, default=20000)
+    train_parser.add_argument("-b", "--batch-size", type=int, default=256)
+    train_parser.add_argument("--lr", type=float, default=1e-3)
+    train_parser.add_argument("--hidden", type=int, nargs="+", default=[256, 256])
+    train_parser.add_argument("--resume", action="store_true",
+                              help="start from the network and optimizer state in output")
+    train_parser.add_argument("-s", "--seed", type=int, default=0)
+    train_parser.add_argument("-o", "--output", required=True,
+                              help=f"where to save the network, the bots load {NETWORK_PATH}")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        replay = ReplayBuffer(args.replay, args.capacity)
+        record(replay, args.deals, args.teacher, args.budget, args.seed, args.processes)
+    else:
+        replay = ReplayBuffer(args.replay)
+        if not len(replay):
+            raise ValueError(f"Replay buffer {args.replay} is empty, record some deals first.")
+        network = PolicyValueNetwork.load(args.output) if args.resume else \
+            PolicyValueNetwork(args.hidden, args.seed)
+        distill(replay, network, args.updates, args.batch_size, args.lr, args.seed)
+        network.save(args.output, optimizer=True)
+        Log.i("DISTILL", f"Saved network to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
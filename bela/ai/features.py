@@ -0,0 +1,147 @@
+"""
+Fixed length feature encoding of the card playing phase as seen by one player.
+
+Everything is relative to the player: seats are numbered from him (0 is the player, 2 his partner)
+and suits are rotated so adut is always suit 0, which makes positions that only differ by the adut
+suit or the seat look the same to the network. Card features use the rotated card index.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from bela.ai.sampler import infer_exclusions, known_masks
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, FULL_MASK, TRUMP_INDEX
+
+
+HAND = 0
+TRICK = HAND + 32
+PLAYED = TRICK + 4 * 32
+KNOWN = PLAYED + 4 * 32
+EXCLUDED = KNOWN + 4 * 32
+LEGAL = EXCLUDED + 4 * 32
+CALLER = LEGAL + 32
+POINTS = CALLER + 4
+FEATURES = POINTS + 4
+
+POINTS_SCALE = 162.0
+
+# state rows: the masks come first, in the same order as their features
+S_HAND = 0
+S_TRICK = S_HAND + 1
+S_PLAYED = S_TRICK + 4
+S_KNOWN = S_PLAYED + 4
+S_EXCLUDED = S_KNOWN + 4
+S_LEGAL = S_EXCLUDED + 4
+MASKS = S_LEGAL + 1
+S_TRUMP = MASKS
+S_CALLER = S_TRUMP + 1
+S_POINTS = S_CALLER + 1
+STATE_SIZE = S_POINTS + 4
+
+_BITS = np.arange(32, dtype=np.uint64)
+_SEATS = np.arange(4, dtype=np.int64)
+_ONE = np.uint64(1)
+_32 = np.uint64(32)
+_FULL = np.uint64(FULL_MASK)
+
+
+def rotate_card(card: int, trump: int) -> int:
+    return ((card >> 3) - trump & 3) << 3 | card & 7
+
+
+def unrotate_card(card: int, trump: int) -> int:
+    return ((card >> 3) + trump & 3) << 3 | card & 7
+
+
+def state_row(game: Bela, id_: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns the compact state of the game as seen by player id_: STATE_SIZE ints, mostly card masks
+    that are not rotated yet. This is the only part of the encoding that reads the game object.
+    """
+    row = np.zeros(STATE_SIZE, dtype=np.int64) if out is None else out
+    trump = TRUMP_INDEX[game.adut]
+    plays = [(p, CARD_INDEX[card]) for p, card in game.played_cards]
+
+    masks = [0] * MASKS
+    masks[S_HAND] = game.cards[id_].mask
+    in_trick = len(plays) % 4
+    for i, (player, card) in enumerate(plays):
+        offset = S_TRICK if i >= len(plays) - in_trick else S_PLAYED
+        masks[offset + (player - id_) % 4] |= CARD_BITS[card]
+
+    known = known_masks(game)
+    excluded = infer_exclusions(plays, trump)
+    for player in range(4):
+        masks[S_KNOWN + (player - id_) % 4] = known[player]
+        masks[S_EXCLUDED + (player - id_) % 4] = excluded[player]
+    if game.player_turn == id_:
+        masks[S_LEGAL] = game.legal_mask(id_)
+
+    team = id_ % 2
+    row[:MASKS] = masks
+    row[S_TRUMP] = trump
+    row[S_CALLER] = (game.adut_caller - id_) % 4 if game.adut_caller >= 0 else -1
+    row[S_POINTS:S_POINTS + 4] = (game.points[team] or 0, game.points[1 - team] or 0,
+                                  game.zvanja_points[team], game.zvanja_points[1 - team])
+    return row
+
+
+def scored_difference(row: np.ndarray) -> int:
+    """Points difference of the players team already scored in the state row, zvanja included."""
+    return int(row[S_POINTS] - row[S_POINTS + 1] + row[S_POINTS + 2] - row[S_POINTS + 3])
+
+
+class FeatureEncoder:
+
+    """
+    Turns a batch of state rows into features with a few whole-array operations. All the work
+    arrays are allocated once for batch_size rows, so encoding batch after batch allocates nothing
+    but array views. The returned features are a view of the encoders own buffer unless out is
+    given, so they are overwritten by the next call.
+    """
+
+    def __init__(self, batch_size: int = 1024) -> None:
+        self.batch_size = batch_size
+        self.masks = np.empty((batch_size, MASKS), dtype=np.uint64)
+        self.shifted = np.empty((batch_size, MASKS), dtype=np.uint64)
+        self.shift = np.empty((batch_size, 1), dtype=np.uint64)
+        self.bits = np.empty((batch_size, MASKS, 32), dtype=np.uint64)
+        self.caller = np.empty((batch_size, 4), dtype=bool)
+        self.out = np.empty((batch_size, FEATURES), dtype=np.float32)
+
+    def encode(self, states: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        n = len(states)
+        if n > self.batch_size:
+            raise ValueError(f"Batch of {n} states doesn't fit in encoder for {self.batch_size}.")
+        out = self.out[:n] if out is None else out
+
+        # rotate every mask right by 8 * trump bits so adut becomes suit 0
+        masks, shifted, shift = self.masks[:n], self.shifted[:n], self.shift[:n]
+        np.copyto(masks, states[:, :MASKS], casting="unsafe")
+        np.multiply(states[:, S_TRUMP:S_TRUMP + 1], 8, out=shift, casting="unsafe")
+        np.right_shift(masks, shift, out=shifted)
+        np.subtract(_32, shift, out=shift)
+        np.left_shift(masks, shift, out=masks)
+        np.bitwise_or(masks, shifted, out=masks)
+        np.bitwise_and(masks, _FULL, out=masks)
+
+        bits = self.bits[:n]
+        np.right_shift(masks[:, :, None], _BITS, out=bits)
+        np.bitwise_and(bits, _ONE, out=bits)
+        np.copyto(out[:, :LEGAL + 32], bits.reshape(n, MASKS * 32), casting="unsafe")
+
+        caller = self.caller[:n]
+        np.equal(states[:, S_CALLER:S_CALLER + 1], _SEATS, out=caller)
+        np.copyto(out[:, CALLER:CALLER + 4], caller, casting="unsafe")
+        np.multiply(states[:, S_POINTS:S_POINTS + 4], 1 / POINTS_SCALE, out=out[:, POINTS:POINTS + 4],
+                    casting="unsafe")
+        return out
+
+
+def encode(game: Bela, id_: int) -> np.ndarray:
+    """
+    Encodes the card playing phase of the game as seen by player id_ into FEATURES floats.
+    """
+    return FeatureEncoder(1).encode(state_row(game, id_)[None])[0]
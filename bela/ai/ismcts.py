@@ -0,0 +1,226 @@
+import math
+import multiprocessing
+import os
+import time
+from array import array
+from typing import Optional, Tuple
+
+from bela.ai.bidding import BiddingPolicy
+from bela.ai.sampler import DealSampler
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, CARDS, mask_to_ints
+from bela.game.main.position import MutablePosition
+
+
+NO_NODE = -1
+
+
+class ISMCTSPolicy(BiddingPolicy):
+
+    """
+    Single observer information set Monte Carlo tree search player. Every iteration deals the unseen
+    cards randomly, walks the shared tree using only the cards legal in that deal, adds one node and
+    finishes the deal with random play. The search stops at the time budget and plays the card that
+    was visited most, so a move never takes (much) longer than the budget.
+
+    The tree is kept in flat arrays indexed by node, allocated once for max_nodes nodes and reused
+    for every move. When they fill up the search keeps going without growing the tree.
+    """
+
+    def __init__(self, seed: Optional[int] = None, time_budget: float = 0.5, max_nodes: int = 1 << 16,
+                 exploration: float = 0.7) -> None:
+        super().__init__(seed)
+        self.time_budget = time_budget
+        self.max_nodes = max_nodes
+        self.exploration = exploration
+
+        self.parent = array("i", [NO_NODE]) * max_nodes
+        self.child = array("i", [NO_NODE]) * max_nodes
+        self.sibling = array("i", [NO_NODE]) * max_nodes
+        self.move = array("b", [-1]) * max_nodes
+        self.player = array("b", [-1]) * max_nodes
+        self.visits = array("i", [0]) * max_nodes
+        self.available = array("i", [0]) * max_nodes
+        self.reward = array("d", [0.0]) * max_nodes
+        self.size = 0
+        self.iterations = 0
+
+    def play_card(self, game: Bela, id_: int) -> Tuple[str, str]:
+        distribution = self.move_distribution(game, id_)
+        if not distribution:
+            return super().play_card(game, id_)
+        return CARDS[max(distribution, key=distribution.get)]
+
+    def move_distribution(self, game: Bela, id_: int) -> dict[int, float]:
+        """
+        Returns the share of root visits of every card searched within the time budget, or an empty
+        dict if not even one iteration finished.
+        """
+        legal = game.legal_moves(id_)
+        if len(legal) == 1:
+            return {CARD_INDEX[legal[0]]: 1.0}
+
+        deadline = time.perf_counter() + self.time_budget
+        counts = self.visit_counts(DealSampler.from_bela(game, id_), deadline)
+        total = sum(counts.values())
+        return {card: visits / total for card, visits in counts.items()} if total else {}
+
+    def search(self, sampler: DealSampler, deadline: Optional[float] = None) -> Optional[int]:
+        """
+        Searches until the deadline (time budget from now by default) and returns the most visited
+        card, or None if not even one iteration finished.
+        """
+        counts = self.visit_counts(sampler, deadline)
+        if not counts:
+            return None
+        return max(counts, key=counts.get)
+
+    def visit_counts(self, sampler: DealSampler, deadline: Optional[float] = None) -> dict[int, int]:
+        if deadline is None:
+            deadline = time.perf_counter() + self.time_budget
+
+        self.reset()
+        while time.perf_counter() < deadline:
+            self.iterate(sampler)
+        return self.root_visits()
+
+    def root_visits(self) -> dict[int, int]:
+        counts = {}
+        node = self.child[0] if self.size else NO_NODE
+        while node != NO_NODE:
+            counts[self.move[node]] = self.visits[node]
+            node = self.sibling[node]
+        return counts
+
+    def reset(self) -> None:
+        self.size = 1
+        self.iterations = 0
+        self.parent[0] = self.child[0] = self.sibling[0] = NO_NODE
+        self.move[0] = self.player[0] = -1
+        self.visits[0] = self.available[0] = 0
+        self.reward[0] = 0.0
+
+    def add_node(self, parent: int, move: int, player: int) -> int:
+        node = self.size
+        self.size += 1
+        self.parent[node] = parent
+        self.child[node] = NO_NODE
+        self.sibling[node] = self.child[parent]
+        self.child[parent] = node
+        self.move[node] = move
+        self.player[node] = player
+        self.visits[node] = self.available[node] = 0
+        self.reward[node] = 0.0
+        return node
+
+    def iterate(self, sampler: DealSampler) -> None:
+        world = MutablePosition(sampler.sample(self.random))
+        child, sibling, move = self.child, self.sibling, self.move
+        visits, available, reward = self.visits, self.available, self.reward
+        exploration = self.exploration
+        start = world.points[:]
+
+        # selection and expansion
+        node = 0
+        path = [0]
+        while not world.is_over:
+            untried = world.legal_moves()
+            best, best_score = NO_NODE, -1.0
+            c = child[node]
+            while c != NO_NODE:
+                bit = CARD_BITS[move[c]]
+                if untried & bit:
+                    untried ^= bit
+                    available[c] += 1
+                    score = reward[c] / visits[c] + exploration * math.sqrt(math.log(available[c]) / visits[c])
+                    if score > best_score:
+                        best, best_score = c, score
+                c = sibling[c]
+
+            if untried and self.size < self.max_nodes:
+                card = self.random.choice(mask_to_ints(untried))
+                path.append(self.add_node(node, card, world.turn))
+                world.play(card)
+                break
+            if best == NO_NODE:
+                break
+
+            node = best
+            path.append(node)
+            world.play(move[node])
+
+        # random play out
+        while not world.is_over:
+            world.play(self.random.choice(mask_to_ints(world.legal_moves())))
+
+        gained = (world.points[0] - start[0], world.points[1] - start[1])
+        total = gained[0] + gained[1]
+        result = gained[0] / total if total else 0.5
+
+        player = self.player
+        for node in path:
+            visits[node] += 1
+            reward[node] += 1 - result if player[node] % 2 else result
+        self.iterations += 1
+
+
+_worker_policy: Optional[ISMCTSPolicy] = None
+
+
+def _init_worker(max_nodes: int, exploration: float) -> None:
+    global _worker_policy
+    _worker_policy = ISMCTSPolicy(None, 0, max_nodes, exploration)
+
+
+def _search_root(task: Tuple[DealSampler, float, int]) -> dict[int, int]:
+    sampler, deadline, seed = task
+    _worker_policy.random.seed(seed)
+    # deadlines are passed as time.time() since perf_counter values don't carry over between processes
+    return _worker_policy.visit_counts(sampler, time.perf_counter() + deadline - time.time())
+
+
+class ParallelISMCTSPolicy(ISMCTSPolicy):
+
+    """
+    Root parallel ISMCTS. Every process searches its own tree from the same position until the
+    deadline and the visit counts of the root moves are summed up. The calling process searches one
+    of the trees itself, so processes - 1 workers are started (once, on the first search) and kept
+    until close, or the end of a with block. Inside a daemon process (like a tournament worker) it
+    can't start workers and searches alone.
+    """
+
+    def __init__(self, seed: Optional[int] = None, time_budget: float = 0.5, max_nodes: int = 1 << 16,
+                 exploration: float = 0.7, processes: Optional[int] = None) -> None:
+        super().__init__(seed, time_budget, max_nodes, exploration)
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = None
+
+    def visit_counts(self, sampler: DealSampler, deadline: Optional[float] = None) -> dict[int, int]:
+        if deadline is None:
+            deadline = time.perf_counter() + self.time_budget
+        if self.processes < 2 or multiprocessing.current_process().daemon:
+            return super().visit_counts(sampler, deadline)
+
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes - 1, _init_worker, (self.max_nodes, self.exploration))
+
+        wall_deadline = time.time() + deadline - time.perf_counter()
+        tasks = [(sampler, wall_deadline, self.random.getrandbits(32)) for _ in range(self.processes - 1)]
+        pending = self.pool.map_async(_search_root, tasks, chunksize=1)
+
+        counts = super().visit_counts(sampler, deadline)
+        for worker_counts in pending.get():
+            for card, visits in worker_counts.items():
+                counts[card] = counts.get(card, 0) + visits
+        return counts
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["pool"] = None
+        return state
@@ -0,0 +1,237 @@
+import os
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from bela.ai.bidding import BiddingPolicy
+from bela.ai.features import FEATURES, LEGAL, FeatureEncoder, state_row, unrotate_card
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARDS, TRUMP_INDEX
+
+
+NETWORK_PATH = os.path.join(os.path.dirname(__file__), "data", "network.npz")
+
+
+class PolicyValueNetwork:
+
+    """
+    Small fully connected network over the features of bela.ai.features. A shared ReLU trunk feeds
+    a policy head with a logit for every (rotated) card and a value head with the expected points
+    difference of the players team for the rest of the deal, in units of POINTS_SCALE.
+    Every method works on a batch of positions, one per row.
+    """
+
+    def __init__(self, hidden: Sequence[int] = (256, 256), seed: Optional[int] = None) -> None:
+        rng = np.random.default_rng(seed)
+        sizes = [FEATURES, *hidden]
+
+        self.weights = [
+            (rng.standard_normal((a, b)) * np.sqrt(2 / a)).astype(np.float32) for a, b in zip(sizes, sizes[1:])
+        ]
+        self.biases = [np.zeros(b, dtype=np.float32) for b in sizes[1:]]
+        # the policy and value heads are one matrix, column 32 is the value
+        self.head_weights = (rng.standard_normal((sizes[-1], 33)) * np.sqrt(1 / sizes[-1])).astype(np.float32)
+        self.head_bias = np.zeros(33, dtype=np.float32)
+        self.moments = None
+        self.steps = 0
+
+    @property
+    def hidden(self) -> Tuple[int, ...]:
+        return tuple(b.shape[0] for b in self.biases)
+
+    def forward(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the card logits (batch, 32) and values (batch, ) for the features (batch, FEATURES).
+        """
+        h = x
+        for w, b in zip(self.weights, self.biases):
+            h = h @ w
+            h += b
+            np.maximum(h, 0, out=h)
+        out = h @ self.head_weights
+        out += self.head_bias
+        return out[:, :32], out[:, 32]
+
+    def predict(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the probabilities of playing every card, zero for the cards the legal features
+        don't allow, and the values.
+        """
+        logits, values = self.forward(x)
+        legal = x[:, LEGAL:LEGAL + 32] > 0
+        logits = np.where(legal, logits, -np.inf)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return probs, values
+
+    def best_cards(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the most likely legal (rotated) card and the value of every position."""
+        logits, values = self.forward(x)
+        logits = np.where(x[:, LEGAL:LEGAL + 32] > 0, logits, -np.inf)
+        return logits.argmax(axis=1), values
+
+    def parameters(self) -> list[np.ndarray]:
+        params = []
+        for w, b in zip(self.weights, self.biases):
+            params += [w, b]
+        return params + [self.head_weights, self.head_bias]
+
+    def get_flat(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        params = self.parameters()
+        if out is None:
+            out = np.empty(sum(p.size for p in params), dtype=np.float32)
+        i = 0
+        for p in params:
+            out[i:i + p.size] = p.ravel()
+            i += p.size
+        return out
+
+    def set_flat(self, flat: np.ndarray) -> None:
+        i = 0
+        for p in self.parameters():
+            p[...] = flat[i:i + p.size].reshape(p.shape)
+            i += p.size
+
+    def train_step(self, x: np.ndarray, policy: np.ndarray, value: np.ndarray,
+                   policy_weight: Optional[np.ndarray] = None, lr: float = 1e-3,
+                   value_coef: float = 1.0) -> Tuple[float, float]:
+        """
+        One Adam step on a batch. The policy loss is the cross entropy between the target card
+        distributions (batch, 32) and the legal masked softmax, optionally weighted per position
+        (an advantage for policy gradient). The value loss is the mean squared error to value.
+        Returns both losses before the step.
+        """
+        n = len(x)
+        hs = [x]
+        for w, b in zip(self.weights, self.biases):
+            h = hs[-1] @ w
+            h += b
+            np.maximum(h, 0, out=h)
+            hs.append(h)
+        out = hs[-1] @ self.head_weights
+        out += self.head_bias
+
+        legal = x[:, LEGAL:LEGAL + 32] > 0
+        logits = np.where(legal, out[:, :32], -np.inf)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        total = probs.sum(axis=1, keepdims=True)
+        probs /= total
+
+        weight = np.ones(n, dtype=np.float32) if policy_weight is None else policy_weight
+        log_probs = np.where(legal, logits - np.log(total), 0)
+        policy_loss = float(-(weight * (policy * log_probs).sum(axis=1)).mean())
+        error = out[:, 32] - value
+        value_loss = float((error ** 2).mean())
+
+        grad = np.empty_like(out)
+        grad[:, :32] = (probs * policy.sum(axis=1, keepdims=True) - policy) * (weight / n)[:, None]
+        grad[:, 32] = 2 * value_coef * error / n
+
+        grads = [hs[-1].T @ grad, grad.sum(axis=0)]
+        dh = grad @ self.head_weights.T
+        layer_grads = []
+        for i in range(len(self.weights) - 1, -1, -1):
+            dh *= hs[i + 1] > 0
+            layer_grads = [hs[i].T @ dh, dh.sum(axis=0)] + layer_grads
+            if i:
+                dh = dh @ self.weights[i].T
+        self.adam(layer_grads + grads, lr)
+
+        return policy_loss, value_loss
+
+    def adam(self, grads: list[np.ndarray], lr: float, beta1: float = 0.9, beta2: float = 0.999,
+             eps: float = 1e-8) -> None:
+        params = self.parameters()
+        if self.moments is None:
+            self.moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+        self.steps += 1
+        scale = lr * np.sqrt(1 - beta2 ** self.steps) / (1 - beta1 ** self.steps)
+
+        for p, g, (m, v) in zip(params, grads, self.moments):
+            m *= beta1
+            m += (1 - beta1) * g
+            v *= beta2
+            v += (1 - beta2) * g * g
+            p -= (scale * m / (np.sqrt(v) + eps)).astype(np.float32)
+
+    def save(self, path: str = NETWORK_PATH, optimizer: bool = False) -> None:
+        """
+        Saves the weights to an .npz file. With optimizer the Adam moments and step count are saved
+        too, so training can resume where it stopped.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {f"w{i}": w for i, w in enumerate(self.weights)}
+        arrays.update({f"b{i}": b for i, b in enumerate(self.biases)})
+        if optimizer and self.moments is not None:
+            arrays.update({f"m{i}": m for i, (m, _) in enumerate(self.moments)})
+            arrays.update({f"v{i}": v for i, (_, v) in enumerate(self.moments)})
+            arrays["steps"] = np.array(self.steps)
+        np.savez(path, head_w=self.head_weights, head_b=self.head_bias, **arrays)
+
+    @classmethod
+    def load(cls, path: str = NETWORK_PATH) -> "PolicyValueNetwork":
+        with np.load(path) as data:
+            layers = sum(1 for name in data.files if name.startswith("w"))
+            network = cls(())
+            network.weights = [data[f"w{i}"] for i in range(layers)]
+            network.biases = [data[f"b{i}"] for i in range(layers)]
+            network.head_weights = data["head_w"]
+            network.head_bias = data["head_b"]
+            if "steps" in data.files:
+                params = len(network.parameters())
+                network.moments = [(data[f"m{i}"], data[f"v{i}"]) for i in range(params)]
+                network.steps = int(data["steps"])
+        if network.weights and network.weights[0].shape[0] != FEATURES:
+            raise ValueError(f"Network at {path} expects {network.weights[0].shape[0]} features, not {FEATURES}.")
+        return network
+
+
+_network: Optional[PolicyValueNetwork] = None
+
+
+def load_network() -> PolicyValueNetwork:
+    """
+    Returns the trained network if there is one, or an untrained one otherwise. The trained network
+    isn't part of the repository, python -m bela.ai.distill builds it (record, then train -o NETWORK_PATH).
+    """
+    global _network
+    if _network is None:
+        _network = PolicyValueNetwork.load() if os.path.exists(NETWORK_PATH) else PolicyValueNetwork(seed=0)
+    return _network
+
+
+class NetworkPolicy(BiddingPolicy):
+
+    """
+    Plays the legal card the network likes most, or samples one from the network probabilities
+    sharpened or flattened by the temperature when it is above zero. If records is a list, every
+    decision is appended to it as (seat, state row, rotated card, value) for training.
+    """
+
+    def __init__(self, seed: Optional[int] = None, network: Optional[PolicyValueNetwork] = None,
+                 temperature: float = 0) -> None:
+        super().__init__(seed)
+        self.network = network or load_network()
+        self.temperature = temperature
+        self.encoder = FeatureEncoder(1)
+        self.records: Optional[list] = None
+
+    def play_card(self, game: Bela, id_: int) -> Tuple[str, str]:
+        row = state_row(game, id_)
+        probs, values = self.network.predict(self.encoder.encode(row[None]))
+        probs = probs[0]
+
+        if self.temperature > 0:
+            probs = probs ** (1 / self.temperature)
+            card = int(np.searchsorted(np.cumsum(probs), self.random.random() * probs.sum(), side="right"))
+            card = min(card, 31)
+            while probs[card] == 0:
+                card -= 1
+        else:
+            card = int(probs.argmax())
+
+        if self.records is not None:
+            self.records.append((id_, row, card, float(values[0])))
+        return CARDS[unrotate_card(card, TRUMP_INDEX[game.adut])]
@@ -0,0 +1,76 @@
+import math
+import time
+from typing import Optional, Tuple
+
+from bela.ai.bidding import BiddingPolicy
+from bela.ai.sampler import DealSampler
+from bela.ai.solver import SearchTimeout, Solver
+from bela.ai.tablebase import load_tablebase
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARD_INDEX, CARDS
+
+
+class PIMCPolicy(BiddingPolicy):
+
+    """
+    Perfect information Monte Carlo player. For every card decision it deals the cards it can't
+    see to the other players a number of times, solves each of those deals with the double dummy
+    solver and plays the card with the best average result. Adut is called from the bidding table.
+    """
+
+    def __init__(self, seed: Optional[int] = None, samples: int = 20, time_budget: float = 1.0,
+                 max_entries: int = 1 << 18) -> None:
+        super().__init__(seed)
+        self.samples = samples
+        self.time_budget = time_budget
+        self.solver = Solver(max_entries, load_tablebase())
+
+    def play_card(self, game: Bela, id_: int) -> Tuple[str, str]:
+        legal = game.legal_moves(id_)
+        if len(legal) == 1:
+            return legal[0]
+
+        scores = self.evaluate(DealSampler.from_bela(game, id_))
+        if not scores:
+            return super().play_card(game, id_)
+        return CARDS[max(scores, key=scores.get)]
+
+    def move_distribution(self, game: Bela, id_: int, temperature: float = 10) -> dict[int, float]:
+        """
+        Returns the softmax of the average card scores, temperature being the difference in points
+        that makes a card e times more likely. Empty if no sampled deal was solved in time.
+        """
+        legal = game.legal_moves(id_)
+        if len(legal) == 1:
+            return {CARD_INDEX[legal[0]]: 1.0}
+
+        scores = self.evaluate(DealSampler.from_bela(game, id_))
+        if not scores:
+            return {}
+        best = max(scores.values())
+        weights = {card: math.exp((score - best) / temperature) for card, score in scores.items()}
+        total = sum(weights.values())
+        return {card: weight / total for card, weight in weights.items()}
+
+    def evaluate(self, sampler: DealSampler) -> dict[int, float]:
+        """
+        Returns the average points the team of the player takes for every legal card, over as many
+        sampled deals as fit in the sample count and the time budget. Deals that didn't finish before
+        the deadline aren't counted, so the result can be empty if not even one did.
+        """
+        totals: dict[int, float] = {}
+        solved = 0
+
+        self.solver.deadline = time.perf_counter() + self.time_budget
+        try:
+            for _ in range(self.samples):
+                values = self.solver.evaluate_moves(sampler.sample(self.random))
+                for card, value in values.items():
+                    totals[card] = totals.get(card, 0) + value
+                solved += 1
+        except SearchTimeout:
+            pass
+        finally:
+            self.solver.deadline = None
+
+        return {card: total / solved for card, total in totals.items()} if solved else {}
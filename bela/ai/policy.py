@@ -0,0 +1,104 @@
+import random
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARD_INDEX, CARD_POINTS, CARD_STRENGTH, SUITS, TRUMP_INDEX
+
+
+class Policy(ABC):
+
+    """
+    Decision making for one seat of a headless game. Every method gets the full game and the
+    seat it is deciding for; a policy should only look at what that seat is allowed to see.
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.random = random.Random(seed)
+
+    @abstractmethod
+    def call_adut(self, game: Bela, id_: int, must_call: bool) -> Optional[str]:
+        """Returns the suit to call as adut, or None to say dalje. Must return a suit if must_call is set."""
+
+    @abstractmethod
+    def play_card(self, game: Bela, id_: int) -> Tuple[str, str]:
+        """Returns a legal card to play from the players hand."""
+
+    def zvanja(self, game: Bela, id_: int) -> list[Tuple[str, str]]:
+        return game.cards[id_].sve[:]
+
+    def call_bela(self, game: Bela, id_: int) -> bool:
+        return True
+
+    def close(self) -> None:
+        """Releases what the policy holds on to between decisions, like worker processes."""
+
+    def __enter__(self) -> "Policy":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RandomPolicy(Policy):
+
+    """
+    Calls a random adut every now and then and plays a random legal card.
+    """
+
+    def __init__(self, seed: Optional[int] = None, call_chance: float = 0.3) -> None:
+        super().__init__(seed)
+        self.call_chance = call_chance
+
+    def call_adut(self, game: Bela, id_: int, must_call: bool) -> Optional[str]:
+        if must_call or self.random.random() < self.call_chance:
+            return self.random.choice(SUITS)
+        return None
+
+    def play_card(self, game: Bela, id_: int) -> Tuple[str, str]:
+        return self.random.choice(game.legal_moves(id_))
+
+
+class GreedyPolicy(Policy):
+
+    """
+    Calls the suit its hand is strongest in and tries to win every trick as cheaply as it can,
+    throwing away its least valuable card otherwise.
+    """
+
+    def __init__(self, seed: Optional[int] = None, call_threshold: int = 45) -> None:
+        super().__init__(seed)
+        self.call_threshold = call_threshold
+
+    def call_adut(self, game: Bela, id_: int, must_call: bool) -> Optional[str]:
+        hand = game.get_netalon(id_) if not game.dalje[id_] else game.cards[id_].sve
+        scores = {suit: self.hand_score(hand, suit) for suit in SUITS}
+        best = max(scores, key=scores.get)
+        if must_call or scores[best] >= self.call_threshold:
+            return best
+        return None
+
+    def play_card(self, game: Bela, id_: int) -> Tuple[str, str]:
+        legal = game.legal_moves(id_)
+        trump = TRUMP_INDEX[game.adut]
+        strength, points = CARD_STRENGTH[trump], CARD_POINTS[trump]
+
+        if not game.cards_on_table:
+            return max(legal, key=lambda c: (strength[CARD_INDEX[c]], points[CARD_INDEX[c]]))
+
+        table = [card.card for card in game.cards_on_table]
+        winning = [card for card in legal if game.strongest_card(table + [card]) == card]
+        if winning:
+            return min(winning, key=lambda c: strength[CARD_INDEX[c]])
+        return min(legal, key=lambda c: (points[CARD_INDEX[c]], strength[CARD_INDEX[c]]))
+
+    @staticmethod
+    def hand_score(hand: list[Tuple[str, str]], suit: str) -> int:
+        trump = TRUMP_INDEX[suit]
+        score = 0
+        for card in hand:
+            if card[1] == suit:
+                score += CARD_STRENGTH[trump][CARD_INDEX[card]] - 100
+            elif card[0] == "kec":
+                score += 6
+        return score
@@ -0,0 +1,16 @@
+from bela.ai.bidding import BiddingPolicy
+from bela.ai.ismcts import ISMCTSPolicy, ParallelISMCTSPolicy
+from bela.ai.network import NetworkPolicy
+from bela.ai.pimc import PIMCPolicy
+from bela.ai.policy import GreedyPolicy, RandomPolicy
+
+
+POLICIES = {
+    "random": RandomPolicy,
+    "greedy": GreedyPolicy,
+    "bidding": BiddingPolicy,
+    "network": NetworkPolicy,
+    "ismcts": ISMCTSPolicy,
+    "ismcts-parallel": ParallelISMCTSPolicy,
+    "pimc": PIMCPolicy,
+}
@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from bela.ai.features import STATE_SIZE
+
+
+class ReplayBuffer:
+
+    """
+    Ring buffer of training positions kept in memory mapped .npy files in a directory: the state
+    rows, the target card distributions, the policy weights and the outcomes. Only the pages that
+    are touched stay in memory, so the learner doesn't grow with the capacity. The fill level is
+    saved in meta.json on flush and an existing buffer in the directory is opened and continued,
+    which makes training resumable across restarts.
+    """
+
+    FIELDS = {
+        "states": (np.int64, (STATE_SIZE, )),
+        "policies": (np.float32, (32, )),
+        "weights": (np.float32, ()),
+        "outcomes": (np.float32, ()),
+    }
+
+    def __init__(self, directory: str, capacity: int = 1 << 22) -> None:
+        self.directory = directory
+        self.meta_path = os.path.join(directory, "meta.json")
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.capacity, self.size, self.position = meta["capacity"], meta["size"], meta["position"]
+            self.added = meta["added"]
+            mode = "r+"
+        else:
+            self.capacity, self.size, self.position, self.added = capacity, 0, 0, 0
+            mode = "w+"
+
+        self.arrays = {
+            name: np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode=mode, dtype=dtype,
+                                            shape=(self.capacity, *shape))
+            for name, (dtype, shape) in self.FIELDS.items()
+        }
+        self.states = self.arrays["states"]
+        self.policies = self.arrays["policies"]
+        self.weights = self.arrays["weights"]
+        self.outcomes = self.arrays["outcomes"]
+
+        if mode == "w+":
+            self.flush()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, states: np.ndarray, policies: np.ndarray, weights: np.ndarray, outcomes: np.ndarray) -> None:
+        n = len(states)
+        if n > self.capacity:
+            states, policies, weights, outcomes = states[-self.capacity:], policies[-self.capacity:], \
+                weights[-self.capacity:], outcomes[-self.capacity:]
+            n = self.capacity
+
+        # at most two slices, one up to the end of the files and one from the start
+        first = min(n, self.capacity - self.position)
+        for start, end, offset in ((self.position, self.position + first, 0), (0, n - first, first)):
+            if end > start:
+                self.states[start:end] = states[offset:offset + end - start]
+                self.policies[start:end] = policies[offset:offset + end - start]
+                self.weights[start:end] = weights[offset:offset + end - start]
+                self.outcomes[start:end] = outcomes[offset:offset + end - start]
+
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        self.added += n
+
+    def sample(self, index: np.ndarray, out: Optional[Tuple[np.ndarray, ...]] = None) -> Tuple[np.ndarray, ...]:
+        """
+        Gathers the positions at the indices straight from the mapped files into the out arrays
+        (states, policies, weights, outcomes), which are allocated if not given. This is a copy, not
+        a view: rows at random indices can't be expressed as a view of the files and sampling
+        contiguous slices would correlate the batch with a single game. A batch is only a few
+        hundred rows, so the copy is cheap, and reusing the same out arrays for every batch keeps
+        sampling allocation free and the learner's memory flat.
+        """
+        if out is None:
+            out = tuple(np.empty((len(index), *shape), dtype=dtype) for dtype, shape in self.FIELDS.values())
+        for array, target in zip((self.states, self.policies, self.weights, self.outcomes), out):
+            np.take(array, index, axis=0, out=target)
+        return out
+
+    def random_indices(self, rng: np.random.Generator, batch_size: int) -> np.ndarray:
+        return rng.integers(0, self.size, batch_size)
+
+    def flush(self) -> None:
+        for array in self.arrays.values():
+            array.flush()
+        meta = {"capacity": self.capacity, "size": self.size, "position": self.position, "added": self.added}
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
@@ -0,0 +1,191 @@
+import random
+from bisect import bisect
+from math import factorial
+from typing import Iterator, Sequence, Tuple
+
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, CARD_STRENGTH, HIGHER_MASKS, NO_TRUMP, SUIT_MASKS, \
+    TRUMP_INDEX, mask_to_ints, popcount, trick_winner
+from bela.game.main.position import Position
+
+
+def forbidden_mask(trick: list[int], card: int, trump: int) -> int:
+    """
+    Returns the mask of cards the player can't be holding after playing the card on the trick,
+    since holding any of them would have made the card illegal.
+    """
+    lead = trick[0] >> 3
+    strongest = trick[trick_winner(trick, trump)]
+    strength = CARD_STRENGTH[trump]
+    suit = card >> 3
+
+    if suit == lead:
+        if strongest >> 3 == lead and strength[card] < strength[strongest]:
+            return HIGHER_MASKS[lead == trump][strongest]
+        return 0
+
+    mask = SUIT_MASKS[lead]
+    if trump == NO_TRUMP:
+        return mask
+    if suit != trump:
+        return mask | SUIT_MASKS[trump]
+    if strongest >> 3 == trump and strength[card] < strength[strongest]:
+        mask |= HIGHER_MASKS[True][strongest]
+    return mask
+
+
+def infer_exclusions(plays: Sequence[Tuple[int, int]], trump: int) -> list[int]:
+    """
+    Replays the (player, card) plays of a deal and returns for every player the mask of cards he
+    showed he doesn't have: suits he didn't follow or trump and cards he didn't overtake with.
+    """
+    excluded = [0, 0, 0, 0]
+    for start in range(0, len(plays), 4):
+        trick = []
+        for player, card in plays[start:start + 4]:
+            if trick:
+                excluded[player] |= forbidden_mask(trick, card, trump)
+            trick.append(card)
+    return excluded
+
+
+def known_masks(game: Bela) -> list[int]:
+    """
+    Returns for every player the mask of cards everyone knows he was dealt: the zvanja that were
+    shown and both bela cards once he called bela. Cards already played are left in.
+    """
+    known = [game.zvanja_masks[p] if game.final_zvanja[p] else 0 for p in range(4)]
+    if game.player_called_bela >= 0 and game.adut is not None:
+        known[game.player_called_bela] |= CARD_BITS[CARD_INDEX[("kralj", game.adut)]] | \
+            CARD_BITS[CARD_INDEX[("baba", game.adut)]]
+    return known
+
+
+def _splits(n: int, caps: Sequence[int]) -> Iterator[Tuple[int, int, int]]:
+    for a in range(max(n - caps[1] - caps[2], 0), min(n, caps[0]) + 1):
+        for b in range(max(n - a - caps[2], 0), min(n - a, caps[1]) + 1):
+            yield a, b, n - a - b
+
+
+class DealSampler:
+
+    """
+    Deals the cards a player can't see to the other three players consistently with everything
+    he knows: how many cards everyone holds, the suits and higher cards other players showed they
+    don't have, and the cards they revealed by zvanja or by calling bela.
+
+    Every unseen card belongs to a type, the set of players that may hold it. The constructor lists
+    every way of splitting the types between the players that fits the hand sizes, weighted by the
+    number of deals it covers. A sample picks a split by weight and shuffles the cards inside every
+    type, so deals are drawn uniformly from the consistent ones without rejecting any.
+    """
+
+    def __init__(self, position: Position, id_: int, excluded: Sequence[int] = (0, 0, 0, 0),
+                 known: Sequence[int] = (0, 0, 0, 0)) -> None:
+        self.position = position
+        self.id_ = id_
+        self.players = [p for p in range(4) if p != id_]
+
+        hands = position.hands
+        unknown = (hands[0] | hands[1] | hands[2] | hands[3]) & ~hands[id_]
+        caps = [popcount(hands[p]) for p in self.players]
+
+        known_cards = 0
+        for p in self.players:
+            known_cards |= known[p] & unknown
+        allowed = [(unknown & ~excluded[p] & ~known_cards) | (known[p] & unknown) for p in self.players]
+
+        # cards only one player can hold go straight to him
+        base = [0, 0, 0, 0]
+        base[id_] = hands[id_]
+        types: dict[int, list[int]] = {}
+        for card in mask_to_ints(unknown):
+            bit = CARD_BITS[card]
+            type_ = (allowed[0] & bit and 1) | (allowed[1] & bit and 2) | (allowed[2] & bit and 4)
+            if not type_:
+                raise ValueError(f"No player can hold card {card}.")
+            if type_ in (1, 2, 4):
+                slot = type_.bit_length() - 1
+                base[self.players[slot]] |= bit
+                caps[slot] -= 1
+            else:
+                types.setdefault(type_, []).append(bit)
+
+        if min(caps) < 0:
+            raise ValueError("Known cards don't fit in the hands.")
+
+        self.base = base
+        self.type_keys = list(types)
+        self.types = list(types.values())
+        self.type_masks = [sum(cards) for cards in self.types]
+        self.tables: list[list[Tuple[int, list[Tuple[int, int]]]]] = []
+        weights = []
+        self.enumerate_tables(0, caps, [], 1, weights)
+        if not self.tables:
+            raise ValueError("The constraints can't be satisfied.")
+
+        self.cum_weights = []
+        total = 0
+        for weight in weights:
+            total += weight
+            self.cum_weights.append(total)
+        self.total_weight = total
+
+        # every table is prepared once as the hands filled by the types that go to a single player and
+        # the types whose cards are shuffled per sample, the player with the most of them taking the rest
+        self.plans: list[Tuple[list[int], list[Tuple[list[int], int, list[Tuple[int, int]], int]]]] = []
+        for table in self.tables:
+            plan_hands = base[:]
+            shuffles = []
+            for i, parts in table:
+                if len(parts) == 1:
+                    plan_hands[parts[0][0]] |= self.type_masks[i]
+                    continue
+                *dealt, (rest, _) = sorted(parts, key=lambda part: part[1])
+                shuffles.append((self.types[i], self.type_masks[i], dealt, rest))
+            self.plans.append((plan_hands, shuffles))
+        self.rest = position[1:]
+
+    @classmethod
+    def from_bela(cls, game: Bela, id_: int) -> "DealSampler":
+        trump = TRUMP_INDEX[game.adut]
+        excluded = infer_exclusions([(p, CARD_INDEX[card]) for p, card in game.played_cards], trump)
+        return cls(Position.from_bela(game), id_, excluded, known_masks(game))
+
+    def enumerate_tables(self, i: int, caps: list[int], table: list[Tuple[int, list[Tuple[int, int]]]],
+                         weight: int, weights: list[int]) -> None:
+        if i == len(self.types):
+            self.tables.append(table)
+            weights.append(weight)
+            return
+
+        n = len(self.types[i])
+        type_ = self.type_keys[i]
+        for split in _splits(n, [cap if type_ & 1 << slot else 0 for slot, cap in enumerate(caps)]):
+            parts = [(self.players[slot], x) for slot, x in enumerate(split) if x]
+            ways = factorial(n) // (factorial(split[0]) * factorial(split[1]) * factorial(split[2]))
+            self.enumerate_tables(i + 1, [c - x for c, x in zip(caps, split)], table + [(i, parts)],
+                                  weight * ways, weights)
+
+    def sample_hands(self, rng: random.Random) -> list[int]:
+        plans = self.plans
+        hands, shuffles = plans[0] if len(plans) == 1 else \
+            plans[bisect(self.cum_weights, rng.random() * self.total_weight)]
+        random_key = rng.random
+
+        hands = hands[:]
+        for cards, rest, dealt, rest_player in shuffles:
+            # sorting by random keys shuffles a new list in C, much faster than rng.shuffle
+            cards = sorted(cards, key=lambda _: random_key())
+            start = 0
+            for player, n in dealt:
+                # the bits are distinct so adding them up is the same as or-ing them
+                mask = sum(cards[start:start + n])
+                hands[player] |= mask
+                rest ^= mask
+                start += n
+            hands[rest_player] |= rest
+        return hands
+
+    def sample(self, rng: random.Random) -> Position:
+        return Position(tuple(self.sample_hands(rng)), *self.rest)
@@ -0,0 +1,257 @@
+import argparse
+import multiprocessing
+import queue
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from bela.ai.features import STATE_SIZE, FeatureEncoder, POINTS_SCALE, scored_difference
+from bela.ai.network import NETWORK_PATH, NetworkPolicy, PolicyValueNetwork
+from bela.ai.replay import ReplayBuffer
+from bela.game.main.bela import Bela
+from bela.game.utils.log import Log
+from bela.sim.simulator import Simulator
+
+
+@dataclass
+class Trajectory:
+
+    """
+    Every decision of one deal: the state rows, the (rotated) cards played, the value the network
+    gave each position and how much the points difference of the deciding players team changed
+    from there to the end of the deal.
+    """
+
+    states: np.ndarray
+    actions: np.ndarray
+    values: np.ndarray
+    outcomes: np.ndarray
+
+
+class SharedWeights:
+
+    """
+    Flat network parameters in shared memory with a version number. The learner publishes new
+    weights and actors pull them whenever the version changed since they last looked.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.array = multiprocessing.RawArray("f", size)
+        self.version = multiprocessing.RawValue("i", 0)
+        self.lock = multiprocessing.Lock()
+
+    def publish(self, network: PolicyValueNetwork) -> None:
+        with self.lock:
+            network.get_flat(np.frombuffer(self.array, dtype=np.float32))
+            self.version.value += 1
+
+    def pull(self, network: PolicyValueNetwork, version: int) -> int:
+        if self.version.value == version:
+            return version
+        with self.lock:
+            network.set_flat(np.frombuffer(self.array, dtype=np.float32))
+            return self.version.value
+
+
+def play_deal(game: Bela, simulator: Simulator, records: list) -> Trajectory:
+    records.clear()
+    simulator.play_deal(game)
+
+    points = [p or 0 for p in game.points]
+    n = len(records)
+    trajectory = Trajectory(np.empty((n, STATE_SIZE), dtype=np.int64), np.empty(n, dtype=np.int64),
+                            np.empty(n, dtype=np.float32), np.empty(n, dtype=np.float32))
+    for i, (seat, row, card, value) in enumerate(records):
+        trajectory.states[i] = row
+        trajectory.actions[i] = card
+        trajectory.values[i] = value
+        trajectory.outcomes[i] = (points[seat % 2] - points[1 - seat % 2] - scored_difference(row)) / POINTS_SCALE
+    return trajectory
+
+
+def actor(seed: int, hidden: tuple, shared: SharedWeights, trajectories: multiprocessing.Queue,
+          stop: multiprocessing.Event, temperature: float, max_points: int) -> None:
+    """
+    Plays matches with the latest published weights on all four seats and sends every deal to the
+    learner until stop is set.
+    """
+    rng = random.Random(seed)
+    network = PolicyValueNetwork(hidden)
+    version = shared.pull(network, -1)
+
+    records = []
+    policies = [NetworkPolicy(rng.getrandbits(32), network, temperature) for _ in range(4)]
+    for policy in policies:
+        policy.records = records
+    simulator = Simulator(policies, max_points)
+
+    while not stop.is_set():
+        game = Bela(max_points, simulator.teams, rng.getrandbits(48))
+        while not game.current_match_over and not stop.is_set():
+            trajectories.put(play_deal(game, simulator, records))
+            version = shared.pull(network, version)
+            if game.current_match_over:
+                break
+            for i in range(4):
+                game.end_game(i)
+
+
+@dataclass
+class TrainingStats:
+
+    deals: int = 0
+    samples: int = 0
+    updates: int = 0
+    policy_loss: float = 0
+    value_loss: float = 0
+
+
+class Learner:
+
+    """
+    Trains the network on the deals the actors send, sampling mini batches uniformly from the
+    replay buffer. The policy is trained by self imitation: the played card weighted by how much
+    better the deal went than the network expected, and not at all if it went worse.
+    """
+
+    def __init__(self, network: PolicyValueNetwork, replay: ReplayBuffer, batch_size: int = 256,
+                 lr: float = 1e-3, seed: Optional[int] = None) -> None:
+        self.network = network
+        self.replay = replay
+        self.batch_size = batch_size
+        self.lr = lr
+        self.rng = np.random.default_rng(seed)
+        self.encoder = FeatureEncoder(batch_size)
+        self.batch = replay.sample(np.zeros(batch_size, dtype=np.int64))
+        self.stats = TrainingStats()
+
+    def add(self, trajectory: Trajectory) -> None:
+        n = len(trajectory.actions)
+        policies = np.zeros((n, 32), dtype=np.float32)
+        policies[np.arange(n), trajectory.actions] = 1
+        # only better than expected moves are imitated, which stays stable on old replayed positions
+        advantages = np.clip(trajectory.outcomes - trajectory.values, 0, 2)
+        self.replay.add(trajectory.states, policies, advantages, trajectory.outcomes)
+        self.stats.deals += 1
+        self.stats.samples += n
+
+    def update(self) -> None:
+        states, policies, weights, outcomes = self.replay.sample(
+            self.replay.random_indices(self.rng, self.batch_size), self.batch
+        )
+        policy_loss, value_loss = self.network.train_step(self.encoder.encode(states), policies, outcomes,
+                                                          weights, self.lr)
+        self.stats.updates += 1
+        self.stats.policy_loss = 0.98 * self.stats.policy_loss + 0.02 * policy_loss
+        self.stats.value_loss = 0.98 * self.stats.value_loss + 0.02 * value_loss
+
+
+def train(replay: ReplayBuffer, actors: int = 4, updates: int = 10000, network: Optional[PolicyValueNetwork] = None,
+          batch_size: int = 256, lr: float = 1e-3, broadcast_every: int = 50, min_samples: int = 4096,
+          temperature: float = 1.0, max_points: int = 1001, seed: int = 0, report_every: float = 10.0,
+          checkpoint_every: int = 1000, checkpoint_path: Optional[str] = None,
+          max_drain: int = 16) -> PolicyValueNetwork:
+    """
+    Runs self play with the actors in their own processes and the learner in this one. The learner
+    publishes new weights every broadcast_every updates and stops after the given number of updates.
+    Every checkpoint_every updates the replay buffer is flushed and the network saved to the
+    checkpoint path, if there is one. At most max_drain deals are taken from the actors between
+    two updates, so a burst of deals can't hold back training and the actors wait when they get
+    too far ahead.
+    """
+    network = network or PolicyValueNetwork(seed=seed)
+    learner = Learner(network, replay, batch_size, lr, seed)
+
+    shared = SharedWeights(network.get_flat().size)
+    shared.publish(network)
+    trajectories = multiprocessing.Queue(maxsize=1024)
+    stop = multiprocessing.Event()
+
+    rng = random.Random(seed)
+    processes = [
+        multiprocessing.Process(target=actor, daemon=True,
+                                args=(rng.getrandbits(48), network.hidden, shared, trajectories, stop,
+                                      temperature, max_points))
+        for _ in range(actors)
+    ]
+    for process in processes:
+        process.start()
+
+    start = last_report = time.perf_counter()
+    try:
+        while learner.stats.updates < updates:
+            for _ in range(max_drain):
+                try:
+                    learner.add(trajectories.get(block=len(replay) < min_samples, timeout=1))
+                except queue.Empty:
+                    break
+            if len(replay) < min_samples:
+                continue
+
+            learner.update()
+            if learner.stats.updates % broadcast_every == 0:
+                shared.publish(network)
+            if learner.stats.updates % checkpoint_every == 0:
+                checkpoint(learner, checkpoint_path)
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                report(learner.stats, now - start)
+                last_report = now
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    checkpoint(learner, checkpoint_path)
+    report(learner.stats, time.perf_counter() - start)
+    return network
+
+
+def checkpoint(learner: Learner, path: Optional[str]) -> None:
+    learner.replay.flush()
+    if path is not None:
+        learner.network.save(path, optimizer=True)
+
+
+def report(stats: TrainingStats, duration: float) -> None:
+    Log.i("SELFPLAY", f"{stats.deals / duration:.1f} deals/sec, {stats.samples / duration:.1f} samples/sec, "
+                      f"{stats.updates / duration:.1f} updates/sec, policy loss {stats.policy_loss:.3f}, "
+                      f"value loss {stats.value_loss:.3f} ({stats.deals} deals, {stats.updates} updates)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bela.ai.selfplay", description="Trains the network by self play.")
+    parser.add_argument("-j", "--actors", type=int, default=max(1, (multiprocessing.cpu_count() or 2) - 1))
+    parser.add_argument("-u", "--updates", type=int, default=10000)
+    parser.add_argument("-b", "--batch-size", type=int, default=256)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--broadcast", type=int, default=50, help="updates between publishing weights")
+    parser.add_argument("--drain", type=int, default=16, help="most deals taken from the actors per update")
+    parser.add_argument("--temperature", type=float, default=1.0)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--replay", default="replay", help="replay buffer directory, reused if it exists")
+    parser.add_argument("--capacity", type=int, default=1 << 22, help="positions in a new replay buffer")
+    parser.add_argument("--checkpoint", type=int, default=1000, help="updates between checkpoints")
+    parser.add_argument("--resume", action="store_true", help="start from the network and optimizer state in output")
+    parser.add_argument("-o", "--output", required=True,
+                        help=f"where to save the network, the bots load {NETWORK_PATH}")
+    args = parser.parse_args()
+
+    replay = ReplayBuffer(args.replay, args.capacity)
+    network = PolicyValueNetwork.load(args.output) if args.resume else None
+    Log.i("SELFPLAY", f"Replay buffer {args.replay} has {len(replay)} of {replay.capacity} positions")
+
+    train(replay, args.actors, args.updates, network, args.batch_size, args.lr, args.broadcast,
+          temperature=args.temperature, seed=args.seed, checkpoint_every=args.checkpoint, checkpoint_path=args.output,
+          max_drain=args.drain)
+    Log.i("SELFPLAY", f"Saved network to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+import random
+import time
+from typing import Optional, Tuple
+
+from bela.ai.tablebase import MAX_CARDS, Tablebase
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARD_BITS, CARD_POINTS, CARD_STRENGTH, HIGHER_MASKS, NO_TRUMP, SUIT_MASKS, \
+    mask_to_ints, popcount, trick_winner
+from bela.game.main.position import LAST_TRICK_BONUS, Position
+
+
+_zobrist_random = random.Random(0x5EED)
+
+# ZOBRIST[player][card] is xor-ed into the hash for every card still in the players hand
+ZOBRIST: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_zobrist_random.getrandbits(64) for _ in range(32)) for _ in range(4)
+)
+ZOBRIST_LEADER: Tuple[int, ...] = tuple(_zobrist_random.getrandbits(64) for _ in range(4))
+ZOBRIST_TRUMP: Tuple[int, ...] = tuple(_zobrist_random.getrandbits(64) for _ in range(5))
+
+
+# Move ordering keys per trump: strongest card first when leading, most valuable card first when the
+# partner takes the trick and cheapest card first when the trick can't be won.
+LEAD_KEYS = tuple(tuple(-v for v in strength) for strength in CARD_STRENGTH)
+SMEAR_KEYS = tuple(tuple(-200 * p + v for p, v in zip(*rows)) for rows in zip(CARD_POINTS, CARD_STRENGTH))
+DUMP_KEYS = tuple(tuple(200 * p + v for p, v in zip(*rows)) for rows in zip(CARD_POINTS, CARD_STRENGTH))
+
+
+def _between_masks(trump: int) -> Tuple[Tuple[int, ...], ...]:
+    strength = CARD_STRENGTH[trump]
+    rows = []
+    for a in range(32):
+        row = []
+        for b in range(32):
+            mask = 0
+            if a >> 3 == b >> 3:
+                low, high = sorted((strength[a], strength[b]))
+                for c in range(a & ~7, (a & ~7) + 8):
+                    if low < strength[c] < high:
+                        mask |= CARD_BITS[c]
+            row.append(mask)
+        rows.append(tuple(row))
+    return tuple(rows)
+
+
+# BETWEEN[trump][a][b] is the mask of cards ranked between two cards of the same suit
+BETWEEN = tuple(_between_masks(trump) for trump in range(NO_TRUMP + 1))
+
+
+def zobrist_hash(hands: Tuple[int, ...], trump: int) -> int:
+    h = ZOBRIST_TRUMP[trump]
+    for player in range(4):
+        keys = ZOBRIST[player]
+        for card in mask_to_ints(hands[player]):
+            h ^= keys[card]
+    return h
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class TranspositionTable:
+
+    """
+    Bounded hash table of lower and upper bounds and the best card found for positions at the
+    start of a trick. What a team can still take from such position doesn't depend on how the
+    position was reached, so the bounds are valid from every line that transposes into it.
+    When the table fills up the older half of the entries is dropped.
+    """
+
+    def __init__(self, max_entries: int = 1 << 20) -> None:
+        self.max_entries = max_entries
+        self.entries: dict[int, Tuple[int, int, int]] = {}
+        self.old_entries: dict[int, Tuple[int, int, int]] = {}
+
+    def get(self, key: int) -> Optional[Tuple[int, int, int]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.old_entries.get(key)
+        return entry
+
+    def store(self, key: int, lower: int, upper: int, move: int) -> None:
+        if len(self.entries) >= self.max_entries // 2:
+            self.old_entries = self.entries
+            self.entries = {}
+        self.entries[key] = (lower, upper, move)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.old_entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries) + len(self.old_entries)
+
+
+class Solver:
+
+    """
+    Double dummy solver for the card playing phase. Every player sees all the hands and plays
+    optimally for his team. Values are card points (with the last trick bonus) that team 0 still
+    takes from the given position. If a deadline (perf_counter time) is set, searching past it
+    raises SearchTimeout. With a tablebase, the position to solve and every position the search
+    reaches with MAX_CARDS cards left are looked up before they are searched.
+    """
+
+    def __init__(self, max_entries: int = 1 << 20, tablebase: Optional[Tablebase] = None) -> None:
+        self.table = TranspositionTable(max_entries)
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.deadline: Optional[float] = None
+        self.trump = 0
+        self.hands = [0, 0, 0, 0]
+
+    def solve(self, position: Position) -> Tuple[int, int]:
+        """
+        Returns the points of both teams at the end of the deal if everyone plays optimally from
+        the position on, including the points they already have.
+        """
+        remaining = self.remaining_points(position)
+        value = self.value(position)
+        return position.points[0] + value, position.points[1] + remaining - value
+
+    def solve_bela(self, game: Bela) -> Tuple[int, int]:
+        return self.solve(Position.from_bela(game))
+
+    def evaluate_moves(self, position: Position) -> dict[int, int]:
+        """
+        Returns the exact future points of the team to move for every legal card.
+        """
+        remaining = self.remaining_points(position)
+        team = position.turn % 2
+        values = {}
+        for card in mask_to_ints(position.legal_moves()):
+            value = self.value(position.play(card), played=position)
+            values[card] = value if team == 0 else remaining - value
+        return values
+
+    def best_move(self, position: Position) -> Tuple[int, int]:
+        values = self.evaluate_moves(position)
+        card = max(values, key=values.get)
+        return card, values[card]
+
+    def remaining_points(self, position: Position) -> int:
+        points = CARD_POINTS[position.trump]
+        cards = position.hands[0] | position.hands[1] | position.hands[2] | position.hands[3]
+        total = sum(points[card] for card in mask_to_ints(cards)) + sum(points[card] for card in position.trick)
+        return total + LAST_TRICK_BONUS if cards or position.trick else total
+
+    def value(self, position: Position, played: Optional[Position] = None) -> int:
+        """
+        Exact team 0 future points found by bisecting the value range with null window searches,
+        which cut off much more than a single search with the full window.
+        """
+        if self.tablebase is not None:
+            value = self.tablebase.lookup(position)
+            if value is not None:
+                return value + (position.points[0] - played.points[0] if played is not None else 0)
+
+        lower, upper = 0, self.remaining_points(played or position)
+        while lower < upper:
+            guess = (lower + upper + 1) // 2
+            value = self.search_position(position, guess - 1, guess, played)
+            if value >= guess:
+                lower = value
+            else:
+                upper = value
+        return lower
+
+    def search_position(self, position: Position, alpha: int, beta: int,
+                        played: Optional[Position] = None) -> int:
+        """
+        Team 0 future points of the position, counted from the played position if given. This is
+        used to evaluate a single move, where the points of a trick it completes also count.
+        """
+        self.trump = position.trump
+        self.hands = list(position.hands)
+        gained = 0
+        if played is not None:
+            gained = position.points[0] - played.points[0]
+        if position.is_over:
+            return gained
+
+        trick = list(position.trick)
+        win = trick_winner(trick, position.trump) if trick else 0
+        h = zobrist_hash(position.hands, position.trump)
+        return gained + self.search(position.leader, trick, win, h, alpha - gained, beta - gained,
+                                    self.remaining_points(position))
+
+    def search(self, leader: int, trick: list, win: int, h: int, alpha: int, beta: int, remaining: int) -> int:
+        """
+        Alpha-beta search of team 0 future points. win is the index of the card currently winning
+        the trick and remaining is the most team 0 can still take.
+        """
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        hands = self.hands
+        trump = self.trump
+        strength = CARD_STRENGTH[trump]
+
+        if alpha >= remaining:
+            return remaining
+        if beta <= 0:
+            return 0
+
+        key = None
+        hint = -1
+        n = len(trick)
+        player = (leader + n) % 4
+        hand = hands[player]
+
+        if not n:
+            if not hand & (hand - 1):
+                return self.last_trick(leader) if hand else 0
+            key = h ^ ZOBRIST_LEADER[leader]
+            entry = self.table.get(key)
+            if entry is not None:
+                lower, upper, hint = entry
+                if lower >= beta or lower == upper:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                if lower > alpha:
+                    alpha = lower
+                if upper < beta:
+                    beta = upper
+            elif self.tablebase is not None and popcount(hands[0] | hands[1] | hands[2] | hands[3]) == MAX_CARDS:
+                value = self.tablebase.probe(hands, trick, leader, trump)
+                if value is not None:
+                    self.table.store(key, value, value, -1)
+                    return value
+            moves = sorted(mask_to_ints(hand), key=LEAD_KEYS[trump].__getitem__)
+            if hint >= 0:
+                moves.remove(hint)
+                moves.insert(0, hint)
+            lead = -1
+            strongest = -1
+        else:
+            lead = trick[0] >> 3
+            strongest = trick[win]
+            moves = self.order_moves(hand, lead, strongest, n - win == 2)
+
+        if len(moves) > 1:
+            moves = self.drop_equivalent(moves, hand, trick)
+
+        maximizing = player % 2 == 0
+        best = -1 if maximizing else 256
+        best_card = -1
+        window_alpha, window_beta = alpha, beta
+        player_keys = ZOBRIST[player]
+
+        for card in moves:
+            bit = CARD_BITS[card]
+            hands[player] = hand ^ bit
+            trick.append(card)
+
+            if n == 3:
+                suit = card >> 3
+                winner = win
+                if (suit == lead or suit == trump) and strength[card] > strength[strongest]:
+                    winner = 3
+                winner = (leader + winner) % 4
+                points = CARD_POINTS[trump]
+                gained = points[trick[0]] + points[trick[1]] + points[trick[2]] + points[card]
+                if not (hands[0] | hands[1] | hands[2] | hands[3]):
+                    gained += LAST_TRICK_BONUS
+                if winner % 2 == 0:
+                    value = gained + self.search(winner, [], 0, h ^ player_keys[card], alpha - gained,
+                                                 beta - gained, remaining - gained)
+                else:
+                    value = self.search(winner, [], 0, h ^ player_keys[card], alpha, beta, remaining - gained)
+            else:
+                new_win = win
+                if n and ((card >> 3) == lead or (card >> 3) == trump) and strength[card] > strength[strongest]:
+                    new_win = n
+                value = self.search(leader, trick, new_win, h ^ player_keys[card], alpha, beta, remaining)
+
+            trick.pop()
+            hands[player] = hand
+
+            if maximizing:
+                if value > best:
+                    best, best_card = value, card
+                    if best > alpha:
+                        alpha = best
+            else:
+                if value < best:
+                    best, best_card = value, card
+                    if best < beta:
+                        beta = best
+            if alpha >= beta:
+                break
+
+        if key is not None:
+            lower, upper, _ = self.table.get(key) or (0, 255, -1)
+            if best <= window_alpha:
+                upper = min(upper, best)
+            elif best >= window_beta:
+                lower = max(lower, best)
+            else:
+                lower = upper = best
+            self.table.store(key, lower, upper, best_card)
+
+        return best
+
+    def last_trick(self, leader: int) -> int:
+        hands = self.hands
+        trick = [hands[(leader + i) % 4].bit_length() - 1 for i in range(4)]
+        if (leader + trick_winner(trick, self.trump)) % 2:
+            return 0
+        points = CARD_POINTS[self.trump]
+        return points[trick[0]] + points[trick[1]] + points[trick[2]] + points[trick[3]] + LAST_TRICK_BONUS
+
+    def drop_equivalent(self, moves: list[int], hand: int, trick: list) -> list[int]:
+        """
+        Leaves out cards that are worth the same points as a card already in the list and that no
+        card held by someone else or lying on the table separates from it.
+        """
+        hands = self.hands
+        outside = (hands[0] | hands[1] | hands[2] | hands[3]) & ~hand
+        for card in trick:
+            outside |= CARD_BITS[card]
+        points = CARD_POINTS[self.trump]
+        between = BETWEEN[self.trump]
+
+        kept = [moves[0]]
+        for card in moves[1:]:
+            for other in kept:
+                if other >> 3 == card >> 3 and points[other] == points[card] and not between[other][card] & outside:
+                    break
+            else:
+                kept.append(card)
+        return kept
+
+    def order_moves(self, hand: int, lead: int, strongest: int, partner_winning: bool) -> list[int]:
+        """
+        Returns the legal cards for following the trick ordered by trick strength: the cheapest card
+        that takes the trick goes first, or the most valuable card if the partner is already winning
+        the trick, and the cheapest card otherwise.
+        """
+        trump = self.trump
+        follow = lead
+        cards = hand & SUIT_MASKS[lead]
+        if not cards and trump != NO_TRUMP:
+            follow = trump
+            cards = hand & SUIT_MASKS[trump]
+        if not cards:
+            cards = hand
+            winners = 0
+        elif strongest >> 3 == follow:
+            winners = cards & HIGHER_MASKS[follow == trump][strongest]
+            if winners:
+                cards = winners
+        else:
+            winners = cards if follow == trump else 0
+
+        if partner_winning:
+            return sorted(mask_to_ints(cards), key=SMEAR_KEYS[trump].__getitem__)
+        if not winners:
+            return sorted(mask_to_ints(cards), key=DUMP_KEYS[trump].__getitem__)
+        return sorted(mask_to_ints(winners), key=CARD_STRENGTH[trump].__getitem__)
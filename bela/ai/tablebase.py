@@ -0,0 +1,276 @@
+"""
+Exact values of the last tricks of a deal, precomputed offline and looked up by a canonical key.
+
+Every stored endgame is reduced to the parts that decide its value: seats are counted from the
+player who led the trick, adut is rotated to suit 0, the other three suits are sorted and the
+cards worth no points are moved down to the lowest ranks of their suit, which keeps every trick
+won by the same cards. The file holds the sorted 64-bit keys followed by one byte per key with
+the points the team of the leader still takes, so a lookup is a binary search over a memory map.
+"""
+
+import argparse
+import os
+import random
+import struct
+import time
+from multiprocessing import Pool
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from bela.game.main.cards import CARD_BITS, CARD_POINTS, NO_TRUMP, legal_mask, mask_to_ints, popcount, trick_winner
+from bela.game.main.position import LAST_TRICK_BONUS, Position
+from bela.game.utils.log import Log
+
+
+TABLEBASE_PATH = os.path.join(os.path.dirname(__file__), "data", "tablebase.bin")
+MAGIC = b"BELATB01"
+MAX_TRICKS = 3
+MAX_CARDS = 4 * MAX_TRICKS
+
+# cards worth no points are the lowest ranks of their suit: 7 and 8 of adut, 7, 8 and 9 otherwise
+_BLANKS = ((0, 1), (0, 1, 2), (0, 1, 2), (0, 1, 2))
+
+
+def endgame_key(hands: Sequence[int], trick: Sequence[int], leader: int, trump: int) -> Optional[int]:
+    """
+    Returns the canonical key of the position, or None if it has more than MAX_CARDS cards left
+    (counting the trick in progress) or no adut. Positions with the same key have the same value.
+    """
+    if trump == NO_TRUMP:
+        return None
+    hands_mask = hands[0] | hands[1] | hands[2] | hands[3]
+    if popcount(hands_mask) + len(trick) > MAX_CARDS:
+        return None
+
+    # codes per rotated suit and rank: 0 for no card, 1 + seat for a card in hand, 5 + seat on the table
+    suits = [[0] * 8 for _ in range(4)]
+    for player in range(4):
+        seat = (player - leader) & 3
+        for card in mask_to_ints(hands[player]):
+            suits[(card >> 3) - trump & 3][card & 7] = 1 + seat
+    for seat, card in enumerate(trick):
+        suits[(card >> 3) - trump & 3][card & 7] = 5 + seat
+
+    for suit, blanks in zip(suits, _BLANKS):
+        codes = [suit[rank] for rank in blanks if suit[rank]]
+        for i, rank in enumerate(blanks):
+            suit[rank] = codes[i] if i < len(codes) else 0
+    suits[1:] = sorted(suits[1:], reverse=True)
+
+    mask = owners = trick_index = 0
+    shift = 0
+    held = [0] * 4
+    for s, suit in enumerate(suits):
+        for rank, code in enumerate(suit):
+            if code:
+                seat = (code - 1) & 3
+                mask |= 1 << (s * 8 + rank)
+                owners |= seat << shift
+                shift += 2
+                if code > 4:
+                    trick_index |= held[seat] << (2 * seat)
+                held[seat] += 1
+    return mask | owners << 32 | len(trick) << 56 | trick_index << 58
+
+
+def remaining_points(hands: Sequence[int], trick: Sequence[int], trump: int) -> int:
+    points = CARD_POINTS[trump]
+    cards = hands[0] | hands[1] | hands[2] | hands[3]
+    total = sum(points[card] for card in mask_to_ints(cards)) + sum(points[card] for card in trick)
+    return total + LAST_TRICK_BONUS if cards or trick else total
+
+
+class EndgameBuilder:
+
+    """
+    Solves endgames exhaustively, without any pruning, so the values of every position reachable
+    from them are exact and end up in values, keyed by endgame_key.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[int, int] = {}
+
+    def solve(self, hands: list[int], trick: list[int], leader: int, trump: int) -> int:
+        """Returns the points team 0 still takes from the position."""
+        total = remaining_points(hands, trick, trump)
+        if not total:
+            return 0
+        key = endgame_key(hands, trick, leader, trump)
+        value = self.values.get(key)
+        if value is not None:
+            return value if leader % 2 == 0 else total - value
+
+        n = len(trick)
+        player = (leader + n) % 4
+        hand = hands[player]
+        maximizing = player % 2 == 0
+        best = -1 if maximizing else 256
+
+        for card in mask_to_ints(legal_mask(hand, trick, trump)):
+            hands[player] = hand ^ CARD_BITS[card]
+            trick.append(card)
+            if n == 3:
+                winner = (leader + trick_winner(trick, trump)) % 4
+                gained = total - remaining_points(hands, (), trump)
+                value = (gained if winner % 2 == 0 else 0) + self.solve(hands, [], winner, trump)
+            else:
+                value = self.solve(hands, trick, leader, trump)
+            trick.pop()
+            hands[player] = hand
+            best = max(best, value) if maximizing else min(best, value)
+
+        self.values[key] = best if leader % 2 == 0 else total - best
+        return best
+
+
+def sample_endgame(rng: random.Random, tricks: int = MAX_TRICKS) -> Tuple[list[int], int, int]:
+    """
+    Deals random hands, picks a random adut and leader and plays random legal cards until only
+    the given number of tricks is left. Returns the hands, the leader and the adut.
+    """
+    deck = list(range(32))
+    rng.shuffle(deck)
+    hands = [sum(CARD_BITS[card] for card in deck[8 * i:8 * i + 8]) for i in range(4)]
+    trump = rng.randrange(4)
+    leader = rng.randrange(4)
+
+    for _ in range(8 - tricks):
+        trick = []
+        for i in range(4):
+            player = (leader + i) % 4
+            card = rng.choice(mask_to_ints(legal_mask(hands[player], trick, trump)))
+            hands[player] ^= CARD_BITS[card]
+            trick.append(card)
+        leader = (leader + trick_winner(trick, trump)) % 4
+    return hands, leader, trump
+
+
+def _build_shard(task: Tuple[int, int, int]) -> dict[int, int]:
+    seed, endgames, tricks = task
+    rng = random.Random(seed)
+    builder = EndgameBuilder()
+    for _ in range(endgames):
+        hands, leader, trump = sample_endgame(rng, tricks)
+        builder.solve(hands, [], leader, trump)
+    return builder.values
+
+
+def build(endgames: int, tricks: int = MAX_TRICKS, seed: int = 0, processes: Optional[int] = None,
+          shard_endgames: int = 1000, values: Optional[dict[int, int]] = None) -> dict[int, int]:
+    """
+    Solves the sampled endgames in shards over a process pool and merges every position they
+    reach into values, which is returned.
+    """
+    if not 1 <= tricks <= MAX_TRICKS:
+        raise ValueError(f"Endgames can have 1 to {MAX_TRICKS} tricks, not {tricks}.")
+    values = {} if values is None else values
+    rng = random.Random(seed)
+    shards = max(1, endgames // shard_endgames)
+    tasks = [(rng.getrandbits(48), endgames // shards + int(i < endgames % shards), tricks) for i in range(shards)]
+
+    with Pool(processes) as pool:
+        for shard in pool.imap_unordered(_build_shard, tasks):
+            values.update(shard)
+    return values
+
+
+def write(values: dict[int, int], path: str = TABLEBASE_PATH) -> None:
+    keys = np.fromiter(values.keys(), dtype=np.uint64, count=len(values))
+    order = np.argsort(keys)
+    points = np.fromiter(values.values(), dtype=np.uint8, count=len(values))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(values)))
+        keys[order].astype("<u8").tofile(f)
+        points[order].tofile(f)
+    os.replace(tmp, path)
+
+
+class Tablebase:
+
+    """
+    Read only view of a tablebase file. The keys and values are memory mapped, so opening it is
+    instant and only the pages the binary searches touch are read from disk.
+    """
+
+    def __init__(self, path: str = TABLEBASE_PATH) -> None:
+        with open(path, "rb") as f:
+            header = f.read(len(MAGIC) + 8)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a tablebase file.")
+        self.size = struct.unpack("<Q", header[len(MAGIC):])[0]
+        self.keys = np.memmap(path, dtype="<u8", mode="r", offset=len(header), shape=(self.size, ))
+        self.values = np.memmap(path, dtype=np.uint8, mode="r", offset=len(header) + 8 * self.size,
+                                shape=(self.size, ))
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: int) -> Optional[int]:
+        """Returns the points the team of the leader still takes in the endgame with the key."""
+        key = np.uint64(key)
+        i = int(self.keys.searchsorted(key))
+        if i < self.size and self.keys[i] == key:
+            self.hits += 1
+            return int(self.values[i])
+        self.misses += 1
+        return None
+
+    def probe(self, hands: Sequence[int], trick: Sequence[int], leader: int, trump: int) -> Optional[int]:
+        """Returns the points team 0 still takes from the position, or None if it isn't stored."""
+        key = endgame_key(hands, trick, leader, trump)
+        if key is None:
+            return None
+        value = self.get(key)
+        if value is None or leader % 2 == 0:
+            return value
+        return remaining_points(hands, trick, trump) - value
+
+    def lookup(self, position: Position) -> Optional[int]:
+        return self.probe(position.hands, position.trick, position.leader, position.trump)
+
+
+_tablebase: Optional[Tablebase] = None
+
+
+def load_tablebase() -> Optional[Tablebase]:
+    """Returns the tablebase at TABLEBASE_PATH, or None if it wasn't generated."""
+    global _tablebase
+    if _tablebase is None and os.path.exists(TABLEBASE_PATH):
+        _tablebase = Tablebase()
+    return _tablebase
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bela.ai.tablebase",
+                                     description="Generates the endgame tablebase.")
+    parser.add_argument("-n", "--endgames", type=int, default=100000, help="sampled endgames to solve")
+    parser.add_argument("-t", "--tricks", type=int, default=MAX_TRICKS, help="tricks left in the sampled endgames")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="defaults to cpu count")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--merge", action="store_true", help="keep the positions of the existing file")
+    parser.add_argument("-o", "--output", default=TABLEBASE_PATH)
+    args = parser.parse_args()
+
+    values = {}
+    if args.merge and os.path.exists(args.output):
+        existing = Tablebase(args.output)
+        values = dict(zip(existing.keys.tolist(), existing.values.tolist()))
+
+    start = time.perf_counter()
+    before = len(values)
+    build(args.endgames, args.tricks, args.seed, args.processes, values=values)
+    write(values, args.output)
+    Log.i("TABLEBASE", f"Solved {args.endgames} endgames in {time.perf_counter() - start:.1f}s, "
+                       f"{len(values) - before} new positions, {len(values)} in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ from enum import Enum, auto
 from itertools import chain
 from typing import Tuple, Optional
 
-import pygame
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, CARD_POINTS, CARD_STRENGTH, FULL_MASK, HIGHER_MASKS, \
+    SUITS, SUIT_INDEX, SUIT_MASKS, TRUMP_INDEX, VALUES, cards_to_mask, legal_mask, trick_points, trick_winner
 
 
 class GameState(Enum):
@@ -30,8 +31,13 @@ class Hand:
     netalon: list = field(default_factory=list)
     talon: list = field(default_factory=list)
     sve: list = field(default_factory=list)
+    mask: int = 0
 
     def remove(self, card: Tuple[str, str]) -> None:
+        bit = CARD_BITS[CARD_INDEX[card]]
+        if not self.mask & bit:
+            return
+        self.mask ^= bit
         if card in self.netalon:
             self.netalon.pop(self.netalon.index(card))
         if card in self.talon:
@@ -39,33 +45,25 @@ class Hand:
         if card in self.sve:
             self.sve.pop(self.sve.index(card))
 
+    def has(self, card: Tuple[str, str]) -> bool:
+        return bool(self.mask & CARD_BITS[CARD_INDEX[card]])
 
-class Card:
+    def update_mask(self) -> None:
+        self.mask = cards_to_mask(self.sve)
 
-    def __init__(self, card, x, y, angle, rect, moving: bool = False) -> None:
-        self.card = card
-        self.x = x
-        self.y = y
-        self.angle = angle
-        self.rect = rect
-        self.moving = moving
-        self.def_pos = (x, y)
 
-    def set_pos(self, pos) -> None:
-        self.x, self.y = pos
-
-    def move_back(self) -> None:
-        self.x, self.y = self.def_pos
-
-    def collision_rect(self) -> pygame.Rect:
-        x, y = self.def_pos
-        return pygame.Rect(x - 7, y - 7, 14, 14)
+@dataclass
+class TableCard:
 
-    def get_pos(self) -> Tuple[int, int]:
-        return self.x, self.y
+    """
+    Card placed on the table together with the position it was dropped at, so that
+    every client can draw it where the player left it.
+    """
 
-    def __repr__(self) -> str:
-        return f"Card({self.card})"
+    card: Tuple[str, str]
+    x: int = 0
+    y: int = 0
+    angle: float = 0
 
 
 class Bela:
@@ -74,11 +72,14 @@ class Bela:
     Class that contains most of the game logic and features.
     """
 
-    def __init__(self, max_points: int, teams: Tuple[str, str]) -> None:
+    def __init__(self, max_points: int, teams: Tuple[str, str], seed: Optional[int] = None) -> None:
         self.max_points = max_points
         self.teams = teams
         self.start_time = time.time()
 
+        self.seed = seed
+        self.rng = random.Random(seed)
+
         self.player_data: list[Optional[str]] = [None] * 4
         self.players: list[Optional[str]] = [None] * 4
         self.players_ready: list[Optional[str]] = [None] * 4
@@ -99,12 +100,14 @@ class Bela:
 
         self.cards_on_table = []
         self.player_cards_on_table: list[Optional[str, str]] = [None, None, None, None]
+        self.played_cards: list[Tuple[int, Tuple[str, str]]] = []
 
         self.adut = None
         self.count_dalje = 0
         self.dalje = [False, False, False, False]
 
         self.zvanja = [[], [], [], []]
+        self.zvanja_masks = [0, 0, 0, 0]
         self.zvanje_over = [[False, False] for _ in range(4)]
         self.final_zvanja = [[], [], [], []]
         self.zvanja_points = [0, 0]
@@ -132,14 +135,49 @@ class Bela:
 
         self.auto_play = [False] * 4
 
-    def create_cards(self) -> None:
-        types = ["herc", "pik", "karo", "tref"]
-        values = ["7", "8", "9", "cener", "unter", "baba", "kralj", "kec"]
+    def __getstate__(self) -> dict:
+        # the generator state is bigger than the rest of the game and clients never deal cards
+        state = self.__dict__.copy()
+        state.pop("rng", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.rng = random.Random()
+
+    @classmethod
+    def from_deal(cls, max_points: int, teams: Tuple[str, str], netalon: list[list], talon: list[list],
+                  seed: Optional[int] = None) -> "Bela":
+        """
+        Creates a match whose first deal is the given one. Deals after the first one are shuffled
+        from the seed as usual.
+        """
+        game = cls(max_points, teams, seed)
+        game.set_deal(netalon, talon)
+        return game
+
+    def set_deal(self, netalon: list[list], talon: list[list]) -> None:
+        if len(netalon) != 4 or len(talon) != 4:
+            raise ValueError("Deal needs cards for all 4 players.")
+        if any(len(cards) != 6 for cards in netalon) or any(len(cards) != 2 for cards in talon):
+            raise ValueError("Every player needs 6 cards in netalon and 2 in talon.")
+        mask = cards_to_mask(chain(*netalon, *talon))
+        if mask != FULL_MASK:
+            raise ValueError("Deal must contain every card exactly once.")
 
-        self.deck = [(v, t) for t in types for v in values]
+        self.deck = []
+        for i in range(4):
+            self.cards[i] = Hand(list(netalon[i]), list(talon[i]), list(talon[i]) + list(netalon[i]))
+            self.cards[i].update_mask()
+
+    def get_deal(self) -> Tuple[list[list], list[list]]:
+        return [hand.netalon[:] for hand in self.cards], [hand.talon[:] for hand in self.cards]
+
+    def create_cards(self) -> None:
+        self.deck = [(v, t) for t in SUITS for v in VALUES]
 
     def rifle_shufle(self) -> None:
-        random.shuffle(self.deck)
+        self.rng.shuffle(self.deck)
 
     def deal_cards(self) -> None:
         for i in range(32):
@@ -150,46 +188,28 @@ class Bela:
 
         for i in range(4):
             self.cards[i].sve = self.cards[i].talon + self.cards[i].netalon
+            self.cards[i].update_mask()
 
     def strongest_card(self, cards: list[Tuple[str, str]]) -> Tuple[str, str]:
-        data = [[card, self.get_card_value(card), card[1] == self.adut, cards[0][1] == card[1]] for card in cards]
-        return sorted(data, key=lambda c: c[1] + c[2] * 1000 + c[3] * 100, reverse=True)[0][0]
+        return cards[trick_winner([CARD_INDEX[card] for card in cards], TRUMP_INDEX[self.adut])]
 
     def inspect_played_card(self, card: Tuple[str, str], id_: int) -> bool:
-        if not any(self.cards_on_table):
-            return True
+        return bool(self.legal_mask(id_) & CARD_BITS[CARD_INDEX[card]])
 
-        first_card = self.cards_on_table[0].card
-        strongest_card = self.strongest_card(list(map(lambda c: c.card, self.cards_on_table)))
+    def legal_mask(self, id_: int) -> int:
+        trick = [CARD_INDEX[card.card] for card in self.cards_on_table]
+        return legal_mask(self.cards[id_].mask, trick, TRUMP_INDEX[self.adut])
 
-        if card[1] != first_card[1]:
-            if self.player_has_color(first_card[1], id_):  # played wrong color while having the right color
-                return False
-            if card[1] != self.adut and self.player_has_adut(id_):  # played wrong color while having adut
-                return False
-            if card[1] == self.adut and strongest_card[1] == self.adut and \
-                    self.is_card_greater(strongest_card, card):  # played either < or > then strongest_card
-                return not self.player_has_higher(strongest_card, id_)
-        elif self.is_card_greater(card, strongest_card):  # played the card stronger than the strongest_card
-            return True
-        else:
-            return not self.player_has_higher(strongest_card, id_)  # player either has or doesn't have bigger card
-        return True
+    def legal_moves(self, id_: int) -> list[Tuple[str, str]]:
+        mask = self.legal_mask(id_)
+        return [card for card in self.cards[id_].sve if mask & CARD_BITS[CARD_INDEX[card]]]
 
     def remove_cards_from_table(self) -> [int, int]:
-        cards_on_table = list(map(lambda x: x.card, self.cards_on_table))
-        stih_value = sum(list(map(self.get_real_card_value, cards_on_table)))
-        first_card = cards_on_table[1]
-        card_values = [[0, 0, 0][:] for _ in range(4)]
-
-        for i, card in enumerate(cards_on_table):
-            card_values[i][2] = int(card[1] == self.adut) * 1000
-            card_values[i][1] = int(card[1] == first_card) * 100
-            card_values[i][0] = self.get_card_value(card)
-
-        values_filtered = [sum(d) for d in card_values]
+        trick = [CARD_INDEX[card.card] for card in self.cards_on_table]
+        trump = TRUMP_INDEX[self.adut]
+        stih_value = trick_points(trick, trump)
 
-        idx = values_filtered.index(max(values_filtered))
+        idx = trick_winner(trick, trump)
         player_turn = self.player_turn - 3
         if player_turn < 0:
             player_turn += 4
@@ -200,58 +220,27 @@ class Bela:
         return ret, stih_value
 
     def player_has_adut(self, id_: int) -> bool:
-        return any(card[1] == self.adut for card in self.cards[id_].sve)
+        if self.adut is None:
+            return False
+        return self.player_has_color(self.adut, id_)
 
     def player_has_higher(self, card: Tuple[str, str], id_: int) -> bool:
-        return any(self.is_card_greater(c, card) for c in filter(lambda x: x[1] == card[1], self.cards[id_].sve))
+        return bool(self.cards[id_].mask & HIGHER_MASKS[card[1] == self.adut][CARD_INDEX[card]])
 
     def player_has_color(self, color: str, id_: int) -> bool:
-        return any(card[1] == color for card in self.cards[id_].sve)
+        return bool(self.cards[id_].mask & SUIT_MASKS[SUIT_INDEX[color]])
 
     def is_card_greater(self, c1: Tuple[str, str], c2: Tuple[str, str]) -> bool:
         if c1[1] != c2[1]:
             return True
-        return self.get_card_value(c1) > self.get_card_value(c2)
+        strength = CARD_STRENGTH[TRUMP_INDEX[self.adut]]
+        return strength[CARD_INDEX[c1]] > strength[CARD_INDEX[c2]]
 
     def get_card_value(self, card: Tuple[str, str]) -> int:
-        if card[0] == "9":
-            if card[1] == self.adut:
-                return 18
-            return 9
-        elif card[0] == "unter":
-            if card[1] == self.adut:
-                return 19
-            return 12
-        if card[0] in "78":
-            return int(card[0])
-        elif card[0] == "baba":
-            return 13
-        elif card[0] == "kralj":
-            return 14
-        elif card[0] == "cener":
-            return 15
-        elif card[0] == "kec":
-            return 16
+        return CARD_STRENGTH[TRUMP_INDEX[self.adut]][CARD_INDEX[card]]
 
     def get_real_card_value(self, card: Tuple[str, str]) -> int:
-        if card[0] == "9":
-            if card[1] == self.adut:
-                return 14
-            return 0
-        elif card[0] == "unter":
-            if card[1] == self.adut:
-                return 20
-            return 2
-        if card[0] in "78":
-            return 0
-        elif card[0] == "baba":
-            return 3
-        elif card[0] == "kralj":
-            return 4
-        elif card[0] == "cener":
-            return 10
-        elif card[0] == "kec":
-            return 11
+        return CARD_POINTS[TRUMP_INDEX[self.adut]][CARD_INDEX[card]]
 
     def calculate_zvanja(self) -> None:
         # TODO: u ovoj funkciji sigurno nes ne valja jer moj mozak premali za ovakvu kompliciranost pa popravi to
@@ -305,30 +294,25 @@ class Bela:
 
     def sort_player_cards(self, id_: int) -> None:
         list_sorted = []
-        types = ["herc", "pik", "karo", "tref"]
-        values = ["7", "8", "9", "cener", "unter", "baba", "kralj", "kec"]
-        current = self.cards[id_].sve[:]
-
-        if self.get_adut():
-            types.remove(self.get_adut())
+        types = [t for t in SUITS if t != self.get_adut()]
+        mask = self.cards[id_].mask
 
         for x in types:
-            for y in values:
-                if (y, x) in current:
+            for y in VALUES:
+                if mask & CARD_BITS[CARD_INDEX[(y, x)]]:
                     list_sorted.append((y, x))
-                    current.remove((y, x))
 
         if self.get_adut():
             values_adut = ["7", "8", "cener", "baba", "kralj", "kec", "9", "unter"]
             for x in values_adut:
-                if (x, self.get_adut()) in current:
+                if mask & CARD_BITS[CARD_INDEX[(x, self.get_adut())]]:
                     list_sorted.append((x, self.get_adut()))
 
         self.cards[id_].sve = list_sorted
 
     def add_zvanja(self, cards: list, id_: int) -> None:
         types = ["karo", "herc", "tref", "pik"]
-        random.shuffle(types)
+        self.rng.shuffle(types)
 
         card_count = {}
         card_types = {}
@@ -372,6 +356,7 @@ class Bela:
             all_zvanja_skala += zvanje_skala
 
         self.zvanja[id_] = zvanja4 + all_zvanja_skala
+        self.zvanja_masks[id_] = cards_to_mask(chain(*self.zvanja[id_]))
 
     def next_turn(self) -> None:
         self.player_turn += 1
@@ -455,14 +440,17 @@ class Bela:
 
         self.cards_on_table.clear()
         self.player_cards_on_table = [None] * 4
+        self.played_cards = []
 
         self.adut = None
         self.count_dalje = 0
         self.dalje = [False] * 4
 
         self.zvanja = [[], [], [], []]
+        self.zvanja_masks = [0, 0, 0, 0]
         self.zvanje_over = [[False, False] for _ in range(4)]
         self.final_zvanja = [[], [], [], []]
+        self.zvanja_points = [0, 0]
 
         self.points = [0, 0]
         self.stihovi = [[], [], [], []]
@@ -489,9 +477,10 @@ class Bela:
         elif self.current_state is GameState.IGRA:
             self.current_state = GameState.BROJANJE
 
-    def add_card_to_table(self, card: Tuple[str, str], id_: int) -> None:
+    def add_card_to_table(self, card: TableCard, id_: int) -> None:
         self.cards_on_table.append(card)
         self.player_cards_on_table[id_] = card
+        self.played_cards.append((id_, card.card))
 
         if len(self.cards_on_table) == 4:
             turn, stih = self.remove_cards_from_table()
@@ -530,10 +519,12 @@ class Bela:
         self.players[id_] = None
 
     def player_has_bela(self, id_: int) -> bool:
-        return ("kralj", self.adut) in self.cards[id_].sve and ("baba", self.adut) in self.cards[id_].sve
+        if self.adut is None:
+            return False
+        return self.cards[id_].has(("kralj", self.adut)) and self.cards[id_].has(("baba", self.adut))
 
     def card_in_player_zvanja(self, card: Tuple[str, str], id_: int) -> bool:
-        return card in list(chain(*self.get_player_zvanja(id_)))
+        return bool(self.zvanja_masks[id_] & CARD_BITS[CARD_INDEX[card]])
 
     def get_zvanje_value(self, zvanje: list[Tuple[str, str]]) -> Tuple[int, str]:
         if len(zvanje) == 4 and zvanje[0][0] == zvanje[1][0]:
@@ -555,7 +546,7 @@ class Bela:
             return 100, "s"
 
     def get_zvanje_card_value(self, card: Tuple[str, str]) -> int:
-        return ["7", "8", "9", "cener", "unter", "baba", "kralj", "kec"].index(card[0])
+        return VALUES.index(card[0])
 
     def get_player_zvanja(self, id_: int) -> list[list[Tuple[str, str]]]:
         return self.zvanja[id_]
@@ -0,0 +1,160 @@
+"""
+Compact card representation used by the game engine.
+
+A card is an int in range 0-31 (suit * 8 + value) and a set of cards is a 32-bit mask,
+so rule checks are a couple of bit operations instead of list scans. The (value, suit)
+string tuples are still used everywhere outside the engine and are converted at the edges.
+"""
+
+from typing import Iterable, Tuple
+
+
+SUITS = ("herc", "pik", "karo", "tref")
+VALUES = ("7", "8", "9", "cener", "unter", "baba", "kralj", "kec")
+
+NON_TRUMP_ORDER = ("7", "8", "9", "unter", "baba", "kralj", "cener", "kec")
+TRUMP_ORDER = ("7", "8", "baba", "kralj", "cener", "kec", "9", "unter")
+
+CARDS: Tuple[Tuple[str, str], ...] = tuple((v, s) for s in SUITS for v in VALUES)
+CARD_INDEX = {card: i for i, card in enumerate(CARDS)}
+SUIT_INDEX = {s: i for i, s in enumerate(SUITS)}
+
+EMPTY_MASK = 0
+FULL_MASK = (1 << 32) - 1
+CARD_BITS: Tuple[int, ...] = tuple(1 << i for i in range(32))
+SUIT_MASKS: Tuple[int, ...] = tuple(0xFF << (8 * i) for i in range(4))
+
+
+def _higher_masks(order: Tuple[str, ...]) -> Tuple[int, ...]:
+    masks = []
+    for value, suit in CARDS:
+        rank = order.index(value)
+        mask = 0
+        for higher in order[rank + 1:]:
+            mask |= CARD_BITS[CARD_INDEX[(higher, suit)]]
+        masks.append(mask)
+    return tuple(masks)
+
+
+# HIGHER_MASKS[is_trump][card] -> mask of the cards in the same suit that beat the card
+HIGHER_MASKS: Tuple[Tuple[int, ...], Tuple[int, ...]] = (_higher_masks(NON_TRUMP_ORDER), _higher_masks(TRUMP_ORDER))
+
+
+if hasattr(int, "bit_count"):
+    def popcount(mask: int) -> int:
+        return mask.bit_count()
+else:
+    def popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+def card_to_int(card: Tuple[str, str]) -> int:
+    return CARD_INDEX[card]
+
+
+def int_to_card(card: int) -> Tuple[str, str]:
+    return CARDS[card]
+
+
+def suit_of(card: int) -> int:
+    return card >> 3
+
+
+def value_of(card: int) -> int:
+    return card & 7
+
+
+def cards_to_mask(cards: Iterable[Tuple[str, str]]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= CARD_BITS[CARD_INDEX[card]]
+    return mask
+
+
+def mask_to_ints(mask: int) -> list[int]:
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def mask_to_cards(mask: int) -> list[Tuple[str, str]]:
+    return [CARDS[card] for card in mask_to_ints(mask)]
+
+
+def suit_mask(suit: str) -> int:
+    return SUIT_MASKS[SUIT_INDEX[suit]]
+
+
+NO_TRUMP = 4
+TRUMP_INDEX = {**SUIT_INDEX, None: NO_TRUMP}
+
+_STRENGTH = {"7": 7, "8": 8, "9": 9, "unter": 12, "baba": 13, "kralj": 14, "cener": 15, "kec": 16}
+_TRUMP_STRENGTH = {**_STRENGTH, "9": 18, "unter": 19}
+_POINTS = {"7": 0, "8": 0, "9": 0, "unter": 2, "baba": 3, "kralj": 4, "cener": 10, "kec": 11}
+_TRUMP_POINTS = {**_POINTS, "9": 14, "unter": 20}
+
+
+def _trump_table(plain: dict, trump: dict, trump_bonus: int = 0) -> Tuple[Tuple[int, ...], ...]:
+    rows = []
+    for t in range(NO_TRUMP + 1):
+        rows.append(tuple(
+            trump[value] + trump_bonus if SUIT_INDEX[suit] == t else plain[value]
+            for value, suit in CARDS
+        ))
+    return tuple(rows)
+
+
+# Row per trump suit (plus a last NO_TRUMP row for when adut isn't called yet), column per card.
+# Trump cards get +100 so they beat every card of any other suit.
+CARD_STRENGTH = _trump_table(_STRENGTH, _TRUMP_STRENGTH, 100)
+CARD_POINTS = _trump_table(_POINTS, _TRUMP_POINTS)
+
+
+def trick_winner(trick: list[int], trump: int) -> int:
+    """
+    Returns the index of the card that wins the trick. Cards that neither follow the suit of the
+    first card nor are trump can't win, so they are simply skipped.
+    """
+    strength = CARD_STRENGTH[trump]
+    lead = trick[0] >> 3
+    best, best_value = 0, strength[trick[0]]
+    for i in range(1, len(trick)):
+        card = trick[i]
+        suit = card >> 3
+        if (suit == lead or suit == trump) and strength[card] > best_value:
+            best, best_value = i, strength[card]
+    return best
+
+
+def trick_points(trick: list[int], trump: int) -> int:
+    points = CARD_POINTS[trump]
+    return sum(points[card] for card in trick)
+
+
+def legal_mask(hand: int, trick: list[int], trump: int) -> int:
+    """
+    Returns the mask of cards from the hand that can be played on the trick. The player has to
+    follow the suit of the first card, trump if he can't and overtake the strongest card on the
+    table with the card of the same suit whenever he is able to.
+    """
+    if not trick:
+        return hand
+
+    lead = trick[0] >> 3
+    strongest = trick[trick_winner(trick, trump)]
+
+    cards = hand & SUIT_MASKS[lead]
+    if not cards and trump != NO_TRUMP:
+        lead = trump
+        cards = hand & SUIT_MASKS[trump]
+    if not cards:
+        return hand
+
+    if strongest >> 3 == lead:
+        higher = cards & HIGHER_MASKS[lead == trump][strongest]
+        if higher:
+            return higher
+    return cards
@@ -0,0 +1,144 @@
+from typing import NamedTuple, Tuple
+
+from bela.game.main.bela import Bela
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, CARD_POINTS, TRUMP_INDEX, legal_mask, trick_winner
+
+
+LAST_TRICK_BONUS = 10
+
+
+class Position(NamedTuple):
+
+    """
+    Immutable snapshot of the card playing phase: the hands as card masks, the cards of the trick
+    in progress, who led it, the trump and the points and tricks each team took so far.
+    Playing a card returns a new position and shares nothing mutable with the old one.
+    """
+
+    hands: Tuple[int, int, int, int]
+    trick: Tuple[int, ...]
+    leader: int
+    trump: int
+    points: Tuple[int, int] = (0, 0)
+    tricks: Tuple[int, int] = (0, 0)
+
+    @classmethod
+    def from_bela(cls, game: Bela) -> "Position":
+        hands = tuple(hand.mask for hand in game.cards)
+        points = tuple(p or 0 for p in game.points)
+        tricks = (len(game.stihovi[0]) + len(game.stihovi[2]), len(game.stihovi[1]) + len(game.stihovi[3]))
+
+        if game.turn_just_ended:
+            # the trick is already scored, it just wasn't cleared from the table yet
+            winner = game.current_turn_winner
+            points = list(points)
+            if not any(hands):
+                points[winner % 2] += LAST_TRICK_BONUS
+            return cls(hands, (), winner, TRUMP_INDEX[game.adut], tuple(points),
+                       (tricks[0] + (winner % 2 == 0), tricks[1] + (winner % 2 == 1)))
+
+        trick = tuple(CARD_INDEX[card.card] for card in game.cards_on_table)
+        leader = (game.player_turn - len(trick)) % 4
+        return cls(hands, trick, leader, TRUMP_INDEX[game.adut], points, tricks)
+
+    @property
+    def turn(self) -> int:
+        return (self.leader + len(self.trick)) % 4
+
+    @property
+    def is_over(self) -> bool:
+        return not any(self.hands) and not self.trick
+
+    def legal_moves(self) -> int:
+        return legal_mask(self.hands[self.turn], list(self.trick), self.trump)
+
+    def play(self, card: int) -> "Position":
+        turn = (self.leader + len(self.trick)) % 4
+        bit = CARD_BITS[card]
+        if not self.hands[turn] & bit:
+            raise ValueError(f"Player {turn} doesn't have card {card}.")
+
+        hands = list(self.hands)
+        hands[turn] ^= bit
+        trick = self.trick + (card,)
+
+        if len(trick) < 4:
+            return Position(tuple(hands), trick, self.leader, self.trump, self.points, self.tricks)
+
+        winner = (self.leader + trick_winner(list(trick), self.trump)) % 4
+        gained = sum(CARD_POINTS[self.trump][c] for c in trick)
+        if not any(hands):
+            gained += LAST_TRICK_BONUS
+
+        points = list(self.points)
+        points[winner % 2] += gained
+        tricks = list(self.tricks)
+        tricks[winner % 2] += 1
+        return Position(tuple(hands), (), winner, self.trump, tuple(points), tuple(tricks))
+
+
+class MutablePosition:
+
+    """
+    Mutable counterpart of Position for search. play and undo change the position in place and
+    only push a small tuple on the history stack, so walking a search tree allocates almost nothing.
+    """
+
+    __slots__ = ("hands", "trick", "leader", "trump", "points", "tricks", "history")
+
+    def __init__(self, position: Position) -> None:
+        self.hands = list(position.hands)
+        self.trick = list(position.trick)
+        self.leader = position.leader
+        self.trump = position.trump
+        self.points = list(position.points)
+        self.tricks = list(position.tricks)
+        self.history = []
+
+    @property
+    def turn(self) -> int:
+        return (self.leader + len(self.trick)) % 4
+
+    @property
+    def is_over(self) -> bool:
+        return not self.trick and not any(self.hands)
+
+    def legal_moves(self) -> int:
+        return legal_mask(self.hands[(self.leader + len(self.trick)) % 4], self.trick, self.trump)
+
+    def play(self, card: int) -> None:
+        turn = (self.leader + len(self.trick)) % 4
+        self.hands[turn] ^= CARD_BITS[card]
+        self.trick.append(card)
+
+        if len(self.trick) < 4:
+            self.history.append((card, turn, None))
+            return
+
+        trick = self.trick
+        winner = (self.leader + trick_winner(trick, self.trump)) % 4
+        points = CARD_POINTS[self.trump]
+        gained = points[trick[0]] + points[trick[1]] + points[trick[2]] + points[trick[3]]
+        if not (self.hands[0] | self.hands[1] | self.hands[2] | self.hands[3]):
+            gained += LAST_TRICK_BONUS
+
+        self.points[winner % 2] += gained
+        self.tricks[winner % 2] += 1
+        self.history.append((card, turn, (trick, self.leader, winner, gained)))
+        self.trick = []
+        self.leader = winner
+
+    def undo(self) -> None:
+        card, turn, resolved = self.history.pop()
+        if resolved is not None:
+            trick, leader, winner, gained = resolved
+            self.points[winner % 2] -= gained
+            self.tricks[winner % 2] -= 1
+            self.trick = trick
+            self.leader = leader
+        self.trick.pop()
+        self.hands[turn] |= CARD_BITS[card]
+
+    def freeze(self) -> Position:
+        return Position(tuple(self.hands), tuple(self.trick), self.leader, self.trump,
+                        tuple(self.points), tuple(self.tricks))
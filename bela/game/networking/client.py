@@ -6,9 +6,10 @@ from typing import Any
 
 import pygame
 
-from bela.game.main.bela import GameState, Hand, Card, GameData
-from bela.game.networking.commands import Commands, Command
+from bela.game.main.bela import GameState, Hand, GameData
+from bela.game.networking.commands import Commands, Command, Event, Events
 from bela.game.ui.button import Button
+from bela.game.ui.card import Card
 from bela.game.ui.container import Container
 from bela.game.ui.grid import Grid
 from bela.game.ui.input_field import InputField
@@ -21,7 +22,9 @@ from bela.game.utils.timer import TimerHandler
 from ..ui.label import Label
 from ..utils import config, rendering
 from ..events.events import EventHandler
+from ..networking.framing import DEFAULT_BUFFER
 from ..networking.network import Network
+from ..networking.sync import SyncedState
 from ..utils.colors import *
 
 pygame.init()
@@ -33,8 +36,9 @@ class Client:
 
     def __init__(self):
 
-        self.__network_buffer = 8180
+        self.__network_buffer = DEFAULT_BUFFER
         self.network = Network(buffer=self.__network_buffer)
+        self.synced = SyncedState()
 
         self.win = pygame.display.set_mode(config.WINDOW_SIZE, pygame.SRCALPHA)
         pygame.display.set_caption(f"Bela")
@@ -71,6 +75,7 @@ class Client:
         self.game_state: ClientGameStates = ClientGameStates.MAIN_MENU
 
         self.connected = False
+        self.joining_game = False
 
         self.background_color = (0, 0, 20)
 
@@ -480,11 +485,14 @@ class Client:
 
     def connect(self) -> None:
         self.network = Network(buffer=self.__network_buffer)
+        self.synced = SyncedState()
         self.network.connect()
         self.network.update_connection()
         self.__client_id = self.network.client_id
         self.nickname_input_field.hint = self.network.recv_only()
         self.connected = True
+        # the lobby as it is now, after that the server pushes its changes
+        self.send_data(Commands.GET)
 
     def disconnect(self) -> None:
         data = self.network.send(Commands.DISCONNECT)
@@ -493,12 +501,33 @@ class Client:
 
     def send_data(self, data: Command) -> None:
         if self.connected:
-            self.data = self.network.send(data)
+            self.data = self.request(data)
 
-    def update(self):
-        if self.game_state not in (ClientGameStates.MAIN_MENU, ClientGameStates.UNDEFINED):
+    def request(self, data: Command) -> dict[str, Any]:
+        response = self.network.send(data)
+        # events that arrived before the response are older than it
+        for event in self.network.pending_events():
+            self.handle_event(event)
+        return self.synced.apply(response)
+
+    def receive_events(self) -> None:
+        if not self.connected:
+            return
+        for event in self.network.poll():
+            self.handle_event(event)
+        if self.joining_game:
+            self.joining_game = False
             self.send_data(Commands.GET)
 
+    def handle_event(self, event: Event) -> None:
+        self.data = self.synced.apply_event(event, self.data)
+        if event.name == Events.START_GAME:
+            # the game is full, the response to the next GET has the game
+            self.joining_game = True
+
+    def update(self):
+        self.receive_events()
+
         self.timer_handler.update()
 
         self.animation_handler.update()
@@ -991,15 +1020,12 @@ class Client:
 
         if self.on_turn() and self.game.get_current_game_state() is GameState.IGRA \
                 and self.game.auto_play[self.__player]:
-            data = {}
-            i = -1
-            for i, card in enumerate(self.inventory):
-                data = self.network.send(Commands.new(Commands.PLAY_CARD, card))
-                self.data = data
-                if data["data"]["passed"]:
-                    break
-            if self.inventory and data["data"]["passed"]:
-                self.inventory.pop(i)
+            self.data = self.request(
+                Commands.new(Commands.AUTO_PLAY, [card.to_table_card() for card in self.inventory])
+            )
+            if self.data["data"]["passed"]:
+                played = self.data["data"]["card"]
+                self.inventory.pop(next(i for i, card in enumerate(self.inventory) if card.card == played))
 
         # </DEBUG CODE>
 
@@ -1048,7 +1074,8 @@ class Client:
 
     def handle_card_playing(self) -> None:
         if self.connected:
-            data = self.network.send(Commands.new(Commands.PLAY_CARD, self.inventory[self.moving_card]))
+            card = self.inventory[self.moving_card].to_table_card()
+            data = self.request(Commands.new(Commands.PLAY_CARD, card))
         else:
             return
 
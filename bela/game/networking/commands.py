@@ -1,7 +1,8 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Optional
 
-from bela.game.main.bela import Card, GameData
+from bela.game.main.bela import GameData, TableCard
+from bela.game.networking.sync import Delta
 
 
 @dataclass
@@ -20,7 +21,8 @@ class Commands:
     CHANGE_NICKNAME = Command("CHANGE_NICKNAME", (str, ))
     READY_UP = Command("READY_UP", None)
     SORT_CARDS = Command("SORT_CARDS", None)
-    PLAY_CARD = Command("PLAY_CARD", (Card, ))
+    PLAY_CARD = Command("PLAY_CARD", (TableCard, ))
+    AUTO_PLAY = Command("AUTO_PLAY", (list, ))
     SWAP_CARDS = Command("SWAP_CARDS", (int, int))
     CALL_ADUT = Command("CALL_ADUT", (str, ))
     DALJE = Command("DALJE", None)
@@ -45,3 +47,47 @@ class Commands:
     def str_equals(c1: Command, s1: str) -> bool:
         return c1.name == s1
 
+
+@dataclass
+class Event:
+
+    """
+    Message the server sends without being asked, with the deltas of the states it changed.
+    """
+
+    name: str
+    lobby: Optional[Delta] = None
+    game: Optional[Delta] = None
+
+
+class Events:
+
+    LOBBY_CHANGED = "LOBBY_CHANGED"
+    START_GAME = "START_GAME"
+    ADUT_CALLED = "ADUT_CALLED"
+    DALJE = "DALJE"
+    ZVANJA = "ZVANJA"
+    CARD_PLAYED = "CARD_PLAYED"
+    BELA_CALLED = "BELA_CALLED"
+    TRICK_ENDED = "TRICK_ENDED"
+    GAME_ENDED = "GAME_ENDED"
+    CARDS_MOVED = "CARDS_MOVED"
+    PLAYER_LEFT = "PLAYER_LEFT"
+    GAME_CHANGED = "GAME_CHANGED"
+
+
+# event sent to the other players when a command changed the game
+COMMAND_EVENTS = {
+    "CALL_ADUT": Events.ADUT_CALLED,
+    "DALJE": Events.DALJE,
+    "ZVANJE": Events.ZVANJA,
+    "ZVANJE_GOTOVO": Events.ZVANJA,
+    "PLAY_CARD": Events.CARD_PLAYED,
+    "AUTO_PLAY": Events.CARD_PLAYED,
+    "CALLED_BELA": Events.BELA_CALLED,
+    "END_TURN": Events.TRICK_ENDED,
+    "END_GAME": Events.GAME_ENDED,
+    "SWAP_CARDS": Events.CARDS_MOVED,
+    "SORT_CARDS": Events.CARDS_MOVED,
+    "CLOSE_GAME": Events.PLAYER_LEFT,
+}
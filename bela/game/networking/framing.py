@@ -0,0 +1,68 @@
+"""
+Length prefixed framing of the messages sent between the clients, the server and the server controller.
+
+Every message is a 4 byte big endian length followed by that many bytes of payload. TCP is a stream,
+so one recv can return half a message or the end of one and the start of the next. Reading the header
+and then exactly the announced number of bytes always gives back whole messages, however large.
+"""
+
+import asyncio
+import socket
+import struct
+
+
+HEADER = struct.Struct("!I")
+MAX_FRAME = 64 * 1024 * 1024
+# most messages are a lot smaller, larger ones are read in chunks of this size
+DEFAULT_BUFFER = 64 * 1024
+
+
+class FrameError(ConnectionError):
+
+    """
+    The peer sent something that isn't a valid frame. It's a socket error, so the connection is
+    dropped by the same handlers that deal with a peer disconnecting.
+    """
+
+
+def send_frame(sock: socket.socket, payload: bytes) -> None:
+    if len(payload) > MAX_FRAME:
+        raise FrameError(f"Frame of {len(payload)} bytes is larger than {MAX_FRAME} bytes.")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_exactly(sock: socket.socket, size: int, buffer: int = DEFAULT_BUFFER) -> bytearray:
+    """
+    Reads exactly size bytes, in recv calls of at most buffer bytes. Raises EOFError if the peer
+    closes the connection before all of them arrived.
+    """
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], min(size - received, buffer))
+        if not n:
+            raise EOFError(f"Connection closed after {received} of {size} bytes.")
+        received += n
+    return data
+
+
+def recv_frame(sock: socket.socket, buffer: int = DEFAULT_BUFFER) -> bytearray:
+    size, = HEADER.unpack(recv_exactly(sock, HEADER.size, buffer))
+    if size > MAX_FRAME:
+        raise FrameError(f"Frame of {size} bytes is larger than {MAX_FRAME} bytes.")
+    return recv_exactly(sock, size, buffer)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    size, = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if size > MAX_FRAME:
+        raise FrameError(f"Frame of {size} bytes is larger than {MAX_FRAME} bytes.")
+    return await reader.readexactly(size)
+
+
+def write_frame(writer: asyncio.StreamWriter, payload: bytes) -> None:
+    """Queues the frame on the writer, the caller drains it when it wants to wait for the peer."""
+    if len(payload) > MAX_FRAME:
+        raise FrameError(f"Frame of {len(payload)} bytes is larger than {MAX_FRAME} bytes.")
+    writer.write(HEADER.pack(len(payload)) + payload)
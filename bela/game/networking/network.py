@@ -1,33 +1,60 @@
+import select
 import socket
-import pickle
+from collections import deque
+
+from bela.game.networking.commands import Event
+from bela.game.networking.framing import DEFAULT_BUFFER
+from bela.game.networking.wire import recv_message, send_message
 
 
 class Network:
 
-    def __init__(self, buffer: int = 2048, port: int = None):
+    def __init__(self, buffer: int = DEFAULT_BUFFER, port: int = None):
         self.__client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.__server = socket.gethostname()
         self.__port = port or 22222
         self.__address = (self.__server, self.__port)
         self.__client_id = None
         self.__buffer = buffer
+        # events the server pushed, in the order they arrived
+        self.events: deque[Event] = deque()
 
     @property
     def client_id(self):
         return self.__client_id
 
     def update_connection(self):
-        self.__client_id = pickle.loads(self.__client.recv(self.__buffer))
+        self.__client_id = recv_message(self.__client, self.__buffer)
 
     def connect(self):
         self.__client.connect(self.__address)
 
     def send(self, data):
-        self.__client.send(pickle.dumps(data))
-        return pickle.loads(self.__client.recv(self.__buffer))
+        """
+        Sends a command and waits for the response. Events that arrive before it are kept, they are
+        older than the response and have to be applied before it.
+        """
+        send_message(self.__client, data)
+        while True:
+            message = recv_message(self.__client, self.__buffer)
+            if not isinstance(message, Event):
+                return message
+            self.events.append(message)
+
+    def poll(self) -> list[Event]:
+        """Returns the events that arrived so far, without waiting for more."""
+        while select.select([self.__client], [], [], 0)[0]:
+            self.events.append(recv_message(self.__client, self.__buffer))
+        return self.pending_events()
+
+    def pending_events(self) -> list[Event]:
+        """Returns the events that arrived while waiting for a response."""
+        events = list(self.events)
+        self.events.clear()
+        return events
 
     def send_only(self, data):
-        self.__client.send(pickle.dumps(data))
+        send_message(self.__client, data)
 
     def recv_only(self):
-        return pickle.loads(self.__client.recv(self.__buffer))
+        return recv_message(self.__client, self.__buffer)
@@ -0,0 +1,121 @@
+"""
+Server push of state changes to the clients that subscribed to them.
+
+Clients don't ask for the state every frame anymore. A connection in the lobby is subscribed to the
+lobby and a connection that entered a game to that game, and whenever a command changes one of them
+the server sends every other subscriber an event with the delta since the version it has. Idle
+clients cost the server nothing, the load follows what happens in the games.
+"""
+
+import asyncio
+from typing import Any, Optional
+
+from bela.game.networking.commands import Event, Events
+from bela.game.networking.sync import VersionedFields
+from bela.game.networking.wire import write_message
+
+
+# a client that lets this many bytes of events pile up without reading them is disconnected
+MAX_BACKLOG = 1024 * 1024
+
+
+class Subscriber:
+
+    """
+    One client connection and the versions of the lobby and game state it was sent last. Responses
+    and events are written to the connection in the order they are sent, so the versions always
+    match what the client got.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.lobby_sent = (0, -1)
+        self.game_sent = (0, -1)
+
+    def reset_game(self) -> None:
+        self.game_sent = (0, -1)
+
+    def is_slow(self) -> bool:
+        return self.writer.is_closing() or self.writer.transport.get_write_buffer_size() > MAX_BACKLOG
+
+    def send(self, message: Any, lobby: Optional[VersionedFields] = None,
+             game: Optional[VersionedFields] = None) -> bool:
+        """
+        Sends a response (dict) or an event with the deltas of the given states since what was sent
+        last. Events about states that didn't change for this client aren't sent. Returns whether
+        the message was sent.
+        """
+        lobby_delta = lobby.delta(*self.lobby_sent) if lobby is not None else None
+        game_delta = game.delta(*self.game_sent) if game is not None else None
+
+        if isinstance(message, Event):
+            deltas = [d for d in (lobby_delta, game_delta) if d is not None]
+            if deltas and not any(d.full or d.fields or d.removed for d in deltas):
+                return False
+            message.lobby, message.game = lobby_delta, game_delta
+        else:
+            if lobby_delta is not None:
+                message["lobby"] = lobby_delta
+            if game_delta is not None:
+                message["game"] = game_delta
+
+        write_message(self.writer, message)
+        if lobby_delta is not None:
+            self.lobby_sent = (lobby_delta.source, lobby_delta.version)
+        if game_delta is not None:
+            self.game_sent = (game_delta.source, game_delta.version)
+        return True
+
+
+class Hub:
+
+    """
+    Subscriptions of the connections to the lobby and to the games. Publishing sends an event to
+    every subscriber but the one whose command caused it, which gets the change in its response.
+    Events are only queued on the connections, publishing never waits for a client. Subscribers
+    that stopped reading are dropped and their connection closed.
+    """
+
+    def __init__(self) -> None:
+        self.lobby: set[Subscriber] = set()
+        self.games: dict[str, set[Subscriber]] = {}
+
+    def subscribe_lobby(self, subscriber: Subscriber) -> None:
+        self.lobby.add(subscriber)
+
+    def unsubscribe_lobby(self, subscriber: Subscriber) -> None:
+        self.lobby.discard(subscriber)
+
+    def subscribe_game(self, game_name: str, subscriber: Subscriber) -> None:
+        self.games.setdefault(game_name, set()).add(subscriber)
+
+    def unsubscribe_game(self, game_name: str, subscriber: Subscriber) -> None:
+        subscribers = self.games.get(game_name)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.games[game_name]
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.lobby.discard(subscriber)
+        for game_name in [name for name, subscribers in self.games.items() if subscriber in subscribers]:
+            self.unsubscribe_game(game_name, subscriber)
+
+    def remove_game(self, game_name: str) -> None:
+        self.games.pop(game_name, None)
+
+    def publish_lobby(self, lobby: VersionedFields, exclude: Optional[Subscriber] = None) -> None:
+        self.publish([s for s in self.lobby if s is not exclude], Events.LOBBY_CHANGED, lobby=lobby)
+
+    def publish_game(self, game_name: str, name: str, game: Optional[VersionedFields] = None,
+                     exclude: Optional[Subscriber] = None) -> None:
+        self.publish([s for s in self.games.get(game_name, ()) if s is not exclude], name, game=game)
+
+    def publish(self, subscribers: list[Subscriber], name: str, lobby: Optional[VersionedFields] = None,
+                game: Optional[VersionedFields] = None) -> None:
+        for subscriber in subscribers:
+            if subscriber.is_slow():
+                self.unsubscribe(subscriber)
+                subscriber.writer.close()
+            else:
+                subscriber.send(Event(name), lobby, game)
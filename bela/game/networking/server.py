@@ -1,228 +1,357 @@
-import pickle
+import asyncio
 import random
 import socket
 import string
-from _thread import start_new_thread
+from typing import Any, Optional
 
-from bela.game.networking.commands import Commands
+from bela.ai.ismcts import ISMCTSPolicy
+from bela.game.networking.commands import COMMAND_EVENTS, Command, Commands, Events
+from bela.game.networking.push import Hub, Subscriber
+from bela.game.networking.sync import GameInfo, VersionedFields
+from bela.game.networking.wire import GAME_STATE, LOBBY_STATE, read_message, write_message
 from server_controller import ServerControllerSS
-from ..main.bela import Bela, GameState
+from ..main.bela import Bela, GameState, TableCard
 from ..utils.log import Log
 
 
+class Connection:
+
+    """
+    What the server knows about one connected client between its commands.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, client_id: str, nickname: str) -> None:
+        self.address = writer.get_extra_info("peername")
+        self.client_id = client_id
+        self.nickname = nickname
+        # the client is sent events about the lobby until it joins a game and about the game while it plays
+        self.subscriber = Subscriber(writer)
+        self.game_name: Optional[str] = None
+        self.entered_game: Optional[Bela] = None
+        self.joined_game = False
+        self.player_id = 0
+
+
 class Server:
 
+    """
+    Game server. All connections are served by coroutines on one event loop, so the games and the
+    lobby are only ever changed by one handler at a time. Handlers of a game command hold the lock of
+    the game, which keeps it consistent while a bot move is searched in a worker thread.
+    """
+
     def __init__(self):
         Log.clear()
 
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((socket.gethostname(), 22222))
+        self.host = socket.gethostname()
+        self.port = 22222
 
-        self.socket.listen()
-
-        self.buffer = 4096
-
-        self.games = {}
+        self.games: dict[str, Bela] = {}
         self.clients = []
         self.admins = {}
+        self.game_locks: dict[str, asyncio.Lock] = {}
+        self.bots: dict[str, ISMCTSPolicy] = {}
+
+        self.lobby = VersionedFields(LOBBY_STATE)
+        self.game_fields: dict[str, VersionedFields] = {}
+        self.hub = Hub()
 
         self.current_client = -1
 
-        Log.i("SERVER", f"Started on port {22222}")
+        Log.i("SERVER", f"Started on port {self.port}")
 
         self.server_controller = None
         self.server_controller_activated = Log.input("SERVER", f"Activate server control (Y/N): ").upper() == "Y"
         if self.server_controller_activated:
-            self.server_controller_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_controller_socket.bind((socket.gethostname(), 22223))
-            self.server_controller_socket.listen()
             self.server_controller = ServerControllerSS(self)
-
-            start_new_thread(self.server_controller.run, ())
             Log.i("SERVER", "Activating server control...")
 
-        while True:
-
-            connection, address = self.socket.accept()
-            Log.i("SERVER", "Client connected from " + str(address))
+        asyncio.run(self.run())
 
-            self.clients.append(address)
-            self.current_client += 1
+    async def run(self) -> None:
+        server = await asyncio.start_server(self.client, self.host, self.port)
+        if self.server_controller is not None:
+            await asyncio.start_server(self.server_controller.client, self.host, 22223)
 
-            start_new_thread(self.client, (connection, address))
+        async with server:
+            await server.serve_forever()
 
-    def client(self, connection, address):
-        client_id = "#" + "".join(random.choices(string.ascii_letters + string.digits, k=6))
-
-        connection.send(pickle.dumps(client_id))
-
-        nickname = f"Player {self.current_client+1}"
-        connection.send(pickle.dumps(nickname))
-
-        game_name = None
-        last_game_name = None
-        player_id = 0
-
-        while True:
-            try:
-                entered_game = None
-                joined_game = False
-                while not joined_game:
-                    try:
-                        data = pickle.loads(connection.recv(self.buffer))
-
-                        if last_game_name in self.games:
-                            self.games[last_game_name].players_ready[player_id] = True
-                            if all(self.games[last_game_name].players_ready):
-                                self.games.pop(last_game_name)
-                                self.admins.pop(last_game_name)
-                                last_game_name = None
-
-                        response = {"games": self.games, "admins": self.admins, "error": None, "nickname": nickname}
-
-                        if Commands.equals(data, Commands.CREATE_GAME):
-                            game_data = data.data[0]
-                            if game_data.name in self.games:
-                                response["error"] = f"Igra {game_data.name} već postoji"
-                            else:
-                                self.games[game_data.name] = Bela(game_data.max_points, game_data.team_names)
-                                self.admins[game_data.name] = client_id
-
-                        elif Commands.equals(data, Commands.REMOVE_GAME):
-                            idx = data.data[0]
-                            if idx >= len(self.games):
-                                response["error"] = f"Igra ne postoji"
-                            else:
-                                game_name = ""
-                                for i, (name, _) in enumerate(sorted(self.games.items(), key=lambda g: g[1].start_time)):
-                                    if idx == i:
-                                        game_name = name
-
-                                self.games.pop(game_name)
-                                self.admins.pop(game_name)
-
-                        elif Commands.equals(data, Commands.ENTER_GAME):
-                            game_name = data.data[0]
-                            g = self.games[game_name]
-                            entered_game = g
-                            if not g.add_player(nickname, 0):
-                                if not g.add_player(nickname, 1):
-                                    response["error"] = f"Igra {game_name} je već popunjena"
-                                    entered_game = None
-
-                        elif Commands.equals(data, Commands.CHANGE_NICKNAME):
-                            nickname = data.data[0]
-
-                        elif Commands.equals(data, Commands.DISCONNECT):
-                            Log.i("SERVER", f"Client {address} disconnected...")
-                            connection.sendall(pickle.dumps("OK"))
-                            connection.close()
-                            self.clients.pop(self.clients.index(address))
-                            return
-
-                        if entered_game and entered_game.is_full() and Commands.equals(data, Commands.GET):
-                            joined_game = True
-                            response["start_game"] = True
-                            response["game"] = self.games[game_name]
-                            response["data"] = {}
-                            player_id = self.games[game_name].player_data.index(nickname)
-
-                        connection.sendall(pickle.dumps(response))
-
-                    except (socket.error, EOFError, ):
-                        Log.e("SERVER", f"Client {address} disconnected...")
-                        self.clients.pop(self.clients.index(address))
-                        break
-
-                while True:
-
-                    try:
-                        if game_name not in self.games:
-                            break
-
-                        data = pickle.loads(connection.recv(self.buffer))
-
-                        game = self.games[game_name]
-                        game.set_nickname(player_id, nickname)
-
-                        response = {"game": None, "games": self.games, "admins": self.admins, "error": None, "nickname": nickname, "data": {}}
-
-                        # Check commands
-
-                        if Commands.equals(data, Commands.PLAY_CARD):
-                            if game.get_current_game_state() != GameState.IGRA or game.player_turn != player_id:
-                                passed = False
-                            else:
-                                passed = game.inspect_played_card(data.data[0].card, player_id)
-
-                            response["data"]["passed"] = passed
-                            if passed:
-                                game.add_card_to_table(data.data[0], player_id)
-                                game.cards[player_id].remove(data.data[0].card)
-
-                        if Commands.equals(data, Commands.SWAP_CARDS):
-                            game.swap_cards_for_player(player_id, data.data[0])
-
-                        if Commands.equals(data, Commands.SORT_CARDS):
-                            game.sort_player_cards(player_id)
-
-                        if Commands.equals(data, Commands.CALL_ADUT):
-                            game.set_adut(data.data[0])
-                            game.adut_caller = player_id
-                            game.next_game_state()
-
-                        if Commands.equals(data, Commands.DALJE):
-                            game.count_dalje += 1
-                            game.dalje[player_id] = True
-                            game.next_turn()
-
-                        if Commands.equals(data, Commands.ZVANJE):
-                            game.add_zvanja(data.data[0], player_id)
-                            game.zvanje_over[player_id][0] = True
-                            if all(map(lambda x: x[0], game.zvanje_over)):
-                                game.calculate_zvanja()
-
-                        if Commands.equals(data, Commands.ZVANJE_GOTOVO):
-                            game.zvanje_over[player_id][0] = True
-                            game.zvanje_over[player_id][1] = True
-                            if all(map(lambda x: x[1], game.zvanje_over)) and game.get_current_game_state() is GameState.ZVANJA:
-                                game.next_game_state()
-
-                        if Commands.equals(data, Commands.CALLED_BELA):
-                            game.called_bela = True
-                            game.player_called_bela = player_id
-
-                        if Commands.equals(data, Commands.END_TURN):
-                            game.end_turn(player_id)
-
-                        if Commands.equals(data, Commands.END_GAME):
-                            game.end_game(player_id)
-
-                        if Commands.equals(data, Commands.CLOSE_GAME):
-                            game.player_leave(player_id)
-
-                        self.games[game_name] = game
+    async def client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        address = writer.get_extra_info("peername")
+        Log.i("SERVER", "Client connected from " + str(address))
 
-                        response["game"] = game
+        self.clients.append(address)
+        self.current_client += 1
 
-                        connection.sendall(pickle.dumps(response))
-
-                        if not any(game.players):
-                            last_game_name = game_name
-                            break
-
-                    except (socket.error, EOFError, ):
-                        Log.i("SERVER", f"Player {player_id} from game {game_name} disconnected.")
-                        if game_name in self.games:
-                            self.games.pop(game_name)
-                        break
-
-            except (socket.error, EOFError,):
-                Log.e("SERVER", f"Client {address} disconnected...")
-                self.clients.pop(self.clients.index(address))
-                break
-
-        connection.close()
+        client_id = "#" + "".join(random.choices(string.ascii_letters + string.digits, k=6))
+        connection = Connection(writer, client_id, f"Player {self.current_client+1}")
+
+        write_message(writer, client_id)
+        write_message(writer, connection.nickname)
+        self.hub.subscribe_lobby(connection.subscriber)
+
+        try:
+            while True:
+                # clients only ever send commands, any other message drops the connection
+                data = await read_message(reader, Command)
+
+                if connection.joined_game:
+                    await self.game_command(connection, data)
+                elif not await self.lobby_command(connection, data):
+                    break
+
+                await writer.drain()
+
+        except (socket.error, EOFError, ):
+            Log.e("SERVER", f"Client {address} disconnected...")
+        except Exception as e:
+            Log.e("SERVER", f"Client {address} dropped after an error: {e!r}")
+        finally:
+            await self.disconnect(connection)
+            writer.close()
+
+    async def lobby_command(self, connection: Connection, data: Command) -> bool:
+        """Handles a command of a client that isn't in a game. Returns False when the client disconnects."""
+        subscriber = connection.subscriber
+        response: dict[str, Any] = {"error": None, "nickname": connection.nickname}
+
+        if Commands.equals(data, Commands.CREATE_GAME):
+            game_data = data.data[0]
+            if game_data.name in self.games:
+                response["error"] = f"Igra {game_data.name} već postoji"
+            else:
+                self.games[game_data.name] = Bela(game_data.max_points, game_data.team_names)
+                self.admins[game_data.name] = connection.client_id
+
+        elif Commands.equals(data, Commands.REMOVE_GAME):
+            idx = data.data[0]
+            if idx >= len(self.games):
+                response["error"] = f"Igra ne postoji"
+            else:
+                game_name = sorted(self.games.items(), key=lambda g: g[1].start_time)[idx][0]
+                async with self.game_lock(game_name):
+                    self.remove_game(game_name)
+
+        elif Commands.equals(data, Commands.ENTER_GAME):
+            game_name = data.data[0]
+            g = self.games.get(game_name)
+            connection.game_name = game_name
+            connection.entered_game = g
+            if g is None:
+                response["error"] = f"Igra ne postoji"
+            elif not g.add_player(connection.nickname, 0):
+                if not g.add_player(connection.nickname, 1):
+                    response["error"] = f"Igra {game_name} je već popunjena"
+                    connection.entered_game = None
+            if connection.entered_game:
+                self.hub.subscribe_game(game_name, subscriber)
+
+        elif Commands.equals(data, Commands.CHANGE_NICKNAME):
+            connection.nickname = data.data[0]
+
+        elif Commands.equals(data, Commands.DISCONNECT):
+            Log.i("SERVER", f"Client {connection.address} disconnected...")
+            subscriber.send("OK")
+            return False
+
+        lobby_changed = self.update_lobby()
+
+        game_name = connection.game_name
+        entered_game = connection.entered_game
+        if entered_game and entered_game.is_full() and Commands.equals(data, Commands.GET):
+            connection.joined_game = True
+            connection.player_id = entered_game.player_data.index(connection.nickname)
+            response["start_game"] = True
+            response["data"] = {}
+            self.hub.unsubscribe_lobby(subscriber)
+            subscriber.reset_game()
+            subscriber.send(response, self.lobby, self.game_state(game_name))
+        else:
+            subscriber.send(response, self.lobby)
+
+        if lobby_changed:
+            self.hub.publish_lobby(self.lobby, exclude=subscriber)
+        if Commands.equals(data, Commands.ENTER_GAME) and entered_game and entered_game.is_full():
+            # every player that entered the game, this one included, joins it with a GET
+            self.hub.publish_game(game_name, Events.START_GAME)
+        return True
+
+    async def game_command(self, connection: Connection, data: Command) -> None:
+        """Handles a command of a client that plays in a game."""
+        subscriber = connection.subscriber
+        game_name = connection.game_name
+
+        async with self.game_lock(game_name):
+            game = self.games.get(game_name)
+            if game is None or game is not connection.entered_game:
+                # the game was removed while the client waited, it gets the lobby instead
+                connection.joined_game = False
+                connection.entered_game = None
+                self.hub.subscribe_lobby(subscriber)
+                subscriber.send({"error": None, "nickname": connection.nickname, "data": {}}, self.lobby)
+                return
+            game.set_nickname(connection.player_id, connection.nickname)
+
+            response = {"game": None, "error": None, "nickname": connection.nickname, "data": {}}
+
+            # Check commands
+
+            if Commands.equals(data, Commands.PLAY_CARD):
+                if game.get_current_game_state() != GameState.IGRA or game.player_turn != connection.player_id:
+                    passed = False
+                else:
+                    passed = game.inspect_played_card(data.data[0].card, connection.player_id)
+
+                response["data"]["passed"] = passed
+                if passed:
+                    game.add_card_to_table(data.data[0], connection.player_id)
+                    game.cards[connection.player_id].remove(data.data[0].card)
+
+            if Commands.equals(data, Commands.AUTO_PLAY):
+                passed = game.get_current_game_state() == GameState.IGRA and \
+                    game.player_turn == connection.player_id and game.auto_play[connection.player_id]
+                response["data"]["passed"] = passed
+                if passed:
+                    # the search runs in a worker thread, the game stays locked until it's done
+                    card = await asyncio.get_running_loop().run_in_executor(
+                        None, self.game_bot(game_name).play_card, game, connection.player_id
+                    )
+                    # the client sends where its cards lie, a card it didn't send is dropped at the default position
+                    table_cards = data.data[0] if isinstance(data.data[0], list) else []
+                    table_card = next(
+                        (c for c in table_cards if isinstance(c, TableCard) and c.card == card), TableCard(card)
+                    )
+                    game.add_card_to_table(table_card, connection.player_id)
+                    game.cards[connection.player_id].remove(card)
+                    response["data"]["card"] = card
+
+            if Commands.equals(data, Commands.SWAP_CARDS):
+                game.swap_cards_for_player(connection.player_id, data.data[0])
+
+            if Commands.equals(data, Commands.SORT_CARDS):
+                game.sort_player_cards(connection.player_id)
+
+            if Commands.equals(data, Commands.CALL_ADUT):
+                game.set_adut(data.data[0])
+                game.adut_caller = connection.player_id
+                game.next_game_state()
+
+            if Commands.equals(data, Commands.DALJE):
+                game.count_dalje += 1
+                game.dalje[connection.player_id] = True
+                game.next_turn()
+
+            if Commands.equals(data, Commands.ZVANJE):
+                game.add_zvanja(data.data[0], connection.player_id)
+                game.zvanje_over[connection.player_id][0] = True
+                if all(map(lambda x: x[0], game.zvanje_over)):
+                    game.calculate_zvanja()
+
+            if Commands.equals(data, Commands.ZVANJE_GOTOVO):
+                game.zvanje_over[connection.player_id][0] = True
+                game.zvanje_over[connection.player_id][1] = True
+                if all(map(lambda x: x[1], game.zvanje_over)) and game.get_current_game_state() is GameState.ZVANJA:
+                    game.next_game_state()
+
+            if Commands.equals(data, Commands.CALLED_BELA):
+                game.called_bela = True
+                game.player_called_bela = connection.player_id
+
+            if Commands.equals(data, Commands.END_TURN):
+                game.end_turn(connection.player_id)
+
+            if Commands.equals(data, Commands.END_GAME):
+                game.end_game(connection.player_id)
+
+            if Commands.equals(data, Commands.CLOSE_GAME):
+                game.player_leave(connection.player_id)
+
+            fields = self.game_state(game_name)
+            version = fields.version
+            changed = not Commands.equals(data, Commands.GET) and \
+                fields.update(game.__getstate__()) != version
+
+            left = game.players[connection.player_id] is None
+            if left:
+                connection.joined_game = False
+                connection.entered_game = None
+                self.hub.unsubscribe_game(game_name, subscriber)
+                self.hub.subscribe_lobby(subscriber)
+                game.players_ready[connection.player_id] = True
+                if all(game.players_ready):
+                    self.remove_game(game_name)
+                lobby_changed = self.update_lobby()
+                subscriber.send(response, self.lobby, fields)
+                if lobby_changed:
+                    self.hub.publish_lobby(self.lobby, exclude=subscriber)
+            else:
+                subscriber.send(response, game=fields)
+
+            if changed:
+                self.hub.publish_game(
+                    game_name, COMMAND_EVENTS.get(data.name, Events.GAME_CHANGED), fields, exclude=subscriber
+                )
+
+    async def disconnect(self, connection: Connection) -> None:
+        """Forgets a client that disconnected. A game it played in can't go on without it, so it's removed."""
+        if connection.joined_game:
+            Log.i("SERVER", f"Player {connection.player_id} from game {connection.game_name} disconnected.")
+            async with self.game_lock(connection.game_name):
+                if self.games.get(connection.game_name) is connection.entered_game:
+                    self.remove_game(connection.game_name)
+        self.clients.remove(connection.address)
+        self.hub.unsubscribe(connection.subscriber)
+        if self.update_lobby():
+            self.hub.publish_lobby(self.lobby)
+
+    def game_lock(self, game_name: str) -> asyncio.Lock:
+        """Lock of the game, kept until the game is removed. A name without a game gets a lock that isn't kept."""
+        lock = self.game_locks.get(game_name)
+        if lock is None:
+            lock = asyncio.Lock()
+            if game_name in self.games:
+                self.game_locks[game_name] = lock
+        return lock
+
+    def game_bot(self, game_name: str) -> ISMCTSPolicy:
+        """Auto play bot of the game. Every move rewrites the search tree of a bot, so games don't share one."""
+        bot = self.bots.get(game_name)
+        if bot is None:
+            bot = self.bots[game_name] = ISMCTSPolicy(time_budget=0.5)
+        return bot
+
+    def remove_game(self, game_name: str) -> None:
+        self.games.pop(game_name, None)
+        self.admins.pop(game_name, None)
+        self.game_fields.pop(game_name, None)
+        self.game_locks.pop(game_name, None)
+        bot = self.bots.pop(game_name, None)
+        if bot is not None:
+            bot.close()
+        self.hub.remove_game(game_name)
+
+    def update_lobby(self) -> bool:
+        """Brings the lobby state up to date with the games and returns whether it changed."""
+        version = self.lobby.version
+        return self.lobby.update({
+            name: GameInfo.from_bela(game, self.admins.get(name)) for name, game in list(self.games.items())
+        }) != version
+
+    def game_state(self, game_name: str) -> VersionedFields:
+        """Versioned fields of the game, created when the first client joins it."""
+        fields = self.game_fields.get(game_name)
+        if fields is None:
+            fields = self.game_fields.setdefault(game_name, VersionedFields(GAME_STATE))
+            fields.update(self.games[game_name].__getstate__())
+        return fields
+
+    def sync_games(self) -> None:
+        """Picks up changes made to the games outside of the client commands and pushes them to the players."""
+        for game_name, fields in list(self.game_fields.items()):
+            if game_name in self.games:
+                version = fields.version
+                if fields.update(self.games[game_name].__getstate__()) != version:
+                    self.hub.publish_game(game_name, Events.GAME_CHANGED, fields)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+"""
+Versioned state sync between the server and the clients.
+
+The server keeps the state it shares (the lobby and every game) as named fields with a version. A
+field that changed gets the new version, so a response only carries the fields that changed since
+the version the client already has. The client applies the deltas to its own copies of the lobby
+and of its game, which look to the rest of the client just like the full objects used to. How the
+fields are encoded is up to the codec the state is created with, see wire.State.
+"""
+
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional, Tuple
+
+from bela.game.main.bela import Bela
+
+
+@dataclass
+class Delta:
+
+    """
+    Fields of a versioned state that changed since some version and the fields that were removed.
+    On the server the fields are still encoded, the client gets them decoded. A full delta has every
+    field and replaces whatever the client had.
+    """
+
+    source: int
+    version: int
+    full: bool
+    fields: dict[str, Any] = field(default_factory=dict)
+    removed: list[str] = field(default_factory=list)
+
+
+@dataclass
+class GameInfo:
+
+    """
+    What the lobby shows about a game, sent instead of the whole game.
+    """
+
+    start_time: float
+    teams: Tuple[str, str]
+    player_data: list[Optional[str]]
+    admin: Optional[str]
+
+    @classmethod
+    def from_bela(cls, game: Bela, admin: Optional[str]) -> "GameInfo":
+        return cls(game.start_time, game.teams, game.player_data[:], admin)
+
+
+class VersionedFields:
+
+    """
+    Server side versioned state. update compares the encoded value of every field with the one it
+    saw last and gives the changed fields a new version. The values are kept encoded, so a field is
+    encoded once per change and not once for every client that asks for it. Every instance has its
+    own source id, so a client that knows the version of another state (like a game that was
+    removed and created again under the same name) gets a full delta instead of a wrong one.
+    """
+
+    _sources = itertools.count(1)
+
+    def __init__(self, codec: Any) -> None:
+        self.codec = codec
+        self.source = next(self._sources)
+        self.version = 0
+        self.values: dict[str, bytes] = {}
+        self.changed: dict[str, int] = {}
+        self.removed: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def update(self, fields: dict[str, Any]) -> int:
+        with self.lock:
+            version = self.version + 1
+            changed = False
+            for name, value in fields.items():
+                data = self.codec.encode(name, value)
+                if self.values.get(name) != data:
+                    self.values[name] = data
+                    self.changed[name] = version
+                    self.removed.pop(name, None)
+                    changed = True
+            for name in self.values.keys() - fields.keys():
+                del self.values[name]
+                del self.changed[name]
+                self.removed[name] = version
+                changed = True
+
+            if changed:
+                self.version = version
+            return self.version
+
+    def delta(self, source: int = 0, since: int = -1) -> Delta:
+        """
+        Returns what changed after version since of the state with the source id, or everything if
+        the client has nothing yet or has a version of some other state.
+        """
+        with self.lock:
+            if source != self.source or not 0 <= since <= self.version:
+                return Delta(self.source, self.version, True, dict(self.values))
+            return Delta(
+                self.source, self.version, False,
+                {name: data for name, data in self.values.items() if self.changed[name] > since},
+                [name for name, version in self.removed.items() if version > since]
+            )
+
+
+class SyncedState:
+
+    """
+    Client side copies of the lobby and of the game the client plays in. apply takes a server
+    response with deltas and fills in the full games, admins and game entries from the copies,
+    apply_event does the same for the data the client already has when the server pushes a change.
+    """
+
+    def __init__(self) -> None:
+        self.games: dict[str, GameInfo] = {}
+        self.game: Optional[Bela] = None
+
+    def apply(self, response: Any) -> Any:
+        if not isinstance(response, dict):
+            return response
+
+        self.apply_lobby(response.get("lobby"))
+        response["games"] = self.games
+        response["admins"] = {name: info.admin for name, info in self.games.items()}
+
+        if response.get("game") is not None:
+            self.apply_game(response["game"])
+            response["game"] = self.game
+        return response
+
+    def apply_event(self, event: Any, data: dict[str, Any]) -> dict[str, Any]:
+        if event.lobby is not None:
+            self.apply_lobby(event.lobby)
+            data["games"] = self.games
+            data["admins"] = {name: info.admin for name, info in self.games.items()}
+
+        if event.game is not None:
+            self.apply_game(event.game)
+            data["game"] = self.game
+        return data
+
+    def apply_lobby(self, lobby: Optional[Delta]) -> None:
+        if lobby is None:
+            return
+        if lobby.full:
+            self.games = {}
+        self.games.update(lobby.fields)
+        for name in lobby.removed:
+            self.games.pop(name, None)
+
+    def apply_game(self, delta: Delta) -> None:
+        if delta.full or self.game is None:
+            self.game = Bela.__new__(Bela)
+            self.game.__setstate__(dict(delta.fields))
+        else:
+            self.game.__dict__.update(delta.fields)
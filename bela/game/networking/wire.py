@@ -0,0 +1,702 @@
+"""
+Binary encoding of the messages sent between the clients, the server and the server controller.
+
+Messages are encoded from a schema instead of being pickled. A card is one byte (its index in CARDS),
+numbers and table cards are fixed layout structs and the game state is encoded field by field with
+the type the schema gives every field of Bela. Decoding only ever builds the types in the schema, so
+unlike unpickling, a message from a client can't make the server construct arbitrary objects.
+
+Run the module to compare the size and the encode/decode time with pickle on messages from a played
+match:
+
+    python -m bela.game.networking.wire -n 5
+"""
+
+import argparse
+import asyncio
+import pickle
+import random
+import socket
+import struct
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from bela.game.main.bela import Bela, GameData, GameState, Hand, TableCard
+from bela.game.main.cards import CARD_INDEX, CARDS, SUITS
+from bela.game.networking.commands import Command, Event, Events
+from bela.game.networking.framing import DEFAULT_BUFFER, FrameError, read_frame, recv_frame, send_frame, write_frame
+from bela.game.networking.sync import Delta, GameInfo, VersionedFields
+from bela.game.utils.log import Log
+
+
+class MalformedMessage(FrameError):
+
+    """
+    The payload of a frame doesn't decode with the schema.
+    """
+
+
+class Type(ABC):
+
+    """
+    Encoding of one kind of value. pack appends the value to out, unpack reads one from data at
+    offset and returns it together with the offset right after it.
+    """
+
+    @abstractmethod
+    def pack(self, value: Any, out: bytearray) -> None:
+        pass
+
+    @abstractmethod
+    def unpack(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        pass
+
+
+class Scalar(Type):
+
+    def __init__(self, fmt: str) -> None:
+        self.fmt = fmt
+        self.struct = struct.Struct("!" + fmt)
+
+    def pack(self, value: Any, out: bytearray) -> None:
+        out += self.struct.pack(value)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        return self.struct.unpack_from(data, offset)[0], offset + self.struct.size
+
+
+U8 = Scalar("B")
+I8 = Scalar("b")
+U16 = Scalar("H")
+U32 = Scalar("I")
+I32 = Scalar("i")
+I64 = Scalar("q")
+F64 = Scalar("d")
+BOOL = Scalar("?")
+
+
+class String(Type):
+
+    def __init__(self, size: Scalar = U16) -> None:
+        self.size = size
+
+    def pack(self, value: str, out: bytearray) -> None:
+        data = value.encode()
+        self.size.pack(len(data), out)
+        out += data
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[str, int]:
+        size, offset = self.size.unpack(data, offset)
+        end = offset + size
+        if end > len(data):
+            raise MalformedMessage(f"String of {size} bytes runs past the end of the message.")
+        return data[offset:end].decode(), end
+
+
+STRING = String()
+TEXT = String(U32)
+
+
+class Card(Type):
+
+    def pack(self, value: Tuple[str, str], out: bytearray) -> None:
+        out.append(CARD_INDEX[value])
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Tuple[str, str], int]:
+        return CARDS[data[offset]], offset + 1
+
+
+class CardList(Type):
+
+    """
+    List of up to 255 cards, one byte for the length and one for every card.
+    """
+
+    def pack(self, value: list, out: bytearray) -> None:
+        out.append(len(value))
+        out += bytes(map(CARD_INDEX.__getitem__, value))
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[list, int]:
+        end = offset + 1 + data[offset]
+        if end > len(data):
+            raise MalformedMessage("Card list runs past the end of the message.")
+        return [CARDS[i] for i in data[offset + 1:end]], end
+
+
+class SeatCardList(Type):
+
+    """
+    List of up to 255 (seat, card) pairs, two bytes for every pair.
+    """
+
+    def pack(self, value: list, out: bytearray) -> None:
+        out.append(len(value))
+        for seat, card in value:
+            out.append(seat)
+            out.append(CARD_INDEX[card])
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[list, int]:
+        end = offset + 1 + 2 * data[offset]
+        if end > len(data):
+            raise MalformedMessage("Card list runs past the end of the message.")
+        return [(data[i], CARDS[data[i + 1]]) for i in range(offset + 1, end, 2)], end
+
+
+class HandType(Type):
+
+    """
+    Hand as the lengths of its three card lists, their cards and the mask, decoded in one pass.
+    """
+
+    layout = struct.Struct("!BBBI")
+
+    def pack(self, value: Hand, out: bytearray) -> None:
+        out += self.layout.pack(len(value.netalon), len(value.talon), len(value.sve), value.mask)
+        out += bytes(map(CARD_INDEX.__getitem__, value.netalon + value.talon + value.sve))
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Hand, int]:
+        netalon, talon, sve, mask = self.layout.unpack_from(data, offset)
+        start = offset + self.layout.size
+        end = start + netalon + talon + sve
+        if end > len(data):
+            raise MalformedMessage("Hand runs past the end of the message.")
+        cards = [CARDS[i] for i in data[start:end]]
+        return Hand(cards[:netalon], cards[netalon:netalon + talon], cards[netalon + talon:], mask), end
+
+
+CARD = Card()
+CARD_LIST = CardList()
+SEAT_CARD_LIST = SeatCardList()
+
+
+class Choice(Type):
+
+    """
+    One of a fixed tuple of values, sent as its index.
+    """
+
+    def __init__(self, values: Any) -> None:
+        self.values = tuple(values)
+        self.index = {value: i for i, value in enumerate(self.values)}
+
+    def pack(self, value: Any, out: bytearray) -> None:
+        out.append(self.index[value])
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        return self.values[data[offset]], offset + 1
+
+
+class Maybe(Type):
+
+    def __init__(self, type_: Type) -> None:
+        self.type = type_
+
+    def pack(self, value: Any, out: bytearray) -> None:
+        if value is None:
+            out.append(0)
+        else:
+            out.append(1)
+            self.type.pack(value, out)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        if not data[offset]:
+            return None, offset + 1
+        return self.type.unpack(data, offset + 1)
+
+
+class ListOf(Type):
+
+    """
+    List of up to 65535 values. Lists of scalars are packed with one struct per length.
+    """
+
+    def __init__(self, type_: Type) -> None:
+        self.type = type_
+        self.structs: dict[int, struct.Struct] = {}
+
+    def scalars(self, count: int) -> struct.Struct:
+        layout = self.structs.get(count)
+        if layout is None:
+            layout = struct.Struct(f"!H{count}{self.type.fmt}")
+            # the lists in the schema are short, longer ones a client sent aren't worth keeping
+            if count <= 64:
+                self.structs[count] = layout
+        return layout
+
+    def pack(self, value: list, out: bytearray) -> None:
+        if isinstance(self.type, Scalar):
+            out += self.scalars(len(value)).pack(len(value), *value)
+            return
+        U16.pack(len(value), out)
+        pack = self.type.pack
+        for item in value:
+            pack(item, out)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[list, int]:
+        count, = U16.struct.unpack_from(data, offset)
+        if isinstance(self.type, Scalar):
+            layout = self.scalars(count)
+            return list(layout.unpack_from(data, offset)[1:]), offset + layout.size
+        offset += U16.struct.size
+        unpack = self.type.unpack
+        items = []
+        for _ in range(count):
+            item, offset = unpack(data, offset)
+            items.append(item)
+        return items, offset
+
+
+class TupleOf(Type):
+
+    def __init__(self, *types: Type) -> None:
+        self.types = types
+
+    def pack(self, value: tuple, out: bytearray) -> None:
+        if len(value) != len(self.types):
+            raise ValueError(f"Expected {len(self.types)} values, got {len(value)}.")
+        for type_, item in zip(self.types, value):
+            type_.pack(item, out)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[tuple, int]:
+        items = []
+        for type_ in self.types:
+            item, offset = type_.unpack(data, offset)
+            items.append(item)
+        return tuple(items), offset
+
+
+class Record(Type):
+
+    """
+    Dataclass, sent as its fields in the given order.
+    """
+
+    def __init__(self, cls: type, **fields: Type) -> None:
+        self.cls = cls
+        self.fields = list(fields.items())
+
+    def pack(self, value: Any, out: bytearray) -> None:
+        for name, type_ in self.fields:
+            type_.pack(getattr(value, name), out)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        values = []
+        for _, type_ in self.fields:
+            value, offset = type_.unpack(data, offset)
+            values.append(value)
+        return self.cls(*values), offset
+
+
+class Fields(Type):
+
+    """
+    Dict with some of a fixed set of keys, sent as a bit mask of the keys it has followed by
+    their values.
+    """
+
+    def __init__(self, **types: Type) -> None:
+        self.types = list(types.items())
+
+    def pack(self, value: dict, out: bytearray) -> None:
+        mask = 0
+        for i, (name, _) in enumerate(self.types):
+            if name in value:
+                mask |= 1 << i
+        if bin(mask).count("1") != len(value):
+            unknown = value.keys() - {name for name, _ in self.types}
+            raise ValueError(f"Can't encode fields {sorted(unknown)}.")
+
+        U16.pack(mask, out)
+        for i, (name, type_) in enumerate(self.types):
+            if mask >> i & 1:
+                type_.pack(value[name], out)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[dict, int]:
+        mask, offset = U16.unpack(data, offset)
+        value = {}
+        for i, (name, type_) in enumerate(self.types):
+            if mask >> i & 1:
+                value[name], offset = type_.unpack(data, offset)
+        return value, offset
+
+
+class TableCardType(Type):
+
+    """
+    Table card as a fixed 13 byte struct, the card and the float32 position and angle it was
+    dropped at.
+    """
+
+    layout = struct.Struct("!Bfff")
+
+    def pack(self, value: TableCard, out: bytearray) -> None:
+        out += self.layout.pack(CARD_INDEX[value.card], value.x, value.y, value.angle)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[TableCard, int]:
+        card, x, y, angle = self.layout.unpack_from(data, offset)
+        return TableCard(CARDS[card], x, y, angle), offset + self.layout.size
+
+
+TABLE_CARD = TableCardType()
+
+
+class State:
+
+    """
+    Types of the fields of a versioned state, either by field name or one type for every field.
+    It's the codec of VersionedFields, the server encodes every field once per change. Named fields
+    are sent as their index in the schema, fields of a state with one type as strings.
+    """
+
+    def __init__(self, default: Optional[Type] = None, **fields: Type) -> None:
+        self.default = default
+        self.fields = fields
+        self.names = tuple(fields)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    def type_of(self, name: str) -> Type:
+        type_ = self.fields.get(name, self.default)
+        if type_ is None:
+            raise ValueError(f"State has no field {name}.")
+        return type_
+
+    def encode(self, name: str, value: Any) -> bytes:
+        out = bytearray()
+        self.type_of(name).pack(value, out)
+        return bytes(out)
+
+    def pack_name(self, name: str, out: bytearray) -> None:
+        if self.default is None:
+            out.append(self.index[name])
+        else:
+            STRING.pack(name, out)
+
+    def unpack_name(self, data: bytes, offset: int) -> Tuple[str, int]:
+        if self.default is None:
+            return self.names[data[offset]], offset + 1
+        return STRING.unpack(data, offset)
+
+
+class DeltaType(Type):
+
+    """
+    Delta of a versioned state. The server sends the fields as VersionedFields encoded them, the
+    client gets them decoded.
+    """
+
+    header = struct.Struct("!II?H")
+
+    def __init__(self, state: State) -> None:
+        self.state = state
+        self.removed = ListOf(STRING)
+
+    def pack(self, value: Delta, out: bytearray) -> None:
+        out += self.header.pack(value.source, value.version, value.full, len(value.fields))
+        for name, data in value.fields.items():
+            self.state.pack_name(name, out)
+            U32.pack(len(data), out)
+            out += data
+        self.removed.pack(value.removed, out)
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Delta, int]:
+        source, version, full, count = self.header.unpack_from(data, offset)
+        offset += self.header.size
+        fields = {}
+        for _ in range(count):
+            name, offset = self.state.unpack_name(data, offset)
+            size, offset = U32.unpack(data, offset)
+            fields[name], end = self.state.type_of(name).unpack(data, offset)
+            if end != offset + size:
+                raise MalformedMessage(f"Field {name} has {end - offset} bytes instead of {size}.")
+            offset = end
+        removed, offset = self.removed.unpack(data, offset)
+        return Delta(source, version, full, fields, removed), offset
+
+
+class CommandType(Type):
+
+    """
+    Command, sent as its index in the schema and its arguments. Commands without arguments are
+    decoded with data None, just like the ones in Commands.
+    """
+
+    def __init__(self, **args: Optional[Type]) -> None:
+        self.names = tuple(args)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.args = tuple(args.values())
+
+    def pack(self, value: Command, out: bytearray) -> None:
+        index = self.index[value.name]
+        out.append(index)
+        args = self.args[index]
+        if args is not None:
+            args.pack(value.data, out)
+        elif value.data:
+            raise ValueError(f"Command {value.name} takes no arguments.")
+
+    def unpack(self, data: bytes, offset: int) -> Tuple[Command, int]:
+        index = data[offset]
+        name = self.names[index]
+        args = self.args[index]
+        if args is None:
+            return Command(name, None), offset + 1
+        value, offset = args.unpack(data, offset + 1)
+        return Command(name, value), offset
+
+
+NICKNAME = Maybe(STRING)
+SUIT = Choice(SUITS)
+ZVANJE_VALUE = TupleOf(I32, Choice(("s", "v", "belot")))
+
+GAME_DATA = Record(GameData, name=STRING, max_points=I32, team_names=TupleOf(STRING, STRING))
+HAND = HandType()
+GAME_INFO = Record(GameInfo, start_time=F64, teams=TupleOf(STRING, STRING), player_data=ListOf(NICKNAME),
+                   admin=Maybe(STRING))
+
+# every field of Bela.__getstate__
+GAME_STATE = State(
+    max_points=I32,
+    teams=TupleOf(STRING, STRING),
+    start_time=F64,
+    seed=Maybe(I64),
+    player_data=ListOf(NICKNAME),
+    players=ListOf(NICKNAME),
+    players_ready=ListOf(Maybe(BOOL)),
+    player_turn=I8,
+    diler=I8,
+    deck=CARD_LIST,
+    cards=ListOf(HAND),
+    current_state=Choice(GameState),
+    cards_on_table=ListOf(TABLE_CARD),
+    player_cards_on_table=ListOf(Maybe(TABLE_CARD)),
+    played_cards=SEAT_CARD_LIST,
+    adut=Maybe(SUIT),
+    count_dalje=U8,
+    dalje=ListOf(BOOL),
+    zvanja=ListOf(ListOf(CARD_LIST)),
+    zvanja_masks=ListOf(U32),
+    zvanje_over=ListOf(ListOf(BOOL)),
+    final_zvanja=ListOf(ListOf(ZVANJE_VALUE)),
+    zvanja_points=ListOf(I32),
+    points=ListOf(Maybe(I32)),
+    stihovi=ListOf(ListOf(CARD_LIST)),
+    turn_just_ended=BOOL,
+    current_turn_winner=I8,
+    ready_to_end_turn=ListOf(BOOL),
+    ready_to_end_game=ListOf(BOOL),
+    current_game_over=BOOL,
+    current_match_over=BOOL,
+    ended_last_turn=BOOL,
+    games=ListOf(ListOf(Maybe(I32))),
+    called_bela=BOOL,
+    player_called_bela=I8,
+    adut_caller=I8,
+    called_belot=BOOL,
+    auto_play=ListOf(BOOL),
+)
+LOBBY_STATE = State(GAME_INFO)
+
+COMMAND = CommandType(
+    GET=None,
+    CREATE_GAME=TupleOf(GAME_DATA),
+    REMOVE_GAME=TupleOf(U16),
+    ENTER_GAME=TupleOf(STRING),
+    CHANGE_NICKNAME=TupleOf(STRING),
+    READY_UP=None,
+    SORT_CARDS=None,
+    PLAY_CARD=TupleOf(TABLE_CARD),
+    AUTO_PLAY=TupleOf(ListOf(TABLE_CARD)),
+    SWAP_CARDS=TupleOf(TupleOf(U8, U8)),
+    CALL_ADUT=TupleOf(SUIT),
+    DALJE=None,
+    ZVANJE=TupleOf(CARD_LIST),
+    ZVANJE_GOTOVO=None,
+    CALLED_BELA=None,
+    END_TURN=None,
+    END_GAME=None,
+    END_MATCH=None,
+    CLOSE_GAME=None,
+    DISCONNECT=None,
+)
+RESPONSE = Fields(
+    error=Maybe(STRING),
+    nickname=STRING,
+    lobby=DeltaType(LOBBY_STATE),
+    game=Maybe(DeltaType(GAME_STATE)),
+    data=Fields(passed=BOOL, card=CARD),
+    start_game=BOOL,
+)
+EVENT = Record(
+    Event,
+    name=Choice(value for name, value in vars(Events).items() if name.isupper()),
+    lobby=Maybe(DeltaType(LOBBY_STATE)),
+    game=Maybe(DeltaType(GAME_STATE)),
+)
+
+# the first byte of a message says which of these it is, text is used for the greeting and the server controller
+MESSAGES: Tuple[Tuple[type, Type], ...] = ((str, TEXT), (Command, COMMAND), (dict, RESPONSE), (Event, EVENT))
+
+
+def encode(message: Any) -> bytes:
+    for kind, (cls, type_) in enumerate(MESSAGES):
+        if isinstance(message, cls):
+            out = bytearray((kind, ))
+            try:
+                type_.pack(message, out)
+            except (KeyError, TypeError, IndexError, struct.error) as e:
+                raise ValueError(f"Can't encode {message!r}: {e!r}") from e
+            return bytes(out)
+    raise ValueError(f"Can't encode {type(message).__name__} messages.")
+
+
+def decode(data: bytes, *kinds: type) -> Any:
+    """Decodes a message. If kinds are given, a message of any other kind is rejected as malformed."""
+    if kinds and (not data or data[0] >= len(MESSAGES) or MESSAGES[data[0]][0] not in kinds):
+        raise MalformedMessage(f"Message isn't a {' or '.join(kind.__name__ for kind in kinds)}.")
+    try:
+        _, type_ = MESSAGES[data[0]]
+        message, offset = type_.unpack(data, 1)
+    except (KeyError, TypeError, IndexError, ValueError, struct.error) as e:
+        raise MalformedMessage(f"Malformed message: {e!r}") from e
+    if offset != len(data):
+        raise MalformedMessage(f"Message has {len(data) - offset} bytes after its end.")
+    return message
+
+
+def send_message(sock: socket.socket, message: Any) -> None:
+    send_frame(sock, encode(message))
+
+
+def recv_message(sock: socket.socket, buffer: int = DEFAULT_BUFFER) -> Any:
+    return decode(recv_frame(sock, buffer))
+
+
+async def read_message(reader: asyncio.StreamReader, *kinds: type) -> Any:
+    return decode(await read_frame(reader), *kinds)
+
+
+def write_message(writer: asyncio.StreamWriter, message: Any) -> None:
+    write_frame(writer, encode(message))
+
+
+class PickleState:
+
+    """
+    The codec the state fields were sent with before, for the benchmark.
+    """
+
+    @staticmethod
+    def encode(name: str, value: Any) -> bytes:
+        return pickle.dumps(value)
+
+
+@dataclass
+class CodecStats:
+
+    messages: int = 0
+    size: int = 0
+    encode_time: float = 0
+    decode_time: float = 0
+
+
+def sample_messages(matches: int, seed: int) -> dict[str, list[Tuple[Any, Any]]]:
+    """
+    Plays matches between greedy bots and collects the messages a client and the server would send
+    for them, every one as the (pickle path, wire path) pair.
+    """
+    from bela.ai.registry import POLICIES
+    from bela.sim.simulator import Simulator
+
+    rng = random.Random(seed)
+    samples: dict[str, list[Tuple[Any, Any]]] = {"command": [], "response": [], "event": [], "snapshot": []}
+
+    class Recorder(Simulator):
+
+        def play_trick(self, game: Bela) -> None:
+            while not game.turn_just_ended:
+                id_ = game.player_turn
+                card = self.policies[id_].play_card(game, id_)
+                table_card = TableCard(card, rng.randrange(800), rng.randrange(600), rng.uniform(-15, 15))
+                command = Command("PLAY_CARD", (table_card, ))
+                samples["command"].append((command, command))
+
+                game.add_card_to_table(table_card, id_)
+                game.cards[id_].remove(card)
+                state = game.__getstate__()
+                deltas = []
+                for fields, sent in zip(versions, sent_versions):
+                    fields.update(state)
+                    deltas.append(fields.delta(*sent))
+                    sent[:] = deltas[-1].source, deltas[-1].version
+
+                response = {"error": None, "nickname": "Player 1", "data": {"passed": True}}
+                samples["response"].append(({**response, "game": deltas[0]}, {**response, "game": deltas[1]}))
+                samples["event"].append((Event(Events.CARD_PLAYED, game=deltas[0]),
+                                         Event(Events.CARD_PLAYED, game=deltas[1])))
+                samples["snapshot"].append((
+                    {**response, "game": versions[0].delta()}, {**response, "game": versions[1].delta()}
+                ))
+
+            for i in range(4):
+                game.end_turn(i)
+
+    for match in range(matches):
+        versions = (VersionedFields(PickleState()), VersionedFields(GAME_STATE))
+        sent_versions = ([0, -1], [0, -1])
+        policies = [POLICIES["greedy"](seed + 4 * match + i) for i in range(4)]
+        Recorder(policies).play_match(seed + match)
+    return samples
+
+
+def benchmark(matches: int, seed: int) -> dict[str, Tuple[CodecStats, CodecStats]]:
+    """
+    Encodes and decodes the sampled messages both ways. The pickle path also unpickles the delta
+    fields, like the client did before.
+    """
+    def pickle_decode(data: bytes) -> Any:
+        message = pickle.loads(data)
+        delta = message.get("game") if isinstance(message, dict) else getattr(message, "game", None)
+        if delta is not None:
+            delta.fields = {name: pickle.loads(value) for name, value in delta.fields.items()}
+        return message
+
+    results = {}
+    for kind, pairs in sample_messages(matches, seed).items():
+        stats = (CodecStats(), CodecStats())
+        for path, (encoder, decoder) in enumerate(((pickle.dumps, pickle_decode), (encode, decode))):
+            messages = [pair[path] for pair in pairs]
+
+            start = time.perf_counter()
+            encoded = [encoder(message) for message in messages]
+            stats[path].encode_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for data in encoded:
+                decoder(data)
+            stats[path].decode_time = time.perf_counter() - start
+
+            stats[path].messages = len(encoded)
+            stats[path].size = sum(map(len, encoded))
+        results[kind] = stats
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bela.game.networking.wire",
+                                     description="Compare the wire format with pickle.")
+    parser.add_argument("-n", "--matches", type=int, default=5)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for kind, (old, new) in benchmark(args.matches, args.seed).items():
+        n = old.messages
+        Log.i("WIRE", f"{kind}: {n} messages, "
+                      f"pickle {old.size / n:.0f} B, {old.encode_time / n * 1e6:.1f}/{old.decode_time / n * 1e6:.1f} us, "
+                      f"wire {new.size / n:.0f} B, {new.encode_time / n * 1e6:.1f}/{new.decode_time / n * 1e6:.1f} us "
+                      f"(size, encode/decode per message)")
+
+
+if __name__ == "__main__":
+    main()
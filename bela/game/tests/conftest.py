@@ -0,0 +1,2 @@
+# gui_test.py is a pygame window for checking widgets by hand, not a test pytest can run
+collect_ignore = ["gui_test.py"]
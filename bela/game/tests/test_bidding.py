@@ -0,0 +1,65 @@
+import random
+
+from bela.ai.bidding import BiddingTable, build_shard, canonical_key, coarse_key
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, cards_to_mask
+
+
+def mask(*cards: str) -> int:
+    return sum(CARD_BITS[CARD_INDEX[tuple(card.split("-"))]] for card in cards)
+
+
+def random_hands(rng: random.Random, deals: int):
+    for _ in range(deals):
+        deck = list(range(32))
+        rng.shuffle(deck)
+        for i in range(4):
+            yield sum(CARD_BITS[card] for card in deck[6 * i:6 * i + 6])
+
+
+def test_canonical_key_ignores_side_suit_order_and_blank_cards() -> None:
+    # herc is adut, pik and karo swap places and side suit 7, 8 and 9 are interchangeable
+    hand = mask("unter-herc", "9-herc", "kec-pik", "7-pik", "cener-karo", "8-tref")
+    same = mask("unter-herc", "9-herc", "kec-karo", "9-karo", "cener-pik", "7-tref")
+    other = mask("unter-herc", "8-herc", "kec-pik", "7-pik", "cener-karo", "8-tref")
+    assert canonical_key(hand, 0) == canonical_key(same, 0)
+    assert canonical_key(hand, 0) != canonical_key(other, 0)
+
+
+def test_value_prefers_the_exact_entry() -> None:
+    table = BiddingTable(min_samples=2)
+    hand = mask("unter-herc", "9-herc", "kec-pik", "kralj-pik", "cener-karo", "8-tref")
+    # same trump cards and side suit lengths, kecs and ceners, so only the coarse key is shared
+    similar = mask("unter-herc", "9-herc", "kec-pik", "baba-pik", "cener-karo", "8-tref")
+    assert coarse_key(hand, 0) == coarse_key(similar, 0) and canonical_key(hand, 0) != canonical_key(similar, 0)
+
+    table.add(hand, 0, 10)
+    table.add(similar, 0, -50)
+    assert table.value(hand, 0) == -20
+    table.add(hand, 0, 10)
+    assert table.value(hand, 0) == 10
+
+
+def test_exact_level_survives_pruning() -> None:
+    rng = random.Random(0)
+    table = BiddingTable()
+    for hand in random_hands(rng, 20000):
+        for trump in range(4):
+            table.add(hand, trump, 0)
+    table.prune()
+
+    lookups = [(hand, trump) for hand in random_hands(rng, 250) for trump in range(4)]
+    exact = sum(canonical_key(hand, trump) in table.exact for hand, trump in lookups)
+    assert exact > len(lookups) // 4
+
+
+def test_save_and_load(tmp_path) -> None:
+    table = build_shard((1, 10))
+    table.min_samples = 1
+    path = str(tmp_path / "bidding.json")
+    table.save(path)
+    loaded = BiddingTable.load(path)
+    assert loaded.exact == table.exact and loaded.coarse == table.coarse
+
+    hand = [("unter", "herc"), ("9", "herc"), ("kec", "pik"), ("7", "pik"), ("cener", "karo"), ("8", "tref")]
+    assert loaded.scores(hand) == table.scores(hand)
+    assert loaded.value(cards_to_mask(hand), 0) == table.value(cards_to_mask(hand), 0)
@@ -0,0 +1,99 @@
+import random
+from typing import Optional, Tuple
+
+import pytest
+
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, CARDS, NO_TRUMP, SUITS, TRUMP_INDEX, legal_mask, \
+    trick_winner
+
+
+# the string based rules Bela used before the int cards, kept as the reference the tables are checked against
+
+def old_card_value(card: Tuple[str, str], adut: Optional[str]) -> int:
+    if card[0] == "9":
+        return 18 if card[1] == adut else 9
+    if card[0] == "unter":
+        return 19 if card[1] == adut else 12
+    return {"7": 7, "8": 8, "baba": 13, "kralj": 14, "cener": 15, "kec": 16}[card[0]]
+
+
+def old_strongest_card(cards: list[Tuple[str, str]], adut: Optional[str]) -> Tuple[str, str]:
+    data = [[card, old_card_value(card, adut), card[1] == adut, cards[0][1] == card[1]] for card in cards]
+    return sorted(data, key=lambda c: c[1] + c[2] * 1000 + c[3] * 100, reverse=True)[0][0]
+
+
+def old_is_card_greater(c1: Tuple[str, str], c2: Tuple[str, str], adut: Optional[str]) -> bool:
+    if c1[1] != c2[1]:
+        return True
+    return old_card_value(c1, adut) > old_card_value(c2, adut)
+
+
+def old_inspect_played_card(card: Tuple[str, str], hand: list[Tuple[str, str]], table: list[Tuple[str, str]],
+                            adut: Optional[str]) -> bool:
+    if not table:
+        return True
+
+    def has_higher(strongest: Tuple[str, str]) -> bool:
+        return any(old_is_card_greater(c, strongest, adut) for c in hand if c[1] == strongest[1])
+
+    first_card = table[0]
+    strongest_card = old_strongest_card(table, adut)
+
+    if card[1] != first_card[1]:
+        if any(c[1] == first_card[1] for c in hand):
+            return False
+        if card[1] != adut and any(c[1] == adut for c in hand):
+            return False
+        if card[1] == adut and strongest_card[1] == adut and old_is_card_greater(strongest_card, card, adut):
+            return not has_higher(strongest_card)
+    elif old_is_card_greater(card, strongest_card, adut):
+        return True
+    else:
+        return not has_higher(strongest_card)
+    return True
+
+
+def random_tricks(count: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        adut = rng.choice(SUITS + (None, ))
+        deck = list(CARDS)
+        rng.shuffle(deck)
+        table = deck[:rng.randrange(4)]
+        hand = deck[4:4 + rng.randint(1, 8)]
+        yield adut, table, hand
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_trick_winner_matches_old_rules(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(5000):
+        adut = rng.choice(SUITS + (None, ))
+        trick = rng.sample(CARDS, 4)
+        winner = trick_winner([CARD_INDEX[card] for card in trick], TRUMP_INDEX[adut])
+        assert trick[winner] == old_strongest_card(trick, adut), (adut, trick)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_legal_mask_matches_old_rules(seed: int) -> None:
+    for adut, table, hand in random_tricks(2000, seed):
+        hand_mask = sum(CARD_BITS[CARD_INDEX[card]] for card in hand)
+        legal = legal_mask(hand_mask, [CARD_INDEX[card] for card in table], TRUMP_INDEX[adut])
+        for card in hand:
+            expected = old_inspect_played_card(card, hand, table, adut)
+            assert bool(legal & CARD_BITS[CARD_INDEX[card]]) == expected, (adut, table, hand, card)
+
+
+def test_legal_mask_is_never_empty() -> None:
+    for adut, table, hand in random_tricks(2000, 99):
+        hand_mask = sum(CARD_BITS[CARD_INDEX[card]] for card in hand)
+        legal = legal_mask(hand_mask, [CARD_INDEX[card] for card in table], TRUMP_INDEX[adut])
+        assert legal and legal & ~hand_mask == 0
+
+
+def test_no_trump_only_follows_suit() -> None:
+    herc = [CARD_INDEX[(value, "herc")] for value in ("7", "kec")]
+    pik = CARD_INDEX[("9", "pik")]
+    hand = CARD_BITS[herc[0]] | CARD_BITS[pik]
+    assert legal_mask(hand, [herc[1]], NO_TRUMP) == CARD_BITS[herc[0]]
+    assert legal_mask(CARD_BITS[pik], [herc[1]], NO_TRUMP) == CARD_BITS[pik]
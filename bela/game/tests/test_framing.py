@@ -0,0 +1,94 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from bela.game.networking.framing import HEADER, MAX_FRAME, FrameError, read_frame, recv_frame, send_frame, write_frame
+
+
+@pytest.fixture
+def pair():
+    a, b = socket.socketpair()
+    yield a, b
+    a.close()
+    b.close()
+
+
+def test_back_to_back_frames_come_out_whole(pair) -> None:
+    a, b = pair
+    payloads = [b"", b"x", bytes(range(256)) * 10, b"last"]
+    for payload in payloads:
+        send_frame(a, payload)
+    assert [recv_frame(b, buffer=7) for _ in payloads] == payloads
+
+
+def test_frame_split_across_sends(pair) -> None:
+    a, b = pair
+    data = HEADER.pack(5) + b"hello" + HEADER.pack(2) + b"ok"
+    for i in range(len(data)):
+        a.sendall(data[i:i + 1])
+    assert recv_frame(b) == b"hello"
+    assert recv_frame(b) == b"ok"
+
+
+def test_frame_larger_than_the_socket_buffers(pair) -> None:
+    a, b = pair
+    payload = bytes(range(256)) * 16 * 1024
+    sender = threading.Thread(target=send_frame, args=(a, payload))
+    sender.start()
+    assert recv_frame(b, buffer=1024) == payload
+    sender.join()
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00\x00", HEADER.pack(10) + b"short"])
+def test_closing_mid_frame_raises_eof(pair, data: bytes) -> None:
+    a, b = pair
+    a.sendall(data)
+    a.close()
+    with pytest.raises(EOFError):
+        recv_frame(b)
+
+
+def test_oversized_frames_are_rejected(pair) -> None:
+    a, b = pair
+    a.sendall(HEADER.pack(MAX_FRAME + 1))
+    with pytest.raises(FrameError):
+        recv_frame(b)
+    assert issubclass(FrameError, socket.error)
+
+
+def test_read_frame_reads_whole_frames() -> None:
+    async def read() -> None:
+        reader = asyncio.StreamReader()
+        reader.feed_data(HEADER.pack(5) + b"hel")
+        reader.feed_data(b"lo" + HEADER.pack(0) + HEADER.pack(MAX_FRAME + 1))
+        assert await read_frame(reader) == b"hello"
+        assert await read_frame(reader) == b""
+        with pytest.raises(FrameError):
+            await read_frame(reader)
+
+        reader = asyncio.StreamReader()
+        reader.feed_data(HEADER.pack(10) + b"short")
+        reader.feed_eof()
+        with pytest.raises(EOFError):
+            await read_frame(reader)
+
+    asyncio.run(read())
+
+
+def test_write_frame_round_trips_through_a_stream(pair) -> None:
+    async def round_trip() -> list[bytes]:
+        a, b = pair
+        _, writer = await asyncio.open_connection(sock=a)
+        reader, other = await asyncio.open_connection(sock=b)
+        for payload in (b"one", b"", b"three"):
+            write_frame(writer, payload)
+        await writer.drain()
+        frames = [await read_frame(reader) for _ in range(3)]
+        for stream in (writer, other):
+            stream.close()
+            await stream.wait_closed()
+        return frames
+
+    assert asyncio.run(round_trip()) == [b"one", b"", b"three"]
@@ -0,0 +1,22 @@
+import multiprocessing
+
+from bela.ai.ismcts import ParallelISMCTSPolicy
+from bela.ai.policy import RandomPolicy
+from bela.game.main.bela import Bela
+from bela.sim.simulator import Simulator
+
+
+def test_parallel_policy_stops_its_workers() -> None:
+    game = Bela(1001, ("Mi", "Vi"), seed=3)
+    simulator = Simulator([RandomPolicy(i) for i in range(4)])
+    simulator.call_adut(game)
+    simulator.call_zvanja(game)
+
+    with ParallelISMCTSPolicy(seed=1, time_budget=0.05, processes=2) as policy:
+        card = policy.play_card(game, game.player_turn)
+        assert card in game.legal_moves(game.player_turn)
+        workers = multiprocessing.active_children()
+        assert policy.pool is not None and workers
+
+    assert policy.pool is None
+    assert not any(worker.is_alive() for worker in workers)
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from bela.game.main.cards import CARD_BITS, mask_to_ints
+from bela.game.main.position import MutablePosition, Position
+
+
+def random_deal(rng: random.Random) -> Position:
+    deck = list(range(32))
+    rng.shuffle(deck)
+    hands = tuple(sum(CARD_BITS[card] for card in deck[8 * i:8 * i + 8]) for i in range(4))
+    return Position(hands, (), rng.randrange(4), rng.randrange(4))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_play_matches_position(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(50):
+        position = random_deal(rng)
+        mutable = MutablePosition(position)
+        while not position.is_over:
+            assert mutable.legal_moves() == position.legal_moves() and mutable.turn == position.turn
+            card = rng.choice(mask_to_ints(position.legal_moves()))
+            position = position.play(card)
+            mutable.play(card)
+            assert mutable.freeze() == position
+        assert mutable.is_over
+        assert sum(position.points) == 162 and sum(position.tricks) == 8
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_undo_restores_every_position(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(50):
+        mutable = MutablePosition(random_deal(rng))
+        seen = []
+        while not mutable.is_over:
+            seen.append(mutable.freeze())
+            mutable.play(rng.choice(mask_to_ints(mutable.legal_moves())))
+            # a short detour down the tree must leave the position as it was
+            if not mutable.is_over and rng.random() < 0.3:
+                before = mutable.freeze()
+                mutable.play(rng.choice(mask_to_ints(mutable.legal_moves())))
+                mutable.undo()
+                assert mutable.freeze() == before
+        while seen:
+            mutable.undo()
+            assert mutable.freeze() == seen.pop()
+        assert not mutable.history
+
+
+def test_play_rejects_cards_not_in_hand() -> None:
+    position = random_deal(random.Random(1))
+    other = (position.turn + 1) % 4
+    with pytest.raises(ValueError):
+        position.play(mask_to_ints(position.hands[other])[0])
@@ -0,0 +1,89 @@
+import collections
+import itertools
+import random
+
+import pytest
+
+from bela.ai.sampler import DealSampler, infer_exclusions
+from bela.game.main.cards import CARD_BITS, CARD_INDEX, SUIT_MASKS, popcount
+from bela.game.main.position import Position
+
+
+def random_position(rng: random.Random, cards: int) -> Position:
+    deck = list(range(32))
+    rng.shuffle(deck)
+    hands = tuple(sum(CARD_BITS[card] for card in deck[cards * i:cards * (i + 1)]) for i in range(4))
+    return Position(hands, (), rng.randrange(4), rng.randrange(4))
+
+
+def check_sample(sampler: DealSampler, position: Position, id_: int, excluded: list[int], known: list[int],
+                 rng: random.Random) -> Position:
+    sample = sampler.sample(rng)
+    everything = position.hands[0] | position.hands[1] | position.hands[2] | position.hands[3]
+    assert sample.hands[id_] == position.hands[id_]
+    assert sample.hands[0] | sample.hands[1] | sample.hands[2] | sample.hands[3] == everything
+    for p in range(4):
+        assert popcount(sample.hands[p]) == popcount(position.hands[p])
+        assert not sample.hands[p] & excluded[p]
+        assert sample.hands[p] & known[p] == known[p]
+    return sample
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_samples_respect_voids_and_known_cards(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(30):
+        position = random_position(rng, rng.randint(2, 8))
+        id_ = rng.randrange(4)
+        # every player shows he is void in the suits he really doesn't hold, and reveals one of his cards
+        excluded = [sum(mask for mask in SUIT_MASKS if not position.hands[p] & mask) for p in range(4)]
+        known = [CARD_BITS[rng.choice([c for c in range(32) if position.hands[p] & CARD_BITS[c]])]
+                 for p in range(4)]
+        sampler = DealSampler(position, id_, excluded, known)
+        for _ in range(50):
+            check_sample(sampler, position, id_, excluded, known, rng)
+
+
+def consistent_deals(position: Position, id_: int, excluded: list[int]) -> set:
+    others = [p for p in range(4) if p != id_]
+    unknown = [c for c in range(32) if any(position.hands[p] & CARD_BITS[c] for p in others)]
+    deals = set()
+    for owners in itertools.product(others, repeat=len(unknown)):
+        hands = list(position.hands)
+        for p in others:
+            hands[p] = sum(CARD_BITS[card] for card, owner in zip(unknown, owners) if owner == p)
+        if all(popcount(hands[p]) == popcount(position.hands[p]) and not hands[p] & excluded[p] for p in others):
+            deals.add(tuple(hands))
+    return deals
+
+
+def test_samples_are_uniform_over_consistent_deals() -> None:
+    rng = random.Random(5)
+    position = random_position(rng, 2)
+    # player 1 can't hold what player 3 has
+    excluded = [0, position.hands[3], 0, 0]
+    sampler = DealSampler(position, 0, excluded)
+    deals = consistent_deals(position, 0, excluded)
+
+    counts = collections.Counter(check_sample(sampler, position, 0, excluded, [0] * 4, rng).hands
+                                 for _ in range(100 * len(deals)))
+    assert set(counts) == deals
+    assert min(counts.values()) > 50 and max(counts.values()) < 150
+
+
+def test_infer_exclusions_finds_voids() -> None:
+    herc, pik = SUIT_MASKS[0], SUIT_MASKS[1]
+    kec_herc, sedam_herc = CARD_INDEX[("kec", "herc")], CARD_INDEX[("7", "herc")]
+    devet_pik, osam_karo = CARD_INDEX[("9", "pik")], CARD_INDEX[("8", "karo")]
+    # herc is adut, player 2 didn't follow herc and player 3 neither followed nor trumped
+    excluded = infer_exclusions([(0, sedam_herc), (1, kec_herc), (2, devet_pik), (3, osam_karo)], 0)
+    assert excluded[0] == 0
+    assert excluded[2] & herc == herc and not excluded[2] & pik
+    assert excluded[3] & herc == herc
+
+
+def test_rejects_impossible_constraints() -> None:
+    position = random_position(random.Random(2), 3)
+    # nobody but player 0 may hold anything
+    with pytest.raises(ValueError):
+        DealSampler(position, 0, [0, 0xFFFFFFFF, 0xFFFFFFFF, 0xFFFFFFFF])
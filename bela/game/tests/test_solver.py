@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from bela.ai.solver import Solver
+from bela.game.main.cards import CARD_BITS, mask_to_ints
+from bela.game.main.position import Position
+
+
+def exhaustive(position: Position) -> int:
+    """Points team 0 has at the end of the deal, found by trying every line of play."""
+    if position.is_over:
+        return position.points[0]
+    values = [exhaustive(position.play(card)) for card in mask_to_ints(position.legal_moves())]
+    return max(values) if position.turn % 2 == 0 else min(values)
+
+
+def random_endgame(rng: random.Random, tricks: int) -> Position:
+    """Position with the given number of tricks left to play, possibly with a trick in progress."""
+    deck = list(range(32))
+    rng.shuffle(deck)
+    hands = [sum(CARD_BITS[card] for card in deck[tricks * i:tricks * (i + 1)]) for i in range(4)]
+    position = Position(tuple(hands), (), rng.randrange(4), rng.randrange(4))
+    for _ in range(rng.randrange(4)):
+        position = position.play(rng.choice(mask_to_ints(position.legal_moves())))
+    return position
+
+
+@pytest.mark.parametrize("tricks", [1, 2, 3])
+def test_solve_matches_exhaustive_search(tricks: int) -> None:
+    rng = random.Random(tricks)
+    solver = Solver()
+    for _ in range(150):
+        position = random_endgame(rng, tricks)
+        expected = exhaustive(position)
+        points = solver.solve(position)
+        assert points[0] == expected, position
+        assert sum(points) == sum(position.points) + solver.remaining_points(position)
+
+
+@pytest.mark.parametrize("tricks", [2, 3])
+def test_evaluate_moves_matches_exhaustive_search(tricks: int) -> None:
+    rng = random.Random(10 + tricks)
+    solver = Solver()
+    for _ in range(30):
+        position = random_endgame(rng, tricks)
+        team = position.turn % 2
+        total = sum(position.points) + solver.remaining_points(position)
+        for card, value in solver.evaluate_moves(position).items():
+            points = exhaustive(position.play(card))
+            if team == 1:
+                points = total - points
+            assert value == points - position.points[team], (position, card)
+
+
+def test_best_move_is_optimal() -> None:
+    rng = random.Random(20)
+    solver = Solver()
+    for _ in range(30):
+        position = random_endgame(rng, 3)
+        card, _ = solver.best_move(position)
+        after = exhaustive(position.play(card))
+        assert after == exhaustive(position), position
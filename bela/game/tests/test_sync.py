@@ -0,0 +1,106 @@
+from bela.game.main.bela import Bela, TableCard
+from bela.game.networking.sync import Delta, GameInfo, SyncedState, VersionedFields
+from bela.game.networking.wire import GAME_STATE, LOBBY_STATE, decode, encode
+
+
+def send(response: dict) -> dict:
+    """The response as the client gets it."""
+    return decode(encode(response))
+
+
+def lobby_fields() -> VersionedFields:
+    return VersionedFields(LOBBY_STATE)
+
+
+def game_fields() -> VersionedFields:
+    return VersionedFields(GAME_STATE)
+
+
+def info(admin: str) -> GameInfo:
+    return GameInfo(1.5, ("Mi", "Vi"), [admin, None, None, None], admin)
+
+
+def sync_lobby(client: SyncedState, delta: Delta) -> dict:
+    return client.apply(send({"error": None, "nickname": "x", "lobby": delta}))
+
+
+def test_incremental_delta_only_has_what_changed() -> None:
+    lobby = lobby_fields()
+    first = lobby.update({"a": info("ana"), "b": info("ivo")})
+    assert lobby.update({"a": info("ana"), "b": info("ivo")}) == first
+
+    client = SyncedState()
+    response = sync_lobby(client, lobby.delta())
+    assert response["games"] == {"a": info("ana"), "b": info("ivo")}
+    assert response["admins"] == {"a": "ana", "b": "ivo"}
+
+    second = lobby.update({"a": info("ana"), "b": info("eva"), "c": info("luka")})
+    assert second > first
+    delta = lobby.delta(lobby.source, first)
+    assert not delta.full and sorted(delta.fields) == ["b", "c"] and not delta.removed
+    assert lobby.delta(lobby.source, second).fields == {}
+
+    response = sync_lobby(client, delta)
+    assert response["games"] == {"a": info("ana"), "b": info("eva"), "c": info("luka")}
+
+
+def test_removed_fields_are_removed_on_the_client() -> None:
+    lobby = lobby_fields()
+    client = SyncedState()
+    sync_lobby(client, lobby.delta())
+    version = lobby.update({"a": info("ana"), "b": info("ivo")})
+    sync_lobby(client, lobby.delta(lobby.source, 0))
+
+    lobby.update({"b": info("ivo")})
+    delta = lobby.delta(lobby.source, version)
+    assert delta.removed == ["a"] and not delta.fields
+    assert sync_lobby(client, delta)["games"] == {"b": info("ivo")}
+
+    # a field that comes back is sent again and no longer reported removed
+    lobby.update({"a": info("eva"), "b": info("ivo")})
+    delta = lobby.delta(lobby.source, version)
+    assert list(delta.fields) == ["a"] and not delta.removed
+    assert sync_lobby(client, delta)["games"] == {"a": info("eva"), "b": info("ivo")}
+
+
+def test_other_source_or_unknown_version_gets_a_full_delta() -> None:
+    old = lobby_fields()
+    version = old.update({"a": info("ana"), "stale": info("ivo")})
+    client = SyncedState()
+    sync_lobby(client, old.delta())
+
+    # the same name is now backed by another state, the client's version of the old one means nothing
+    new = lobby_fields()
+    new.update({"a": info("eva")})
+    assert new.source != old.source
+    delta = new.delta(old.source, version)
+    assert delta.full and delta.source == new.source
+    assert sync_lobby(client, delta)["games"] == {"a": info("eva")}
+
+    assert new.delta(new.source, new.version + 1).full
+    assert new.delta(new.source, -1).full
+
+
+def test_game_deltas_rebuild_the_game() -> None:
+    game = Bela(1001, ("Mi", "Vi"), seed=5)
+    game.set_adut("herc")
+    fields = game_fields()
+    fields.update(game.__getstate__())
+
+    client = SyncedState()
+    response = client.apply(send({"error": None, "nickname": "x", "game": fields.delta()}))
+    assert response["game"] is client.game and client.game.__getstate__() == game.__getstate__()
+    synced = client.game
+
+    for _ in range(3):
+        sent = (fields.source, fields.version)
+        player = game.player_turn
+        card = game.legal_moves(player)[0]
+        game.add_card_to_table(TableCard(card), player)
+        game.cards[player].remove(card)
+        fields.update(game.__getstate__())
+
+        delta = fields.delta(*sent)
+        assert not delta.full and "cards_on_table" in delta.fields and "teams" not in delta.fields
+        client.apply(send({"error": None, "nickname": "x", "game": delta}))
+        assert client.game is synced and client.game.__getstate__() == game.__getstate__()
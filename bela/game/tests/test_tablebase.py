@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from bela.ai.solver import Solver
+from bela.ai.tablebase import MAX_TRICKS, EndgameBuilder, Tablebase, endgame_key, sample_endgame, write
+from bela.game.main.cards import NO_TRUMP, mask_to_ints
+from bela.game.main.position import Position
+from bela.game.tests.test_solver import exhaustive
+
+
+@pytest.fixture(scope="module")
+def endgames() -> list[Position]:
+    rng = random.Random(7)
+    return [Position(tuple(hands), (), leader, trump)
+            for hands, leader, trump in (sample_endgame(rng, rng.randint(1, MAX_TRICKS)) for _ in range(150))]
+
+
+@pytest.fixture(scope="module")
+def builder(endgames: list[Position]) -> EndgameBuilder:
+    builder = EndgameBuilder()
+    for position in endgames:
+        builder.solve(list(position.hands), [], position.leader, position.trump)
+    return builder
+
+
+@pytest.fixture
+def tablebase(builder: EndgameBuilder, tmp_path) -> Tablebase:
+    path = str(tmp_path / "tablebase.bin")
+    write(builder.values, path)
+    return Tablebase(path)
+
+
+def test_round_trip(builder: EndgameBuilder, tablebase: Tablebase) -> None:
+    assert len(tablebase) == len(builder.values)
+    for key, value in builder.values.items():
+        assert tablebase.get(key) == value
+    assert tablebase.get(max(builder.values) + 1) is None
+
+
+def test_lookup_matches_exhaustive_search(endgames: list[Position], tablebase: Tablebase) -> None:
+    rng = random.Random(3)
+    found = 0
+    for position in endgames:
+        for _ in range(rng.randrange(6)):
+            if position.is_over:
+                break
+            position = position.play(rng.choice(mask_to_ints(position.legal_moves())))
+        value = tablebase.lookup(position)
+        if value is not None:
+            found += 1
+            assert value == exhaustive(position) - position.points[0], position
+    assert found > len(endgames) // 2
+
+
+def test_solver_uses_tablebase(endgames: list[Position], tablebase: Tablebase) -> None:
+    solver = Solver(tablebase=tablebase)
+    for position in endgames:
+        assert solver.solve(position) == Solver().solve(position), position
+    assert tablebase.hits
+
+
+def test_endgame_key_skips_positions_it_cant_store(endgames: list[Position]) -> None:
+    position = endgames[0]
+    assert endgame_key(position.hands, (), position.leader, NO_TRUMP) is None
+    assert endgame_key((0xFF, 0xFF00, 0xFF0000, 0xFF000000), (), 0, 0) is None
+
+
+def test_rejects_other_files(tmp_path) -> None:
+    path = tmp_path / "tablebase.bin"
+    path.write_bytes(b"not a tablebase")
+    with pytest.raises(ValueError):
+        Tablebase(str(path))
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from bela.game.main.bela import Bela, GameData, TableCard
+from bela.game.networking.commands import Command, Commands, Event, Events
+from bela.game.networking.sync import VersionedFields
+from bela.game.networking.wire import GAME_STATE, MalformedMessage, decode, encode
+
+
+COMMANDS = [
+    Commands.GET,
+    Commands.new(Commands.CREATE_GAME, GameData("igra", 1001, ("Mi", "Vi"))),
+    Commands.new(Commands.REMOVE_GAME, 3),
+    Commands.new(Commands.ENTER_GAME, "žuta"),
+    Commands.new(Commands.PLAY_CARD, TableCard(("kec", "tref"), 10.5, 20.25, -1.5)),
+    Commands.new(Commands.AUTO_PLAY, [TableCard(("7", "pik")), TableCard(("9", "karo"), 1, 2, 3)]),
+    Commands.new(Commands.SWAP_CARDS, (2, 5)),
+    Commands.new(Commands.CALL_ADUT, "pik"),
+    Commands.new(Commands.ZVANJE, [("7", "herc"), ("8", "herc"), ("9", "herc")]),
+    Commands.new(Commands.ZVANJE, []),
+    Commands.DALJE,
+    Commands.CLOSE_GAME,
+]
+
+
+def played_game() -> Bela:
+    game = Bela(1001, ("Mi", "Vi"), seed=5)
+    game.set_adut("herc")
+    for _ in range(3):
+        player = game.player_turn
+        card = game.legal_moves(player)[0]
+        game.add_card_to_table(TableCard(card, 100.5, 200.25, 12.5), player)
+        game.cards[player].remove(card)
+    return game
+
+
+def game_response(game: Bela) -> dict:
+    fields = VersionedFields(GAME_STATE)
+    fields.update(game.__getstate__())
+    return {"error": None, "nickname": "Player 1", "data": {"passed": True}, "game": fields.delta()}
+
+
+@pytest.mark.parametrize("command", COMMANDS, ids=lambda command: command.name)
+def test_commands_round_trip(command: Command) -> None:
+    assert decode(encode(command)) == command
+
+
+def test_game_state_round_trips() -> None:
+    game = played_game()
+    response = decode(encode(game_response(game)))
+    assert response["game"].fields == game.__getstate__()
+    assert response["data"] == {"passed": True}
+
+
+def test_text_and_events_round_trip() -> None:
+    for text in ("", "hello", "exec print(1)\n" * 1000):
+        assert decode(encode(text)) == text
+    assert decode(encode(Event(Events.START_GAME))) == Event(Events.START_GAME)
+
+
+@pytest.mark.parametrize("message", [{"zzz": 1}, object(), Command("NOPE", None),
+                                     Commands.new(Commands.CALL_ADUT, "xx")])
+def test_encode_rejects_what_the_schema_doesnt_have(message) -> None:
+    with pytest.raises(ValueError):
+        encode(message)
+
+
+def test_decode_rejects_other_kinds() -> None:
+    assert decode(encode(Commands.GET), Command) == Commands.GET
+    for message in ("hello", {"error": None, "nickname": "x"}, Event(Events.START_GAME)):
+        with pytest.raises(MalformedMessage):
+            decode(encode(message), Command)
+    with pytest.raises(MalformedMessage):
+        decode(b"", Command)
+
+
+def test_decode_rejects_trailing_bytes() -> None:
+    with pytest.raises(MalformedMessage):
+        decode(encode(Commands.GET) + b"\x00")
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_corrupted_messages_only_raise_malformed_message(seed: int) -> None:
+    rng = random.Random(seed)
+    valid = [encode(command) for command in COMMANDS] + \
+        [encode(game_response(played_game())), encode(Event(Events.CARD_PLAYED))]
+    for _ in range(2500):
+        data = bytearray(rng.choice(valid))
+        for _ in range(rng.randrange(1, 4)):
+            operation = rng.randrange(3)
+            if operation == 0 and data:
+                data[rng.randrange(len(data))] = rng.randrange(256)
+            elif operation == 1 and data:
+                del data[rng.randrange(len(data)):]
+            else:
+                data.insert(rng.randrange(len(data) + 1), rng.randrange(256))
+        try:
+            decode(bytes(data))
+        except MalformedMessage:
+            pass
@@ -0,0 +1,37 @@
+from typing import Tuple
+
+import pygame
+
+from bela.game.main.bela import TableCard
+from bela.game.utils.shapes import RotatingRect
+
+
+class Card:
+
+    def __init__(self, card, x, y, angle, rect: RotatingRect, moving: bool = False) -> None:
+        self.card = card
+        self.x = x
+        self.y = y
+        self.angle = angle
+        self.rect = rect
+        self.moving = moving
+        self.def_pos = (x, y)
+
+    def set_pos(self, pos) -> None:
+        self.x, self.y = pos
+
+    def move_back(self) -> None:
+        self.x, self.y = self.def_pos
+
+    def collision_rect(self) -> pygame.Rect:
+        x, y = self.def_pos
+        return pygame.Rect(x - 7, y - 7, 14, 14)
+
+    def get_pos(self) -> Tuple[int, int]:
+        return self.x, self.y
+
+    def to_table_card(self) -> TableCard:
+        return TableCard(self.card, self.x, self.y, self.angle)
+
+    def __repr__(self) -> str:
+        return f"Card({self.card})"
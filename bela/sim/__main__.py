@@ -0,0 +1,68 @@
+import argparse
+
+from bela.ai.registry import POLICIES
+from bela.game.utils.log import Log
+from bela.sim.simulator import benchmark
+from bela.sim.tournament import run_tournament
+
+
+def bench(args: argparse.Namespace) -> None:
+    seed = args.seed
+    policies = [POLICIES[args.teams[i % 2]](None if seed is None else seed + i) for i in range(4)]
+
+    try:
+        stats = benchmark(policies, args.matches, args.points, seed)
+    finally:
+        for policy in policies:
+            policy.close()
+
+    Log.i("SIM", f"{stats.matches} matches, {stats.deals} deals, {stats.tricks} tricks in {stats.duration:.2f}s")
+    Log.i("SIM", f"{stats.deals_per_sec:.1f} deals/sec, {stats.tricks_per_sec:.1f} tricks/sec")
+    Log.i("SIM", f"Wins {stats.wins[0]}:{stats.wins[1]}, "
+                 f"average points {stats.points[0] / stats.matches:.1f}:{stats.points[1] / stats.matches:.1f}")
+
+
+def tournament(args: argparse.Namespace) -> None:
+    result = run_tournament(tuple(args.teams), args.matches, args.seed or 0, args.processes, args.shards,
+                            not args.no_duplicate, args.points)
+
+    a, b = result.policies
+    Log.i("TOURNAMENT", f"{result.matches} matches, {result.deals} deals in {result.duration:.2f}s "
+                        f"({result.deals / result.duration:.1f} deals/sec)")
+    Log.i("TOURNAMENT", f"{a} win rate {result.win_rate * 100:.1f}% ± {result.win_rate_ci * 100:.1f}% against {b}")
+    Log.i("TOURNAMENT", f"Average points {result.avg_points[0]:.1f}:{result.avg_points[1]:.1f}, "
+                        f"difference {result.avg_diff:.1f} ± {result.avg_diff_ci:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bela.sim", description="Headless Bela match simulator.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_common(p: argparse.ArgumentParser) -> None:
+        p.add_argument("-n", "--matches", type=int, default=100)
+        p.add_argument("-p", "--points", type=int, default=1001, help="points needed to win a match")
+        p.add_argument("-t", "--teams", nargs=2, default=["random", "random"], choices=sorted(POLICIES),
+                       help="policy for team 0 (seats 0, 2) and team 1 (seats 1, 3)")
+        p.add_argument("-s", "--seed", type=int, default=None)
+
+    add_common(subparsers.add_parser("bench", help="play matches on one core and report deals/sec"))
+
+    tournament_parser = subparsers.add_parser("tournament", help="play matches over a process pool")
+    add_common(tournament_parser)
+    tournament_parser.add_argument("-j", "--processes", type=int, default=None, help="defaults to cpu count")
+    tournament_parser.add_argument("--shards", type=int, default=None)
+    tournament_parser.add_argument("--no-duplicate", action="store_true",
+                                   help="don't replay every deal sequence with the seats swapped")
+
+    args = parser.parse_args()
+
+    if args.command == "tournament":
+        tournament(args)
+    else:
+        if args.command is None:
+            args = parser.parse_args(["bench"])
+        bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+from bela.ai.policy import Policy
+from bela.game.main.bela import Bela, GameState, TableCard
+
+
+@dataclass
+class MatchResult:
+
+    points: Tuple[int, int]
+    winner: int
+    deals: int
+    tricks: int
+
+
+@dataclass
+class SimulationStats:
+
+    matches: int = 0
+    deals: int = 0
+    tricks: int = 0
+    wins: list = field(default_factory=lambda: [0, 0])
+    points: list = field(default_factory=lambda: [0, 0])
+    duration: float = 0
+
+    def add(self, result: MatchResult) -> None:
+        self.matches += 1
+        self.deals += result.deals
+        self.tricks += result.tricks
+        self.wins[result.winner] += 1
+        self.points[0] += result.points[0]
+        self.points[1] += result.points[1]
+
+    @property
+    def deals_per_sec(self) -> float:
+        return self.deals / self.duration if self.duration else 0
+
+    @property
+    def tricks_per_sec(self) -> float:
+        return self.tricks / self.duration if self.duration else 0
+
+
+class Simulator:
+
+    """
+    Plays full matches between policies directly against the Bela engine, going through the same
+    calls the server makes for every command, just without the client and the network.
+    """
+
+    def __init__(self, policies: list[Policy], max_points: int = 1001,
+                 teams: Tuple[str, str] = ("Mi", "Vi")) -> None:
+        if len(policies) != 4:
+            raise ValueError("Simulator needs a policy for every one of the 4 seats.")
+        self.policies = policies
+        self.max_points = max_points
+        self.teams = teams
+
+    def play_match(self, seed: Optional[int] = None) -> MatchResult:
+        """
+        Plays a match until one team wins. The deals only depend on the seed and not on what the
+        policies do, so two matches with the same seed get the same sequence of deals.
+        """
+        game = Bela(self.max_points, self.teams, seed)
+        deals = tricks = 0
+
+        while True:
+            tricks += self.play_deal(game)
+            deals += 1
+
+            if game.current_match_over:
+                break
+            for i in range(4):
+                game.end_game(i)
+            if game.current_match_over:
+                break
+
+        points = game.get_final_game_score()
+        return MatchResult(points, int(points[1] > points[0]), deals, tricks)
+
+    def play_deal(self, game: Bela) -> int:
+        self.call_adut(game)
+        self.call_zvanja(game)
+        if game.current_match_over:
+            return 0
+
+        tricks = 0
+        while not game.current_game_over:
+            self.play_trick(game)
+            tricks += 1
+        return tricks
+
+    def call_adut(self, game: Bela) -> None:
+        while game.get_current_game_state() is GameState.ZVANJE_ADUTA:
+            id_ = game.player_turn
+            adut = self.policies[id_].call_adut(game, id_, game.count_dalje >= 3)
+            if adut is None:
+                game.count_dalje += 1
+                game.dalje[id_] = True
+                game.next_turn()
+            else:
+                game.set_adut(adut)
+                game.adut_caller = id_
+                game.next_game_state()
+
+    def call_zvanja(self, game: Bela) -> None:
+        for i in range(4):
+            game.add_zvanja(self.policies[i].zvanja(game, i), i)
+            game.zvanje_over[i][0] = True
+        game.calculate_zvanja()
+
+        for i in range(4):
+            game.zvanje_over[i][1] = True
+        game.next_game_state()
+
+    def play_trick(self, game: Bela) -> None:
+        while not game.turn_just_ended:
+            id_ = game.player_turn
+            policy = self.policies[id_]
+            card = policy.play_card(game, id_)
+            if not game.cards[id_].has(card) or not game.inspect_played_card(card, id_):
+                raise ValueError(f"Policy {type(policy).__name__} played an illegal card {card}.")
+
+            bela = game.player_has_bela(id_) and card in (("kralj", game.adut), ("baba", game.adut))
+            game.add_card_to_table(TableCard(card), id_)
+            game.cards[id_].remove(card)
+            if bela and policy.call_bela(game, id_):
+                game.called_bela = True
+                game.player_called_bela = id_
+
+        for i in range(4):
+            game.end_turn(i)
+
+
+def benchmark(policies: list[Policy], matches: int, max_points: int = 1001,
+              seed: Optional[int] = None) -> SimulationStats:
+    simulator = Simulator(policies, max_points)
+    stats = SimulationStats()
+
+    start = time.perf_counter()
+    for i in range(matches):
+        stats.add(simulator.play_match(None if seed is None else seed + i))
+    stats.duration = time.perf_counter() - start
+
+    return stats
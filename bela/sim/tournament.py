@@ -0,0 +1,149 @@
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Optional, Tuple
+
+from bela.ai.registry import POLICIES
+from bela.sim.simulator import Simulator
+
+
+@dataclass
+class ShardTask:
+
+    index: int
+    matches: int
+    seed: int
+    policies: Tuple[str, str]
+    duplicate: bool
+    max_points: int
+
+
+@dataclass
+class ShardResult:
+
+    """
+    Results of one shard from the point of view of the first policy. A sample is one match, or one
+    pair of matches with swapped seats when playing duplicate, the pair's mean point difference in
+    samples and its share of wins (0, 0.5 or 1) in win_samples.
+    """
+
+    matches: int = 0
+    deals: int = 0
+    points: list = field(default_factory=lambda: [0, 0])
+    samples: list = field(default_factory=list)
+    win_samples: list = field(default_factory=list)
+
+
+@dataclass
+class TournamentResult:
+
+    policies: Tuple[str, str]
+    matches: int
+    deals: int
+    duration: float
+    win_rate: float
+    win_rate_ci: float
+    avg_points: Tuple[float, float]
+    avg_diff: float
+    avg_diff_ci: float
+
+
+def shard_seed(seed: int, shard: int) -> int:
+    return random.Random(f"{seed}:{shard}").getrandbits(48)
+
+
+def play_shard(task: ShardTask) -> ShardResult:
+    rng = random.Random(task.seed)
+    result = ShardResult()
+
+    seatings = [(0, 1), (1, 0)] if task.duplicate else [(0, 1)]
+
+    for _ in range(task.matches):
+        match_seed = rng.getrandbits(48)
+        diff = wins = 0
+
+        for seating in seatings:
+            policies = [POLICIES[task.policies[seating[i % 2]]](rng.getrandbits(32)) for i in range(4)]
+            try:
+                match = Simulator(policies, task.max_points).play_match(match_seed)
+            finally:
+                for policy in policies:
+                    policy.close()
+
+            team = seating.index(0)
+            result.matches += 1
+            result.deals += match.deals
+            result.points[0] += match.points[team]
+            result.points[1] += match.points[1 - team]
+            wins += match.winner == team
+            diff += match.points[team] - match.points[1 - team]
+
+        result.samples.append(diff / len(seatings))
+        result.win_samples.append(wins / len(seatings))
+
+    return result
+
+
+def mean_ci(samples: list[float], z: float = 1.96) -> Tuple[float, float]:
+    n = len(samples)
+    if not n:
+        return 0, 0
+    mean = sum(samples) / n
+    if n < 2:
+        return mean, math.inf
+    variance = sum((x - mean) ** 2 for x in samples) / (n - 1)
+    return mean, z * math.sqrt(variance / n)
+
+
+def run_tournament(policies: Tuple[str, str], matches: int, seed: int = 0, processes: Optional[int] = None,
+                   shards: Optional[int] = None, duplicate: bool = True,
+                   max_points: int = 1001) -> TournamentResult:
+    """
+    Plays matches between two policies split into shards over a process pool. Every shard gets its
+    own seed derived from the tournament seed, so results don't depend on the number of processes
+    or the order shards finish in. When playing duplicate, matches is the number of deal sequences,
+    each played twice with the seats swapped.
+    """
+    for name in policies:
+        if name not in POLICIES:
+            raise ValueError(f"Unknown policy {name}.")
+
+    shards = shards or max(1, min(matches, 64))
+    tasks = [
+        ShardTask(i, matches // shards + int(i < matches % shards), shard_seed(seed, i),
+                  tuple(policies), duplicate, max_points)
+        for i in range(shards)
+    ]
+
+    start = time.perf_counter()
+    with Pool(processes) as pool:
+        results = pool.map(play_shard, tasks)
+    duration = time.perf_counter() - start
+
+    total = ShardResult()
+    for result in results:
+        total.matches += result.matches
+        total.deals += result.deals
+        total.points[0] += result.points[0]
+        total.points[1] += result.points[1]
+        total.samples += result.samples
+        total.win_samples += result.win_samples
+
+    n = max(total.matches, 1)
+    # the matches of a duplicate pair share their deals, so the intervals are over pairs, not matches
+    win_rate, win_rate_ci = mean_ci(total.win_samples)
+    avg_diff, avg_diff_ci = mean_ci(total.samples)
+
+    return TournamentResult(
+        policies=tuple(policies),
+        matches=total.matches,
+        deals=total.deals,
+        duration=duration,
+        win_rate=win_rate,
+        win_rate_ci=win_rate_ci,
+        avg_points=(total.points[0] / n, total.points[1] / n),
+        avg_diff=avg_diff,
+        avg_diff_ci=avg_diff_ci
+    )
@@ -1,9 +1,9 @@
-import pickle
+import asyncio
 import socket
 import time
-from _thread import start_new_thread
 
 from bela.game.networking.network import Network
+from bela.game.networking.wire import read_message, write_message
 from bela.game.utils.log import Log
 
 
@@ -12,124 +12,132 @@ class ServerControllerSS:
     def __init__(self, server) -> None:
         self.server = server
 
-    def run(self) -> None:
-        while True:
-
-            conn, addr = self.server.server_controller_socket.accept()
-            start_new_thread(self.run_, (conn, addr, ))
-            break
-
+    async def client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         Log.nl()
         Log.i("SERVER", "Server Controller activated!")
 
-    def run_(self, connection, address) -> None:
         while True:
             try:
-                command = pickle.loads(connection.recv(self.server.buffer))
-
-                response = "ok"
+                command = await read_message(reader, str)
 
+                # commands change the game they name, so they wait for the commands of its players
                 cmnds = command.split()
-
-                if cmnds and cmnds[0].lower() == "exec":
-                    try:
-                        exec(command[5:])
-                    except Exception as e:
-                        response = str(e)
-
-                if cmnds and cmnds[0].lower() == "cc":
-                    try:
-                        game_name = ""
-                        player = 0
-                        idx = 0
-                        if "-g" in cmnds:
-                            game_name = cmnds[cmnds.index("-g")+1]
-                            if game_name not in self.server.games:
-                                raise ValueError(f"Game {game_name} doesn't exist.")
-                        if "-p" in cmnds:
-                            player = int(cmnds[cmnds.index("-p")+1])
-                        if "-c" in cmnds:
-                            idx = int(cmnds[cmnds.index("-c")+1])
-                        if "-n" in cmnds:
-                            c = cmnds[cmnds.index("-n")+1]
-                            c = c.split("-")
-                            c = (c[0], c[1]) if c[1] in ("karo", "herc", "tref", "pik") else (c[1], c[0])
-                            idx = self.server.games[game_name].cards[player].sve.index(c)
-
-                        card = cmnds[-1]
-                        card = card.split("-")
-                        card = (card[0], card[1]) if card[1] in ("karo", "herc", "tref", "pik") else (card[1], card[0])
-
-                        self.server.games[game_name].cards[player].sve[idx] = card
-                    except Exception as e:
-                        response = str(e)
-
-                if cmnds and cmnds[0].lower() == "auto":
-                    try:
-                        val = True
-                        game_name = ""
-                        if "-g" in cmnds:
-                            game_name = cmnds[cmnds.index("-g")+1]
-                            if game_name not in self.server.games:
-                                raise ValueError(f"Game {game_name} doesn't exist.")
-                        if "-s" in cmnds:
-                            val = False
-                        if "-all" in cmnds:
-                            self.server.games[game_name].auto_play = [val] * 4
-                        for cmnd in cmnds[1:]:
-                            if "-" in cmnd:
-                                break
-                            self.server.games[game_name].auto_play[int(cmnd)] = val
-                    except Exception as e:
-                        response = str(e)
-
-                if cmnds and cmnds[0].lower() == "belot":
-                    try:
-                        game_name = ""
-                        player = 0
-                        color = "herc"
-                        if "-g" in cmnds:
-                            game_name = cmnds[cmnds.index("-g")+1]
-                            if game_name not in self.server.games:
-                                raise ValueError(f"Game {game_name} doesn't exist.")
-                        if "-p" in cmnds:
-                            player = int(cmnds[cmnds.index("-p")+1])
-                        if "-c" in cmnds:
-                            color = cmnds[cmnds.index("-c")+1]
-
-                        if color not in ("pik", "herc", "karo", "tref"):
-                            raise ValueError("Invalid card color.")
-
-                        cards = [(value, color) for value in ["7", "8", "9", "cener", "unter", "baba", "kralj", "kec"]]
-                        for i, card in enumerate(cards):
-                            self.server.games[game_name].cards[player].sve[i] = card
-                    except Exception as e:
-                        response = str(e)
-
-                if cmnds and cmnds[0].lower() == "p+":
-                    try:
-                        game_name = ""
-                        idx = int(cmnds[1])
-                        points = int(cmnds[2])
-                        if "-g" in cmnds:
-                            game_name = cmnds[cmnds.index("-g")+1]
-                            if game_name not in self.server.games:
-                                raise ValueError(f"Game {game_name} doesn't exist.")
-
-                        self.server.games[game_name].games.append([points * (1 - idx), points * idx])
-                    except Exception as e:
-                        response = str(e)
-
-                connection.sendall(pickle.dumps(response))
-            except socket.error:
+                game_name = cmnds[cmnds.index("-g")+1] if "-g" in cmnds[:-1] else ""
+                async with self.server.game_lock(game_name):
+                    response = self.execute(command)
+                    self.server.sync_games()
+
+                write_message(writer, response)
+                await writer.drain()
+            except (socket.error, EOFError, ):
                 Log.e("SERVER", "Server controller closed!")
                 break
 
+        writer.close()
+
+    def execute(self, command: str) -> str:
+        response = "ok"
+
+        cmnds = command.split()
+
+        if cmnds and cmnds[0].lower() == "exec":
+            try:
+                exec(command[5:])
+            except Exception as e:
+                response = str(e)
+
+        if cmnds and cmnds[0].lower() == "cc":
+            try:
+                game_name = ""
+                player = 0
+                idx = 0
+                if "-g" in cmnds:
+                    game_name = cmnds[cmnds.index("-g")+1]
+                    if game_name not in self.server.games:
+                        raise ValueError(f"Game {game_name} doesn't exist.")
+                if "-p" in cmnds:
+                    player = int(cmnds[cmnds.index("-p")+1])
+                if "-c" in cmnds:
+                    idx = int(cmnds[cmnds.index("-c")+1])
+                if "-n" in cmnds:
+                    c = cmnds[cmnds.index("-n")+1]
+                    c = c.split("-")
+                    c = (c[0], c[1]) if c[1] in ("karo", "herc", "tref", "pik") else (c[1], c[0])
+                    idx = self.server.games[game_name].cards[player].sve.index(c)
+
+                card = cmnds[-1]
+                card = card.split("-")
+                card = (card[0], card[1]) if card[1] in ("karo", "herc", "tref", "pik") else (card[1], card[0])
+
+                self.server.games[game_name].cards[player].sve[idx] = card
+                self.server.games[game_name].cards[player].update_mask()
+            except Exception as e:
+                response = str(e)
+
+        if cmnds and cmnds[0].lower() == "auto":
+            try:
+                val = True
+                game_name = ""
+                if "-g" in cmnds:
+                    game_name = cmnds[cmnds.index("-g")+1]
+                    if game_name not in self.server.games:
+                        raise ValueError(f"Game {game_name} doesn't exist.")
+                if "-s" in cmnds:
+                    val = False
+                if "-all" in cmnds:
+                    self.server.games[game_name].auto_play = [val] * 4
+                for cmnd in cmnds[1:]:
+                    if "-" in cmnd:
+                        break
+                    self.server.games[game_name].auto_play[int(cmnd)] = val
+            except Exception as e:
+                response = str(e)
+
+        if cmnds and cmnds[0].lower() == "belot":
+            try:
+                game_name = ""
+                player = 0
+                color = "herc"
+                if "-g" in cmnds:
+                    game_name = cmnds[cmnds.index("-g")+1]
+                    if game_name not in self.server.games:
+                        raise ValueError(f"Game {game_name} doesn't exist.")
+                if "-p" in cmnds:
+                    player = int(cmnds[cmnds.index("-p")+1])
+                if "-c" in cmnds:
+                    color = cmnds[cmnds.index("-c")+1]
+
+                if color not in ("pik", "herc", "karo", "tref"):
+                    raise ValueError("Invalid card color.")
+
+                cards = [(value, color) for value in ["7", "8", "9", "cener", "unter", "baba", "kralj", "kec"]]
+                for i, card in enumerate(cards):
+                    self.server.games[game_name].cards[player].sve[i] = card
+                self.server.games[game_name].cards[player].update_mask()
+            except Exception as e:
+                response = str(e)
+
+        if cmnds and cmnds[0].lower() == "p+":
+            try:
+                game_name = ""
+                idx = int(cmnds[1])
+                points = int(cmnds[2])
+                if "-g" in cmnds:
+                    game_name = cmnds[cmnds.index("-g")+1]
+                    if game_name not in self.server.games:
+                        raise ValueError(f"Game {game_name} doesn't exist.")
+
+                self.server.games[game_name].games.append([points * (1 - idx), points * idx])
+            except Exception as e:
+                response = str(e)
+
+        return response
+
 
 class ServerControllerCS:
 
     def __init__(self) -> None:
-        self.network = Network(buffer=4096, port=22223)
+        self.network = Network(port=22223)
         self.network.connect()
 
         Log.clear()